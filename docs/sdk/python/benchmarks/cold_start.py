@@ -0,0 +1,93 @@
+"""
+Cold-start benchmark
+
+Runs each scenario in a fresh interpreter, the way a serverless function or CLI tool
+starts, and reports the time spent in the scenario itself and the whole process.
+
+    python benchmarks/cold_start.py [--runs 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SDK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PRELUDE = "import time\nstart = time.perf_counter()\n"
+_EPILOGUE = "\nprint(time.perf_counter() - start)\n"
+
+SCENARIOS = {
+    "import": "import pexipay",
+    "import_client": "from pexipay import PexipayClient",
+    "construct_client": (
+        "from pexipay import PexipayClient\n"
+        "client = PexipayClient('sk_test_benchmark')"
+    ),
+    "first_call": (
+        "from pexipay import PexipayClient\n"
+        "from pexipay.transports import InMemoryTransport\n"
+        "transport = InMemoryTransport(lambda request, **params: {'data': {}})\n"
+        "client = PexipayClient('sk_test_benchmark', transport=transport)\n"
+        "client.balance.retrieve()"
+    ),
+    "first_call_default_transport": (
+        "from pexipay import PexipayClient\n"
+        "client = PexipayClient('sk_test_benchmark')\n"
+        "client.session"
+    ),
+}
+
+
+def run_scenario(code: str) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=SDK_ROOT)
+    begin = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PRELUDE + code + _EPILOGUE],
+        cwd=SDK_ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    process = time.perf_counter() - begin
+    return {"scenario": float(output.strip().splitlines()[-1]), "process": process}
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20, help="Fresh interpreters per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    # Warm the bytecode cache so the first run is not an outlier
+    run_scenario(SCENARIOS["first_call"])
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        samples = [run_scenario(code) for _ in range(args.runs)]
+        scenario = [s["scenario"] * 1000 for s in samples]
+        process = [s["process"] * 1000 for s in samples]
+        results[name] = {
+            "median_ms": statistics.median(scenario),
+            "min_ms": min(scenario),
+            "process_median_ms": statistics.median(process),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<30} {'median ms':>10} {'min ms':>10} {'process ms':>11}")
+    for name, result in results.items():
+        print(
+            f"{name:<30} {result['median_ms']:>10.1f} {result['min_ms']:>10.1f} "
+            f"{result['process_median_ms']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,321 @@
+"""
+End-to-end benchmark suite with baseline comparison
+
+Runs the SDK against the local API emulator over loopback HTTP (and against an
+in-process transport where only client-side work is of interest), writes the results
+as JSON, and compares them with a baseline file from an earlier run:
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json [--threshold 0.15]
+
+Exits with status 1 when a metric is worse than the baseline by more than the threshold.
+Compare runs from the same machine only; absolute numbers vary widely between hosts.
+"""
+
+import argparse
+import gc
+import hashlib
+import hmac
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+SDK_ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, SDK_ROOT)
+sys.path.insert(0, BENCHMARKS)
+
+import cold_start  # noqa: E402
+import request_overhead  # noqa: E402
+from pexipay import (  # noqa: E402
+    PexipayClient,
+    __version__,
+    construct_webhook_event,
+    verify_webhook_signature,
+)
+from pexipay.emulator import EmulatorServer, EmulatorStore  # noqa: E402
+from pexipay.transports import InMemoryTransport, TransportResponse  # noqa: E402
+
+Metric = Dict[str, Any]
+
+# Sizes for a full run and for --quick
+SIZES = {
+    "full": {"calls": 20000, "http_calls": 2000, "records": 50000, "creates": 2000, "imports": 10},
+    "quick": {"calls": 2000, "http_calls": 200, "records": 5000, "creates": 200, "imports": 3},
+}
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Metric:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_request_overhead(sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Client-side cost of a call, with the network replaced by a canned response"""
+    client = PexipayClient("sk_test_benchmark", transport=request_overhead.NullTransport())
+    results = {}
+    for name, func in request_overhead.scenarios(client).items():
+        samples = request_overhead.time_per_call(func, sizes["calls"], 3)
+        results[f"overhead.{name}"] = metric(min(samples) / 1000, "us")
+    return results
+
+
+def bench_http(server: EmulatorServer, sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Round-trip latency of single requests over a keep-alive connection"""
+    client = PexipayClient("sk_test_benchmark", api_base_url=server.url)
+    payment_id = client.payments.list(limit=1)["data"][0]["id"]
+    for _ in range(50):
+        client.payments.retrieve(payment_id)
+    samples = []
+    for _ in range(sizes["http_calls"]):
+        start = time.perf_counter()
+        client.payments.retrieve(payment_id)
+        samples.append((time.perf_counter() - start) * 1e6)
+    client.transport.close()
+    return {
+        "http.retrieve_p50": metric(statistics.median(samples), "us"),
+        "http.retrieve_p99": metric(percentile(samples, 0.99), "us"),
+    }
+
+
+def bench_pagination(server: EmulatorServer, sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Records per second when walking a list with limit=100 pages"""
+    client = PexipayClient("sk_test_benchmark", api_base_url=server.url)
+    wanted = sizes["records"]
+    seen = 0
+    cursor = None
+    start = time.perf_counter()
+    while seen < wanted:
+        page = client.payments.list(limit=100, starting_after=cursor)
+        seen += len(page["data"])
+        if not page["hasMore"]:
+            break
+        cursor = page["data"][-1]["id"]
+    elapsed = time.perf_counter() - start
+    client.transport.close()
+    return {"pagination.records_per_s": metric(seen / elapsed, "records/s", "higher")}
+
+
+def bench_bulk_create(server: EmulatorServer, sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Payments created per second, one at a time and from a thread pool"""
+    client = PexipayClient("sk_test_benchmark", api_base_url=server.url)
+    count = sizes["creates"]
+
+    def create(index: int) -> Any:
+        return client.payments.create(
+            amount=10 + index % 100, currency="USD", description=f"Bulk #{index}"
+        )
+
+    results = {}
+    for workers in (1, 8):
+        start = time.perf_counter()
+        if workers == 1:
+            for index in range(count):
+                create(index)
+        else:
+            with ThreadPoolExecutor(workers) as executor:
+                list(executor.map(create, range(count)))
+        rate = count / (time.perf_counter() - start)
+        results[f"bulk_create.threads_{workers}_per_s"] = metric(rate, "creates/s", "higher")
+    client.transport.close()
+    return results
+
+
+def bench_webhooks(sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Signature checks and parsed events per second for a typical payment webhook"""
+    store = EmulatorStore(payments=1)
+    payload = json.dumps(
+        {
+            "event": "payment.succeeded",
+            "timestamp": "2024-01-01T00:00:00.000Z",
+            "data": store.payments.get(0),
+        }
+    )
+    secret = "whsec_benchmark"
+    signature = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    results = {}
+    for name, func in (
+        ("verify", lambda: verify_webhook_signature(payload, signature, secret)),
+        ("construct_event", lambda: construct_webhook_event(payload, signature, secret)),
+    ):
+        calls = sizes["calls"]
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        rate = calls / (time.perf_counter() - start)
+        results[f"webhooks.{name}_per_s"] = metric(rate, "events/s", "higher")
+    return results
+
+
+def bench_cold_import(sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Time to import the SDK and build a client in a fresh interpreter"""
+    cold_start.run_scenario(cold_start.SCENARIOS["construct_client"])
+    results = {}
+    for name in ("import", "construct_client"):
+        samples = [
+            cold_start.run_scenario(cold_start.SCENARIOS[name])["scenario"] * 1000
+            for _ in range(sizes["imports"])
+        ]
+        results[f"cold.{name}_ms"] = metric(statistics.median(samples), "ms")
+    return results
+
+
+def bench_memory(sizes: Dict[str, int]) -> Dict[str, Metric]:
+    """Memory held by 10,000 payments returned from list calls, and the peak to fetch them"""
+    store = EmulatorStore(payments=10_000)
+    pages = []
+    for offset in range(0, 10_000, 100):
+        records = [store.payments.get(index) for index in range(offset, offset + 100)]
+        pages.append(json.dumps({"data": records, "hasMore": True}).encode("utf-8"))
+    position = iter(range(len(pages)))
+
+    headers = {"Content-Type": "application/json"}
+    transport = InMemoryTransport()
+    transport.add(
+        "GET", "/payments", lambda request: TransportResponse(200, headers, pages[next(position)])
+    )
+    client = PexipayClient("sk_test_benchmark", transport=transport)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        kept = []
+        for _ in pages:
+            kept.extend(client.payments.list(limit=100)["data"])
+        transport.requests.clear()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(kept) == 10_000
+    return {
+        "memory.held_per_10k_bytes": metric(current - baseline, "bytes"),
+        "memory.peak_per_10k_bytes": metric(peak - baseline, "bytes"),
+    }
+
+
+def run_suite(sizes: Dict[str, int], only: Optional[List[str]] = None) -> Dict[str, Metric]:
+    local: Dict[str, Callable[[Dict[str, int]], Dict[str, Metric]]] = {
+        "overhead": bench_request_overhead,
+        "webhooks": bench_webhooks,
+        "memory": bench_memory,
+        "cold": bench_cold_import,
+    }
+    served: Dict[str, Callable[[EmulatorServer, Dict[str, int]], Dict[str, Metric]]] = {
+        "http": bench_http,
+        "pagination": bench_pagination,
+        "bulk_create": bench_bulk_create,
+    }
+    results: Dict[str, Metric] = {}
+    for name, bench in local.items():
+        if not only or name in only:
+            results.update(bench(sizes))
+    if not only or any(name in only for name in served):
+        store = EmulatorStore(payments=max(sizes["records"], 10_000), seed=1)
+        with EmulatorServer(store=store) as server:
+            for name, served_bench in served.items():
+                if not only or name in only:
+                    results.update(served_bench(server, sizes))
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SDK_ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "sdk_version": __version__,
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def compare(
+    results: Dict[str, Metric], baseline: Dict[str, Metric], threshold: float
+) -> List[Dict[str, Any]]:
+    """Relative change of every metric present in both runs, flagged when it regressed"""
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (current["value"] - previous["value"]) / previous["value"]
+        worse = change if current["better"] == "lower" else -change
+        rows.append(
+            {
+                "metric": name,
+                "baseline": previous["value"],
+                "current": current["value"],
+                "change": change,
+                "regression": worse > threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="Tolerated slowdown (0.15 = 15%%)"
+    )
+    parser.add_argument("--only", action="append", help="Run only this group (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for CI smoke runs")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_suite(SIZES["quick" if args.quick else "full"], args.only)
+    document = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+            file.write("\n")
+
+    rows: List[Dict[str, Any]] = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            rows = compare(results, json.load(file)["results"], args.threshold)
+        document["comparison"] = rows
+
+    if args.json:
+        print(json.dumps(document, indent=2))
+    elif rows:
+        print(f"{'metric':<36} {'baseline':>14} {'current':>14} {'change':>8}")
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['metric']:<36} {row['baseline']:>14.1f} {row['current']:>14.1f} "
+                f"{row['change']:>+8.1%}{flag}"
+            )
+    else:
+        print(f"{'metric':<36} {'value':>14} unit")
+        for name, result in results.items():
+            print(f"{name:<36} {result['value']:>14.1f} {result['unit']}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
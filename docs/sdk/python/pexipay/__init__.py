@@ -5,27 +5,91 @@ Official Python SDK for Pexipay card-to-crypto payment platform
 
 __version__ = "1.0.0"
 
-from .client import PexipayClient
-from .errors import (
-    PexipayError,
-    AuthenticationError,
-    ValidationError,
-    RateLimitError,
-    NetworkError,
-    ResourceNotFoundError,
-    PaymentFailedError,
-)
-from .webhooks import verify_webhook_signature, construct_webhook_event
-
-__all__ = [
-    "PexipayClient",
-    "PexipayError",
-    "AuthenticationError",
-    "ValidationError",
-    "RateLimitError",
-    "NetworkError",
-    "ResourceNotFoundError",
-    "PaymentFailedError",
-    "verify_webhook_signature",
-    "construct_webhook_event",
-]
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+    from .errors import (
+        PexipayError,
+        AuthenticationError,
+        ValidationError,
+        RateLimitError,
+        NetworkError,
+        RequestTimeoutError,
+        DeadlineExceededError,
+        CircuitOpenError,
+        ResourceNotFoundError,
+        PaymentFailedError,
+        RequestQueuedError,
+    )
+    from .webhooks import verify_webhook_signature, construct_webhook_event
+    from .hooks import Hooks, RequestEvent, RequestTimings, LatencyAggregator
+    from .retry import RetryPolicy
+    from .circuit_breaker import CircuitBreakerConfig
+    from .hedging import HedgePolicy
+    from .concurrency import AdaptiveConcurrencyLimiter
+    from .poller import PaymentStatusPoller, StatusChange
+    from .process_pool import ClientProcessPool
+    from .response import PexipayResponse, RateLimitInfo
+    from .pagination import ListCheckpoint, ListIterator
+    from .feed import ChangeFeed, FeedState
+    from .balance_cache import BalanceCache
+    from .campaigns import CsvSink, JsonlSink, PaymentLinkCampaign
+    from .outbox import Outbox
+
+# Public names and the submodule defining them. Submodules (and their dependencies such
+# as requests) are imported on first attribute access, keeping `import pexipay` cheap.
+_EXPORTS = {
+    "PexipayClient": "client",
+    "PexipayError": "errors",
+    "AuthenticationError": "errors",
+    "ValidationError": "errors",
+    "RateLimitError": "errors",
+    "NetworkError": "errors",
+    "RequestTimeoutError": "errors",
+    "DeadlineExceededError": "errors",
+    "CircuitOpenError": "errors",
+    "ResourceNotFoundError": "errors",
+    "PaymentFailedError": "errors",
+    "RequestQueuedError": "errors",
+    "verify_webhook_signature": "webhooks",
+    "construct_webhook_event": "webhooks",
+    "Hooks": "hooks",
+    "RequestEvent": "hooks",
+    "RequestTimings": "hooks",
+    "LatencyAggregator": "hooks",
+    "RetryPolicy": "retry",
+    "CircuitBreakerConfig": "circuit_breaker",
+    "HedgePolicy": "hedging",
+    "AdaptiveConcurrencyLimiter": "concurrency",
+    "PaymentStatusPoller": "poller",
+    "StatusChange": "poller",
+    "ClientProcessPool": "process_pool",
+    "PexipayResponse": "response",
+    "RateLimitInfo": "response",
+    "ListCheckpoint": "pagination",
+    "ListIterator": "pagination",
+    "ChangeFeed": "feed",
+    "FeedState": "feed",
+    "BalanceCache": "balance_cache",
+    "PaymentLinkCampaign": "campaigns",
+    "CsvSink": "campaigns",
+    "JsonlSink": "campaigns",
+    "Outbox": "outbox",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,29 @@
+"""Rebuilding per-process SDK state in the child after os.fork()"""
+
+import os
+import weakref
+from typing import Any
+
+# Objects with an _after_fork() method, held weakly so registration never keeps them alive
+_instances: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def register(obj: Any) -> None:
+    """
+    Call ``obj._after_fork()`` in the child of every fork while the object is alive
+
+    A forked child inherits connection pools whose sockets are still used by the parent
+    (two processes reading one socket interleave responses) and locks that may have been
+    held by parent threads that do not exist in the child.
+    """
+    _instances.add(obj)
+
+
+def _after_fork_in_child() -> None:
+    for obj in list(_instances):
+        obj._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    # Covers os.fork(), multiprocessing's fork start method and pre-fork servers
+    os.register_at_fork(after_in_child=_after_fork_in_child)
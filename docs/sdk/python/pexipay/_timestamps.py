@@ -0,0 +1,29 @@
+"""Timestamp helpers for API date fields"""
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Convert an API timestamp (ISO 8601 string or epoch number) to epoch seconds"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        # Epoch values in milliseconds are common in JSON payloads
+        return value / 1000.0 if value > 1e11 else float(value)
+    text = str(value)
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_timestamp(epoch: float) -> str:
+    """Format epoch seconds as an ISO 8601 UTC string accepted by list filters"""
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
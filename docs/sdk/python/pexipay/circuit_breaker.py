@@ -0,0 +1,206 @@
+"""Per-endpoint-group circuit breakers"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, FrozenSet, Optional, Tuple
+
+from . import _fork
+from .errors import CircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+StateChangeCallback = Callable[[str, str, str], None]
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    """
+    Thresholds for opening and closing a circuit
+
+    Attributes:
+        window: Number of most recent calls evaluated
+        min_calls: Calls required in the window before the circuit may open
+        failure_rate_threshold: Fraction of failed calls that opens the circuit
+        slow_call_duration: Calls slower than this many seconds count as slow
+        slow_call_rate_threshold: Fraction of slow calls that opens the circuit
+        open_duration: Seconds the circuit stays open before allowing probes; also
+            how long half-open probes may go unanswered before new ones are admitted
+        half_open_probes: Probe calls allowed while half-open; all must succeed
+            for the circuit to close
+        failure_status_codes: HTTP statuses counted as failures (network errors
+            and timeouts always are)
+    """
+
+    window: int = 50
+    min_calls: int = 20
+    failure_rate_threshold: float = 0.5
+    slow_call_duration: float = 5.0
+    slow_call_rate_threshold: float = 0.8
+    open_duration: float = 30.0
+    half_open_probes: int = 3
+    failure_status_codes: FrozenSet[int] = frozenset({500, 502, 503, 504})
+
+
+class CircuitBreaker:
+    """Circuit breaker for a single endpoint group"""
+
+    def __init__(
+        self,
+        name: str,
+        config: CircuitBreakerConfig,
+        on_state_change: Optional[StateChangeCallback] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.config = config
+        self.on_state_change = on_state_change
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probes_armed_at = 0.0
+        self._outcomes: Deque[Tuple[bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # Keeps the state: the child talks to the same unhealthy (or healthy) API
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Admit a call, raising CircuitOpenError when the circuit rejects it"""
+        transition = None
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.config.open_duration - self.clock()
+                if retry_in > 0:
+                    raise CircuitOpenError(self.name, retry_in)
+                transition = self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes_started >= self.config.half_open_probes:
+                    # A probe whose outcome never arrives must not hold the circuit
+                    # half-open forever: after open_duration, admit a fresh set
+                    retry_in = self._probes_armed_at + self.config.open_duration - self.clock()
+                    if retry_in > 0:
+                        raise CircuitOpenError(self.name, retry_in)
+                    self._arm_probes()
+                self._probes_started += 1
+        self._notify(transition)
+
+    def cancel(self) -> None:
+        """Give back an admitted call that ended without an outcome to record"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_started > self._probes_succeeded:
+                self._probes_started -= 1
+
+    def record(self, failed: bool, duration: float) -> None:
+        """Record the outcome of an admitted call"""
+        slow = duration >= self.config.slow_call_duration
+        transition = None
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    transition = self._transition(OPEN)
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.config.half_open_probes:
+                        transition = self._transition(CLOSED)
+            elif self.state == CLOSED:
+                self._add_outcome(failed, slow)
+                if self._should_open():
+                    transition = self._transition(OPEN)
+        self._notify(transition)
+
+    def reset(self) -> None:
+        """Force the circuit closed and forget recorded calls"""
+        with self._lock:
+            transition = self._transition(CLOSED) if self.state != CLOSED else None
+        self._notify(transition)
+
+    def _add_outcome(self, failed: bool, slow: bool) -> None:
+        if len(self._outcomes) >= self.config.window:
+            old_failed, old_slow = self._outcomes.popleft()
+            self._failures -= old_failed
+            self._slow -= old_slow
+        self._outcomes.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+
+    def _should_open(self) -> bool:
+        calls = len(self._outcomes)
+        if calls < self.config.min_calls:
+            return False
+        return (
+            self._failures / calls >= self.config.failure_rate_threshold
+            or self._slow / calls >= self.config.slow_call_rate_threshold
+        )
+
+    def _arm_probes(self) -> None:
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._probes_armed_at = self.clock()
+
+    def _transition(self, state: str) -> Tuple[str, str]:
+        previous = self.state
+        self.state = state
+        self._arm_probes()
+        if state == OPEN:
+            self.opened_at = self.clock()
+        if state == CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+            self._slow = 0
+        return previous, state
+
+    def _notify(self, transition: Optional[Tuple[str, str]]) -> None:
+        if transition is not None and self.on_state_change is not None:
+            self.on_state_change(self.name, transition[0], transition[1])
+
+
+def endpoint_group(endpoint: str) -> str:
+    """Endpoint group of an API path, e.g. /payments/pay_1/capture -> payments"""
+    return endpoint.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+
+
+class CircuitBreakerRegistry:
+    """Lazily created circuit breakers keyed by endpoint group"""
+
+    def __init__(
+        self,
+        config: Optional[CircuitBreakerConfig] = None,
+        on_state_change: Optional[StateChangeCallback] = None,
+    ):
+        self.config = config or CircuitBreakerConfig()
+        self.on_state_change = on_state_change
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        for breaker in self._breakers.values():
+            breaker._after_fork()
+
+    def for_endpoint(self, endpoint: str) -> CircuitBreaker:
+        """Circuit breaker guarding an endpoint's group"""
+        group = endpoint_group(endpoint)
+        breaker = self._breakers.get(group)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(group)
+                if breaker is None:
+                    breaker = CircuitBreaker(group, self.config, self.on_state_change)
+                    self._breakers[group] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        """Current state of every group seen so far"""
+        return {name: breaker.state for name, breaker in self._breakers.items()}
@@ -0,0 +1,473 @@
+"""
+Command-line tool: python -m pexipay (or ``pexipay`` when installed)
+
+    pexipay export payments -o payments.jsonl --created-after 2024-01-01 --shards 8
+    pexipay bulk refund refunds.csv -o refunds.results.jsonl --workers 16 --resume
+    pexipay bench --emulator --operation list-payments --concurrency 32 --duration 10
+
+The API key is read from ``--api-key`` or the PEXIPAY_API_KEY environment variable.
+Modules are imported by the command that needs them, so the tool starts quickly.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+# Resource name on the command line -> client attribute and iterator method
+EXPORTS = {
+    "payments": ("payments", "list_all"),
+    "refunds": ("refunds", "list_all"),
+    "customers": ("customers", "list_all"),
+    "payment-links": ("payment_links", "list_all"),
+    "transactions": ("transactions", "list_all"),
+    "balance-transactions": ("balance", "list_all_transactions"),
+}
+
+# Bulk operation -> client attribute and method
+OPERATIONS = {
+    "create-payments": ("payments", "create"),
+    "create-payment-links": ("payment_links", "create"),
+    "create-customers": ("customers", "create"),
+    "refund": ("refunds", "create"),
+}
+
+# CSV cells of these columns are converted from text
+NUMERIC_FIELDS = frozenset({"amount"})
+JSON_FIELDS = frozenset({"metadata", "customer_info", "address", "payment_method"})
+
+BENCH_OPERATIONS = ("retrieve-payment", "list-payments", "create-payment", "balance")
+
+# Records between output flushes and checkpoint saves during an export
+FLUSH_EVERY = 1000
+
+
+class _Output:
+    """Thread-safe JSONL or CSV writer for records; CSV columns come from the first record"""
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None, append: bool = False):
+        self.csv = path.lower().endswith(".csv")
+        if path == "-":
+            self._file: IO[str] = sys.stdout
+        else:
+            self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._fields = fields
+        self._writer: Any = None
+        self._header = not (append and path != "-" and self._file.tell() > 0)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self.csv:
+                self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+                return
+            if self._writer is None:
+                import csv
+
+                fields = self._fields or list(record)
+                self._writer = csv.DictWriter(self._file, fields, extrasaction="ignore")
+                if self._header:
+                    self._writer.writeheader()
+            self._writer.writerow(
+                {
+                    name: json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for name, value in record.items()
+                }
+            )
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is sys.stdout:
+            self.flush()
+        else:
+            self._file.close()
+
+
+def _client(args: argparse.Namespace, base_url: Optional[str] = None) -> "PexipayClient":
+    from .client import PexipayClient
+    from .retry import RetryPolicy
+
+    api_key = args.api_key or os.environ.get("PEXIPAY_API_KEY")
+    if not api_key:
+        raise SystemExit("error: set --api-key or PEXIPAY_API_KEY")
+    retry = RetryPolicy(max_retries=args.max_retries, deadline=None)
+    return PexipayClient(
+        api_key,
+        environment=args.environment,
+        api_base_url=base_url or args.base_url or os.environ.get("PEXIPAY_API_BASE_URL"),
+        timeout=args.timeout,
+        retry=retry,
+    )
+
+
+def _report(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+# export
+
+
+def _shard_bounds(
+    created_after: Optional[str], created_before: Optional[str], shards: int
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    from ._timestamps import format_timestamp, parse_timestamp
+
+    if shards == 1:
+        return [(created_after, created_before)]
+    start = parse_timestamp(created_after)
+    if start is None:
+        raise SystemExit("error: --shards needs --created-after")
+    end = parse_timestamp(created_before)
+    if end is None:
+        end = time.time()
+    # Boundaries in whole milliseconds, the precision of API timestamps. createdAfter is
+    # exclusive, so each later shard starts one millisecond before its boundary.
+    start_ms, end_ms = int(start * 1000), int(end * 1000)
+    edges = [start_ms + (end_ms - start_ms) * i // shards for i in range(shards + 1)]
+    bounds: List[Tuple[Optional[str], Optional[str]]] = []
+    for i in range(shards):
+        after = created_after if i == 0 else format_timestamp((edges[i] - 1) / 1000)
+        before = created_before if i == shards - 1 else format_timestamp(edges[i + 1] / 1000)
+        bounds.append((after, before))
+    return bounds
+
+
+def export(args: argparse.Namespace) -> int:
+    from ._bulk import map_unordered
+
+    client = _client(args)
+    attribute, method = EXPORTS[args.resource]
+    list_all = getattr(getattr(client, attribute), method)
+    filters: Dict[str, Any] = {}
+    if args.status:
+        filters["status"] = args.status
+    if args.resource == "balance-transactions":
+        if filters or args.created_after or args.created_before or args.shards > 1:
+            raise SystemExit("error: balance-transactions cannot be filtered or sharded")
+        bounds: List[Tuple[Optional[str], Optional[str]]] = [(None, None)]
+    else:
+        bounds = _shard_bounds(args.created_after, args.created_before, args.shards)
+
+    checkpoints = args.checkpoint_dir
+    resuming = False
+    if checkpoints:
+        os.makedirs(checkpoints, exist_ok=True)
+        resuming = any(name.endswith(".json") for name in os.listdir(checkpoints))
+    fields = args.fields.split(",") if args.fields else None
+    output = _Output(args.output, fields, append=resuming)
+    stop = threading.Event()
+
+    def run_shard(index: int, window: Tuple[Optional[str], Optional[str]]) -> int:
+        options: Dict[str, Any] = dict(filters, page_size=args.page_size)
+        if window != (None, None):
+            options.update(created_after=window[0], created_before=window[1])
+        if checkpoints:
+            name = f"{args.resource}-{index + 1}-of-{len(bounds)}.json"
+            options["checkpoint_file"] = os.path.join(checkpoints, name)
+            # Saved below, after the output is flushed, so no record is ever skipped
+            options["checkpoint_every"] = sys.maxsize
+        count = 0
+        with list_all(**options) as records:
+            try:
+                for record in records:
+                    output.write(record)
+                    count += 1
+                    if count % FLUSH_EVERY == 0:
+                        output.flush()
+                        records.save()
+                    if stop.is_set():
+                        break
+            finally:
+                output.flush()
+        return count
+
+    started = time.monotonic()
+    total = 0
+    try:
+        # On Ctrl-C, map_unordered sets stop before waiting for the shards, so each one
+        # saves its checkpoint after the record it is on instead of reading to the end
+        for count in map_unordered(run_shard, bounds, len(bounds), "pexipay-export", stop):
+            total += count
+    except KeyboardInterrupt:
+        _report("Interrupted; rerun with the same --checkpoint-dir to resume")
+        return 130
+    finally:
+        output.close()
+    elapsed = max(time.monotonic() - started, 1e-6)
+    _report(f"Exported {total} {args.resource} in {elapsed:.1f}s ({total / elapsed:.0f}/s)")
+    return 0
+
+
+# bulk
+
+
+def _convert(name: str, value: str) -> Any:
+    if name in NUMERIC_FIELDS:
+        return float(value)
+    if name in JSON_FIELDS:
+        return json.loads(value)
+    return value
+
+
+def _read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    file = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if path.lower().endswith(".csv"):
+            import csv
+
+            for row in csv.DictReader(file):
+                yield {name: _convert(name, value) for name, value in row.items() if value != ""}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def _completed_keys(path: str) -> Set[str]:
+    done: Set[str] = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    result = json.loads(line)
+                    if result.get("ok"):
+                        done.add(result["key"])
+    return done
+
+
+def bulk(args: argparse.Namespace) -> int:
+    import inspect
+
+    from ._bulk import map_unordered
+    from ._rate_limit import TokenBucket
+    from .errors import PexipayError
+    from .retry import derive_idempotency_key
+
+    client = _client(args)
+    attribute, method = OPERATIONS[args.operation]
+    call = getattr(getattr(client, attribute), method)
+    # The key column is passed on only when it is also an argument, e.g. payment_id
+    keep_key = args.key_field in inspect.signature(call).parameters
+    job_id = args.job_id or f"{args.operation}:{os.path.abspath(args.file)}"
+    output_path = args.output or f"{args.file}.results.jsonl"
+    done = _completed_keys(output_path) if args.resume else set()
+    output = _Output(output_path, append=args.resume)
+    bucket = TokenBucket(args.rate) if args.rate else None
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def keyed_rows() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for index, row in enumerate(_read_rows(args.file)):
+            value = row.get(args.key_field) if keep_key else row.pop(args.key_field, None)
+            key = str(value) if value is not None else f"#{index}"
+            if key in done:
+                counts["skipped"] += 1
+                continue
+            yield key, row
+
+    def run(index: int, item: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+        key, row = item
+        result: Dict[str, Any] = {"key": key, "ok": False, "id": None, "error": None}
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            response = call(**row, idempotency_key=derive_idempotency_key(job_id, key))
+        except (PexipayError, TypeError, ValueError) as error:
+            result["error"] = str(error) or type(error).__name__
+            return result
+        result.update(ok=True, id=response.get("id"), status=response.get("status"))
+        return result
+
+    started = time.monotonic()
+    try:
+        for result in map_unordered(run, keyed_rows(), args.workers, "pexipay-bulk"):
+            counts["ok" if result["ok"] else "failed"] += 1
+            output.write(result)
+            if not result["ok"]:
+                # Errors are visible as they happen; successes only in the output file
+                output.flush()
+    except KeyboardInterrupt:
+        _report("Interrupted; rerun with --resume to continue")
+        return 130
+    finally:
+        output.close()
+    elapsed = max(time.monotonic() - started, 1e-6)
+    _report(
+        f"{counts['ok']} succeeded, {counts['failed']} failed, {counts['skipped']} skipped"
+        f" in {elapsed:.1f}s ({(counts['ok'] + counts['failed']) / elapsed:.0f}/s);"
+        f" results in {output_path}"
+    )
+    return 1 if counts["failed"] else 0
+
+
+# bench
+
+
+def bench(args: argparse.Namespace) -> int:
+    from ._rate_limit import TokenBucket
+    from .errors import PexipayError
+    from .hooks import LatencyHistogram
+
+    emulator = None
+    base_url = None
+    if args.emulator:
+        from .emulator import EmulatorConfig, EmulatorServer, EmulatorStore
+
+        config = EmulatorConfig(latency=args.emulator_latency, settle_delay=0.0)
+        emulator = EmulatorServer(config, EmulatorStore()).start()
+        base_url = emulator.url
+        args.api_key = args.api_key or "sk_emulator"
+    try:
+        client = _client(args, base_url)
+        client.warmup(args.concurrency)
+        payment_ids = [p["id"] for p in client.payments.list(limit=100).get("data") or []]
+        if args.operation == "retrieve-payment" and not payment_ids:
+            raise SystemExit("error: the account has no payments to retrieve")
+
+        operations = {
+            "retrieve-payment": lambda n: client.payments.retrieve(
+                payment_ids[n % len(payment_ids)]
+            ),
+            "list-payments": lambda n: client.payments.list(limit=args.page_size),
+            "create-payment": lambda n: client.payments.create(amount=10.0, currency="USD"),
+            "balance": lambda n: client.balance.retrieve(fresh=True),
+        }
+        operation = operations[args.operation]
+        histogram = LatencyHistogram(precision=16)
+        bucket = TokenBucket(args.rate) if args.rate else None
+        errors: Dict[str, int] = {}
+        lock = threading.Lock()
+        issued = [0]
+        deadline = time.monotonic() + args.duration if args.duration else None
+
+        def worker() -> None:
+            while True:
+                with lock:
+                    n = issued[0]
+                    if args.requests and n >= args.requests:
+                        return
+                    issued[0] += 1
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                if bucket is not None:
+                    bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    operation(n)
+                except PexipayError as error:
+                    with lock:
+                        name = type(error).__name__
+                        errors[name] = errors.get(name, 0) + 1
+                    continue
+                histogram.record(time.perf_counter() - started)
+
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=worker, name=f"pexipay-bench-{i}", daemon=True)
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if emulator is not None:
+            emulator.stop()
+
+    failed = sum(errors.values())
+    report: Dict[str, Any] = {
+        "operation": args.operation,
+        "concurrency": args.concurrency,
+        "requests": histogram.count + failed,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round((histogram.count + failed) / elapsed, 1) if elapsed else 0.0,
+    }
+    for percent in (50, 90, 99, 99.9):
+        value = histogram.percentile(percent)
+        report[f"p{percent:g}_ms"] = None if value is None else round(value * 1000, 3)
+    report["max_ms"] = round(histogram.max * 1000, 3) if histogram.count else None
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for name, value in report.items():
+            print(f"{name:>16}  {value}")
+    return 1 if failed and not histogram.count else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--api-key", help="API key (default: $PEXIPAY_API_KEY)")
+    common.add_argument("--environment", default="production", choices=("production", "sandbox"))
+    common.add_argument("--base-url", help="API base URL (default: $PEXIPAY_API_BASE_URL)")
+    common.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout")
+    common.add_argument("--max-retries", type=int, default=3)
+
+    parser = argparse.ArgumentParser(prog="pexipay", description="Pexipay command-line tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser(
+        "export", parents=[common], help="Stream a list endpoint to JSONL or CSV"
+    )
+    export_parser.add_argument("resource", choices=sorted(EXPORTS))
+    export_parser.add_argument("-o", "--output", default="-", help="File (.csv for CSV)")
+    export_parser.add_argument("--created-after", help="Start of the period (ISO 8601)")
+    export_parser.add_argument("--created-before", help="End of the period (ISO 8601)")
+    export_parser.add_argument("--status")
+    export_parser.add_argument(
+        "--shards", type=int, default=1, help="Split the period into parallel scans"
+    )
+    export_parser.add_argument("--page-size", type=int, default=100)
+    export_parser.add_argument("--fields", help="Comma-separated CSV columns")
+    export_parser.add_argument("--checkpoint-dir", help="Save progress here; rerun to resume")
+    export_parser.set_defaults(handler=export)
+
+    bulk_parser = commands.add_parser(
+        "bulk", parents=[common], help="Create or refund from a JSONL or CSV file"
+    )
+    bulk_parser.add_argument("operation", choices=sorted(OPERATIONS))
+    bulk_parser.add_argument("file", help="Rows of method arguments (.csv, .jsonl or -)")
+    bulk_parser.add_argument("-o", "--output", help="Results file (default: FILE.results.jsonl)")
+    bulk_parser.add_argument("--workers", type=int, default=8)
+    bulk_parser.add_argument("--rate", type=float, help="Most calls per second")
+    bulk_parser.add_argument("--key-field", default="id", help="Column identifying a row")
+    bulk_parser.add_argument("--job-id", help="Idempotency namespace (default: file path)")
+    bulk_parser.add_argument(
+        "--resume", action="store_true", help="Skip rows that succeeded in the results file"
+    )
+    bulk_parser.set_defaults(handler=bulk)
+
+    bench_parser = commands.add_parser(
+        "bench", parents=[common], help="Measure latency and throughput"
+    )
+    bench_parser.add_argument("--operation", choices=BENCH_OPERATIONS, default=BENCH_OPERATIONS[0])
+    bench_parser.add_argument("--concurrency", type=int, default=8)
+    bench_parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    bench_parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    bench_parser.add_argument("--rate", type=float, help="Most requests per second")
+    bench_parser.add_argument("--page-size", type=int, default=100)
+    bench_parser.add_argument("--emulator", action="store_true", help="Run a local emulator")
+    bench_parser.add_argument("--emulator-latency", type=float, default=0.0)
+    bench_parser.add_argument("--json", action="store_true", help="Print one JSON object")
+    bench_parser.set_defaults(handler=bench)
+
+    args = parser.parse_args(argv)
+    if args.command == "bench" and not args.requests and not args.duration:
+        args.requests = 1000
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,52 @@
 """Pexipay Client"""
 
-from typing import Optional, Dict, Any
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import copy
+import dataclasses
+import json
+import re
+import threading
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Optional, Dict, Any, List, Union
+from urllib.parse import quote_plus, urlencode
 
-from .resources.payments import PaymentsResource
-from .resources.payment_links import PaymentLinksResource
-from .resources.customers import CustomersResource
-from .resources.refunds import RefundsResource
-from .resources.transactions import TransactionsResource
-from .resources.balance import BalanceResource
-from .errors import PexipayError
+from . import _fork
+from .errors import (
+    DeadlineExceededError,
+    NetworkError,
+    PexipayError,
+    RateLimitError,
+    RequestQueuedError,
+    RequestTimeoutError,
+)
+from .compression import ACCEPT_ENCODING, DEFAULT_MIN_SIZE, compress_body
+from .balance_cache import BalanceCache
+from .circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitBreakerRegistry
+from .hedging import HedgePolicy, HedgingController
+from .concurrency import IGNORE, OVERLOAD, SUCCESS, AdaptiveConcurrencyLimiter
+from .hooks import Hooks, RequestEvent, RequestTimings
+from .response import PexipayResponse
+from .retry import (
+    IDEMPOTENCY_HEADER,
+    IDEMPOTENT_METHODS,
+    RetryPolicy,
+    new_idempotency_key,
+    parse_retry_after,
+)
+from .transports.base import CancelEvent, Transport, TransportRequest
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import requests
+
+    from .resources.payments import PaymentsResource
+    from .resources.payment_links import PaymentLinksResource
+    from .resources.customers import CustomersResource
+    from .resources.refunds import RefundsResource
+    from .resources.transactions import TransactionsResource
+    from .resources.balance import BalanceResource
+    from .outbox import Outbox
 
 
 DEFAULT_API_ENDPOINTS = {
@@ -19,6 +54,36 @@ DEFAULT_API_ENDPOINTS = {
     "sandbox": "https://sandbox-api.pexipay.com/v1",
 }
 
+RESOURCES = ("payments", "payment_links", "customers", "refunds", "transactions", "balance")
+
+# Compact separators make smaller bodies; the encoder is built once
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+_UNRESERVED = re.compile(r"[A-Za-z0-9_.~-]*").fullmatch
+
+_IDEMPOTENCY_HEADER_LOWER = IDEMPOTENCY_HEADER.lower()
+
+
+def _encode_query(params: Dict[str, Any]) -> str:
+    """
+    urlencode(params, doseq=True) without the None values, in a single pass
+
+    Strings that need no escaping (IDs, cursors, statuses) and numbers skip quote_plus.
+    """
+    parts: List[str] = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        if not _UNRESERVED(key):
+            key = quote_plus(key)
+        if isinstance(value, str):
+            parts.append(key + "=" + (value if _UNRESERVED(value) else quote_plus(value)))
+        elif isinstance(value, (int, float)):
+            parts.append(key + "=" + str(value))
+        else:
+            parts.append(urlencode({key: value}, doseq=True))
+    return "&".join(parts)
+
 
 class PexipayClient:
     """Pexipay API client"""
@@ -30,6 +95,15 @@ class PexipayClient:
         api_base_url: Optional[str] = None,
         timeout: int = 30,
         max_retries: int = 3,
+        deadline: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Union[bool, CircuitBreakerConfig, None] = None,
+        hedging: Union[bool, HedgePolicy, None] = None,
+        concurrency_limiter: Union[bool, AdaptiveConcurrencyLimiter, None] = None,
+        transport: Optional[Transport] = None,
+        compress_requests: Union[bool, int] = False,
+        balance_cache: Union[bool, BalanceCache, None] = None,
+        outbox: Union[str, "Outbox", None] = None,
     ):
         """
         Initialize Pexipay client
@@ -40,6 +114,24 @@ class PexipayClient:
             api_base_url: Custom API base URL (overrides environment)
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
+            deadline: Total time budget in seconds for a call across all attempts
+                (default: twice the timeout)
+            retry: Full retry policy (overrides max_retries and deadline)
+            circuit_breaker: Enable per-endpoint-group circuit breakers (True for the
+                default thresholds, or a CircuitBreakerConfig)
+            hedging: Hedge slow GET requests (True for the default policy, or a
+                HedgePolicy)
+            concurrency_limiter: Adapt the number of in-flight requests to API latency
+                and 429/5xx responses (True for a new limiter, or a limiter shared
+                with other clients)
+            transport: HTTP transport (default: RequestsTransport), see pexipay.transports
+            compress_requests: Gzip request bodies (True for bodies of at least 1 KiB, or
+                the minimum body size in bytes)
+            balance_cache: Serve balance.retrieve() from a cache refreshed in the
+                background (True for a 10 second staleness bound, or a BalanceCache)
+            outbox: Queue mutating calls that fail while the API is unavailable and
+                replay them in the background (the path of an SQLite file, or an
+                Outbox); see pexipay.outbox
         """
         if not api_key:
             raise ValueError(
@@ -52,36 +144,137 @@ class PexipayClient:
         self.api_base_url = api_base_url or DEFAULT_API_ENDPOINTS[environment]
         self.timeout = timeout
         self.max_retries = max_retries
-
-        # Create session with retry logic
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=max_retries,
-            backoff_factor=1,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["GET", "POST", "PATCH", "DELETE"],
+        self.retry = retry or RetryPolicy(
+            max_retries=max_retries, deadline=deadline if deadline is not None else timeout * 2
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+
+        # Retries are handled by the SDK (see pexipay.retry), not by the transport.
+        # The default transport is created on the first request.
+        self._transport = transport
+        self._transport_lock = threading.Lock()
 
         # Set default headers
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "X-Pexipay-Version": "2025-11-23",
-                "User-Agent": "Pexipay-Python-SDK/1.0.0",
-            }
-        )
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "X-Pexipay-Version": "2025-11-23",
+            "User-Agent": "Pexipay-Python-SDK/1.0.0",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+
+        self.compress_min_size: Optional[int] = None
+        if compress_requests is True:
+            self.compress_min_size = DEFAULT_MIN_SIZE
+        elif compress_requests is not False:
+            self.compress_min_size = compress_requests
+
+        # Request lifecycle callbacks, see pexipay.hooks
+        self.hooks = Hooks()
+
+        self.circuit_breakers: Optional[CircuitBreakerRegistry] = None
+        if circuit_breaker:
+            config = circuit_breaker if isinstance(circuit_breaker, CircuitBreakerConfig) else None
+            self.circuit_breakers = CircuitBreakerRegistry(config, self._on_circuit_state_change)
+
+        self.hedging: Optional[HedgingController] = None
+        if hedging:
+            self.hedging = HedgingController(hedging if isinstance(hedging, HedgePolicy) else None)
+
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        if isinstance(concurrency_limiter, AdaptiveConcurrencyLimiter):
+            self.concurrency_limiter = concurrency_limiter
+        elif concurrency_limiter:
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter()
+
+        self.balance_cache: Optional[BalanceCache] = None
+        if isinstance(balance_cache, BalanceCache):
+            self.balance_cache = balance_cache
+        elif balance_cache:
+            self.balance_cache = BalanceCache()
+        if self.balance_cache is not None:
+            self.hooks.add(self.balance_cache)
+
+        # Imported only when used: it pulls in sqlite3
+        self.outbox: Optional["Outbox"] = None
+        if isinstance(outbox, str):
+            from .outbox import Outbox
+
+            self.outbox = Outbox(outbox)
+        elif outbox is not None:
+            self.outbox = outbox
+        if self.outbox is not None:
+            self.hooks.add(self.outbox)
+            self.outbox.attach(self)
+
+        # A client created before a fork keeps working in the child: transports,
+        # caches and locks register themselves to be rebuilt there (see pexipay._fork)
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._transport_lock = threading.Lock()
+
+    @property
+    def transport(self) -> Transport:
+        """HTTP transport, a RequestsTransport unless one was passed in"""
+        transport = self._transport
+        if transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    from .transports.requests_transport import RequestsTransport
+
+                    self._transport = RequestsTransport()
+                transport = self._transport
+        return transport
+
+    @transport.setter
+    def transport(self, transport: Transport) -> None:
+        self._transport = transport
 
-        # Initialize resources
-        self.payments = PaymentsResource(self)
-        self.payment_links = PaymentLinksResource(self)
-        self.customers = CustomersResource(self)
-        self.refunds = RefundsResource(self)
-        self.transactions = TransactionsResource(self)
-        self.balance = BalanceResource(self)
+    @property
+    def session(self) -> "requests.Session":
+        """Underlying requests.Session (only available with RequestsTransport)"""
+        session = getattr(self.transport, "session", None)
+        if session is None:
+            raise AttributeError(f"{type(self.transport).__name__} has no requests session")
+        return session
+
+    # Resources are created on first access
+
+    @cached_property
+    def payments(self) -> "PaymentsResource":
+        from .resources.payments import PaymentsResource
+
+        return PaymentsResource(self)
+
+    @cached_property
+    def payment_links(self) -> "PaymentLinksResource":
+        from .resources.payment_links import PaymentLinksResource
+
+        return PaymentLinksResource(self)
+
+    @cached_property
+    def customers(self) -> "CustomersResource":
+        from .resources.customers import CustomersResource
+
+        return CustomersResource(self)
+
+    @cached_property
+    def refunds(self) -> "RefundsResource":
+        from .resources.refunds import RefundsResource
+
+        return RefundsResource(self)
+
+    @cached_property
+    def transactions(self) -> "TransactionsResource":
+        from .resources.transactions import TransactionsResource
+
+        return TransactionsResource(self)
+
+    @cached_property
+    def balance(self) -> "BalanceResource":
+        from .resources.balance import BalanceResource
+
+        return BalanceResource(self)
 
     def request(
         self,
@@ -90,43 +283,455 @@ class PexipayClient:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        route: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Make HTTP request to Pexipay API"""
-        url = f"{self.api_base_url}{endpoint}"
+        """
+        Make HTTP request to Pexipay API
+
+        Args:
+            method: HTTP method
+            endpoint: Path relative to the API base URL
+            params: Query parameters
+            data: JSON body
+            headers: Extra request headers
+            timeout: Per-attempt timeout in seconds (default: client timeout)
+            deadline: Total time budget in seconds across all attempts
+                (default: the retry policy's deadline)
+            retry: Retry policy for this call (default: client retry policy)
+            route: Endpoint template such as ``/payments/{id}``, the label used by
+                hooks, metrics and hedging (default: derived from the endpoint)
+        """
+        response = self._request(
+            method, endpoint, params, data, headers, timeout, deadline, retry, route, True
+        )
+        return response.json()  # type: ignore[no-any-return]
+
+    def request_raw(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        route: Optional[str] = None,
+    ) -> PexipayResponse:
+        """
+        Make HTTP request to Pexipay API without decoding a successful response
+
+        Takes the same arguments as request(). Retries, hooks and error handling are the
+        same too (error bodies are still parsed to raise PexipayError), but a successful
+        body is returned as a PexipayResponse and only parsed if one of its keys is read.
+        Use it to forward or cache payloads without paying for JSON decoding.
+        """
+        return self._request(
+            method, endpoint, params, data, headers, timeout, deadline, retry, route, False
+        )
 
-        request_headers = self.session.headers.copy()
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        deadline: Optional[float],
+        retry: Optional[RetryPolicy],
+        route: Optional[str],
+        decode: bool,
+    ) -> PexipayResponse:
+        policy = retry or self.retry
+        timeout = self.timeout if timeout is None else timeout
+        deadline = policy.deadline if deadline is None else deadline
+        url = self.api_base_url + endpoint
+        if params:
+            query = _encode_query(params)
+            if query:
+                url = f"{url}?{query}"
+
+        request_headers = dict(self.headers)
         if headers:
             request_headers.update(headers)
+            for name in headers:
+                # Header names are case-insensitive; send the caller's key under one name
+                if name != IDEMPOTENCY_HEADER and name.lower() == _IDEMPOTENCY_HEADER_LOWER:
+                    request_headers[IDEMPOTENCY_HEADER] = request_headers.pop(name)
+        outbox = self.outbox
+        if IDEMPOTENCY_HEADER not in request_headers and (
+            (method == "POST" and policy.max_retries)
+            or (outbox is not None and outbox.covers(method))
+        ):
+            # Makes retried creates safe; the same key is sent on every attempt, and
+            # with each replay from the outbox
+            request_headers[IDEMPOTENCY_HEADER] = new_idempotency_key()
+        idempotent = method in IDEMPOTENT_METHODS or IDEMPOTENCY_HEADER in request_headers
+
+        body = _encode_json(data).encode("utf-8") if data is not None else None
+        bytes_sent = len(body) if body else 0
+        min_size = self.compress_min_size
+        if body and min_size is not None and bytes_sent >= min_size:
+            body = compress_body(body)
+            request_headers["Content-Encoding"] = "gzip"
+        event = RequestEvent(
+            method=method,
+            endpoint=endpoint,
+            url=url,
+            headers=request_headers,
+            bytes_sent=bytes_sent,
+            wire_bytes_sent=len(body) if body else 0,
+            _route=route,
+        )
+        hooks = self.hooks
+        breakers = self.circuit_breakers
+        breaker = breakers.for_endpoint(endpoint) if breakers is not None else None
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+        delay = policy.base_delay
+
+        while True:
+            try:
+                return self._send(event, body, timeout, deadline_at, breaker, decode)
+            except PexipayError as error:
+                event.error = error
+                retry_after = error.retry_after if isinstance(error, RateLimitError) else None
+                retryable = (
+                    event.attempt <= policy.max_retries
+                    and policy.is_retryable(method, error, idempotent)
+                    and (retry_after is None or retry_after <= policy.max_retry_after)
+                )
+                if retryable:
+                    delay = policy.next_delay(delay, retry_after)
+                    retryable = deadline_at is None or time.monotonic() + delay < deadline_at
+                if not retryable:
+                    if hooks.has("on_error"):
+                        hooks.emit("on_error", event)
+                    if outbox is not None and outbox.accepts(method, error):
+                        stored = {
+                            name: value
+                            for name, value in (headers or {}).items()
+                            if name.lower() != _IDEMPOTENCY_HEADER_LOWER
+                        }
+                        stored[IDEMPOTENCY_HEADER] = request_headers[IDEMPOTENCY_HEADER]
+                        entry = outbox.add(method, endpoint, params, data, stored, route)
+                        raise RequestQueuedError(entry.id, entry.idempotency_key, error) from error
+                    raise
+
+                event.retry_delay = delay
+                if hooks.has("on_retry"):
+                    hooks.emit("on_retry", event)
+                time.sleep(delay)
+                event.attempt += 1
+                event.status_code = None
+                event.request_id = None
+                event.bytes_received = 0
+                event.wire_bytes_received = 0
+                event.error = None
+                event.retry_delay = None
+                event.hedged = False
+                event.timings = RequestTimings()
 
+    def _send(
+        self,
+        event: RequestEvent,
+        body: Optional[bytes],
+        timeout: float,
+        deadline_at: Optional[float],
+        breaker: Optional[CircuitBreaker] = None,
+        decode: bool = True,
+    ) -> PexipayResponse:
+        """Perform a single attempt, raising PexipayError on failure"""
+        if self.hooks.has("before_request"):
+            self.hooks.emit("before_request", event)
+        perform: Callable[
+            [RequestEvent, Optional[bytes], float, Optional[float], bool], PexipayResponse
+        ] = self._perform
+        if self.hedging is not None and event.method == "GET":
+            perform = self._perform_hedged
+        limiter = self.concurrency_limiter
+        if breaker is None and limiter is None:
+            return perform(event, body, timeout, deadline_at, decode)
+
+        if breaker is not None:
+            breaker.before_call()
+        # Every admitted call is paired with a release, whatever it raises. A non-API error
+        # (a raising hook, a transport bug, an interrupt) or a deadline hit while waiting for
+        # a slot gives the call back without an outcome: no latency sample for the limiter,
+        # and a half-open probe is returned to the breaker unrecorded.
+        failed: Optional[bool] = None
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=data,
-                headers=request_headers,
-                timeout=self.timeout,
+            if limiter is not None:
+                self._acquire_slot(limiter, event, deadline_at)
+            outcome = IGNORE
+            try:
+                response = perform(event, body, timeout, deadline_at, decode)
+                outcome = SUCCESS
+                failed = False
+            except PexipayError as error:
+                overloaded = (
+                    isinstance(error, (RateLimitError, RequestTimeoutError))
+                    or (error.status_code or 0) >= 500
+                )
+                if overloaded:
+                    outcome = OVERLOAD
+                elif error.status_code is not None:
+                    outcome = SUCCESS
+                failed = isinstance(error, NetworkError) or (
+                    breaker is not None and error.status_code in breaker.config.failure_status_codes
+                )
+                raise
+            finally:
+                if limiter is not None:
+                    limiter.release(event.timings.total, outcome)
+        finally:
+            if breaker is not None:
+                if failed is None:
+                    breaker.cancel()
+                else:
+                    breaker.record(failed, event.timings.total)
+        return response
+
+    def _acquire_slot(
+        self,
+        limiter: AdaptiveConcurrencyLimiter,
+        event: RequestEvent,
+        deadline_at: Optional[float],
+    ) -> None:
+        """Wait for a concurrency slot, counting the wait as queue time"""
+        if limiter.try_acquire():
+            return
+        start = time.perf_counter()
+        timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        acquired = limiter.acquire(timeout)
+        event.timings.queue_wait += time.perf_counter() - start
+        if not acquired:
+            raise DeadlineExceededError("Request deadline exceeded waiting for a free slot")
+
+    def _perform(
+        self,
+        event: RequestEvent,
+        body: Optional[bytes],
+        timeout: float,
+        deadline_at: Optional[float],
+        decode: bool = True,
+        emit_hooks: bool = True,
+        cancel: Optional[threading.Event] = None,
+    ) -> PexipayResponse:
+        clipped = False
+        if deadline_at is not None:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError()
+            clipped = remaining < timeout
+            timeout = min(timeout, remaining)
+
+        timings = event.timings
+        start = time.perf_counter()
+        request = TransportRequest(
+            method=event.method,
+            url=event.url,
+            headers=event.headers,
+            body=body,
+            timeout=timeout,
+            deadline_at=deadline_at,
+            cancel=cancel,
+            timings=timings,
+        )
+        try:
+            response = self.transport.send(request)
+        except RequestTimeoutError as e:
+            timings.total = time.perf_counter() - start
+            if clipped and not isinstance(e, DeadlineExceededError):
+                raise DeadlineExceededError() from e
+            raise
+        except NetworkError:
+            timings.total = time.perf_counter() - start
+            raise
+
+        body_received = time.perf_counter()
+        content = response.content
+        event.status_code = response.status_code
+        event.request_id = response.headers.get("X-Request-Id")
+        event.bytes_received = len(content)
+        event.wire_bytes_received = (
+            response.wire_bytes if response.wire_bytes is not None else len(content)
+        )
+
+        result = PexipayResponse(response.status_code, response.headers, content)
+        payload = None
+        if decode or not response.ok:
+            try:
+                payload = result.json()
+            except ValueError:
+                pass
+        timings.decode = time.perf_counter() - body_received
+        timings.total = time.perf_counter() - start
+
+        if emit_hooks and self.hooks.has("after_response"):
+            self.hooks.emit("after_response", event)
+
+        if not response.ok or (decode and payload is None):
+            error_data = payload if isinstance(payload, dict) else {}
+            message = error_data.get("error") or error_data.get("message") or response.text
+            request_id = error_data.get("requestId") or event.request_id
+            if response.status_code == 429:
+                raise RateLimitError(
+                    message, parse_retry_after(response.headers, error_data), request_id
+                )
+            raise PexipayError(
+                message=message,
+                status_code=response.status_code,
+                code=error_data.get("code"),
+                request_id=request_id,
+                details=error_data.get("details"),
             )
 
-            if not response.ok:
-                error_data = response.json() if response.content else {}
-                raise PexipayError(
-                    message=error_data.get("error") or error_data.get("message") or response.text,
-                    status_code=response.status_code,
-                    code=error_data.get("code"),
-                    request_id=error_data.get("requestId"),
-                    details=error_data.get("details"),
+        return result
+
+    def _perform_hedged(
+        self,
+        event: RequestEvent,
+        body: Optional[bytes],
+        timeout: float,
+        deadline_at: Optional[float],
+        decode: bool = True,
+    ) -> PexipayResponse:
+        """
+        Perform an attempt on the calling thread, sending a duplicate from the hedging pool
+        if it has not completed within the route's hedge delay. The first successful copy
+        wins; the other is cancelled, and its connection dropped.
+        """
+        hedging = self.hedging
+        assert hedging is not None
+        route = event.route
+        hedging.start_request()
+        hedge_event = dataclasses.replace(event, timings=RequestTimings())
+        primary_cancel = CancelEvent()
+        hedge_cancel = CancelEvent()
+        hedges: "List[Future[PexipayResponse]]" = []
+        lock = threading.Lock()
+        finished = False
+
+        def on_hedge_done(future: "Future[PexipayResponse]") -> None:
+            if not future.cancelled() and future.exception() is None:
+                primary_cancel.set()
+
+        def send_hedge() -> None:
+            with lock:
+                if finished or not hedging.try_hedge():
+                    return
+                event.hedged = True
+                future = hedging.executor().submit(
+                    self._perform,
+                    hedge_event,
+                    body,
+                    timeout,
+                    deadline_at,
+                    decode,
+                    False,
+                    hedge_cancel,
+                )
+                hedges.append(future)
+            future.add_done_callback(on_hedge_done)
+
+        # The delay runs from when the primary is sent, not from when a pool thread is free
+        start = time.perf_counter()
+        hedging.call_later(hedging.delay_for(route), send_hedge)
+        winner = event
+        try:
+            try:
+                response = self._perform(
+                    event, body, timeout, deadline_at, decode, False, primary_cancel
                 )
+            except PexipayError:
+                with lock:
+                    finished = True
+                # The primary failed, or was cancelled because the hedge succeeded
+                if not hedges or hedges[0].exception() is not None:
+                    if event.status_code is not None and self.hooks.has("after_response"):
+                        self.hooks.emit("after_response", event)
+                    raise
+                response = hedges[0].result()
+                winner = hedge_event
+        finally:
+            with lock:
+                finished = True
+            if hedges and winner is event:
+                hedges[0].cancel()
+                hedge_cancel.set()
+            hedging.record(route, time.perf_counter() - start)
 
-            return response.json()
+        if winner is hedge_event:
+            hedging.hedge_won()
+            event.status_code = hedge_event.status_code
+            event.request_id = hedge_event.request_id
+            event.bytes_received = hedge_event.bytes_received
+            event.wire_bytes_received = hedge_event.wire_bytes_received
+            event.timings = hedge_event.timings
+        if self.hooks.has("after_response"):
+            self.hooks.emit("after_response", event)
+        return response
 
-        except requests.exceptions.RequestException as e:
-            raise PexipayError(f"Network error: {str(e)}")
+    def _on_circuit_state_change(self, group: str, previous: str, state: str) -> None:
+        if self.hooks.has("on_circuit_state_change"):
+            self.hooks.emit("on_circuit_state_change", group, previous, state)
+
+    def with_options(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+    ) -> "PexipayClient":
+        """
+        Return a client that shares this client's connections and hooks but uses
+        different request options, e.g. ``client.with_options(deadline=5).payments.retrieve(id)``
+
+        Headers are copied, so ``set_api_key`` on either client leaves the other unchanged.
+        """
+        # Share the transport, and rebuild resources so they point at the copy
+        client = copy.copy(self)
+        client._transport = self.transport
+        client._transport_lock = threading.Lock()
+        client.headers = dict(self.headers)
+        _fork.register(client)
+        for name in RESOURCES:
+            client.__dict__.pop(name, None)
+        if timeout is not None:
+            client.timeout = timeout
+        policy = retry or self.retry
+        if max_retries is not None:
+            client.max_retries = max_retries
+            policy = policy.with_options(max_retries=max_retries)
+        if deadline is not None:
+            policy = policy.with_options(deadline=deadline)
+        client.retry = policy
+        return client
+
+    def warmup(self, connections: int = 1) -> int:
+        """
+        Open connections to the API ahead of traffic
+
+        Call this at worker startup (or after a deploy) so the first requests do not pay
+        for DNS resolution, TCP connect and the TLS handshake. Connections are opened in
+        parallel and left idle in the pool.
+
+        Args:
+            connections: Number of connections to open, capped at the pool size
+
+        Returns:
+            Number of connections ready for use
+        """
+        return self.transport.warmup(self.api_base_url, connections)
 
     def set_api_key(self, api_key: str) -> None:
         """Update the API key"""
         self.api_key = api_key
-        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        self.headers["Authorization"] = f"Bearer {api_key}"
 
     def set_environment(self, environment: str) -> None:
         """Switch environment"""
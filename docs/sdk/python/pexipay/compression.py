@@ -0,0 +1,142 @@
+"""HTTP content encodings: streaming response decoding and request body compression"""
+
+import gzip
+import zlib
+from typing import Any, List, Optional, Tuple, Type
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+# Request bodies smaller than this are not worth compressing
+DEFAULT_MIN_SIZE = 1024
+
+_DECODE_ERRORS: Tuple[Type[BaseException], ...] = (zlib.error, ValueError)
+if brotli is not None:
+    _DECODE_ERRORS += (brotli.error,)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def supported_encodings() -> List[str]:
+    """Content encodings this installation can decode, most preferred first"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return encodings
+
+
+ACCEPT_ENCODING = ", ".join(supported_encodings())
+
+
+class StreamDecoder:
+    """
+    Decodes a response body chunk by chunk
+
+    Feed raw chunks to ``decompress`` as they arrive from the socket and call ``flush`` at
+    the end; each call returns the decoded bytes available so far. Stacked encodings
+    (``Content-Encoding: gzip, br``) are undone in reverse order.
+    """
+
+    def __init__(self, content_encoding: Optional[str]):
+        encodings = [e.strip().lower() for e in (content_encoding or "").split(",")]
+        self._decoders = [
+            _decoder(encoding)
+            for encoding in reversed(encodings)
+            if encoding not in ("", "identity")
+        ]
+
+    @property
+    def active(self) -> bool:
+        """Whether the body is encoded at all"""
+        return bool(self._decoders)
+
+    def decompress(self, chunk: bytes) -> bytes:
+        try:
+            for decoder in self._decoders:
+                chunk = decoder.decompress(chunk)
+        except _DECODE_ERRORS as e:
+            raise ValueError(f"Invalid compressed response body: {e}") from e
+        return chunk
+
+    def flush(self) -> bytes:
+        data = b""
+        try:
+            for decoder in self._decoders:
+                data = decoder.decompress(data) + decoder.flush()
+        except _DECODE_ERRORS as e:
+            raise ValueError(f"Invalid compressed response body: {e}") from e
+        return data
+
+
+class _DeflateDecoder:
+    """Accepts both zlib-wrapped and raw deflate streams, as servers send either"""
+
+    def __init__(self) -> None:
+        self._obj = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._first and data:
+            self._first = False
+            try:
+                return self._obj.decompress(data)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+        # brotli and brotlicffi name the method differently
+        if hasattr(self._obj, "process"):
+            return bytes(self._obj.process(data))
+        return bytes(self._obj.decompress(data))
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstdDecoder:
+    def __init__(self) -> None:
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return bytes(self._obj.decompress(data)) if data else b""
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decoder(encoding: str) -> Any:
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def compress_body(body: bytes, level: int = 6) -> bytes:
+    """Gzip a request body (sent with ``Content-Encoding: gzip``)"""
+    return gzip.compress(body, compresslevel=level, mtime=0)
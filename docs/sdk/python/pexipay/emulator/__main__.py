@@ -0,0 +1,62 @@
+"""Command-line entry point: python -m pexipay.emulator"""
+
+import argparse
+import sys
+import threading
+from typing import List, Optional
+
+from .server import EmulatorConfig, EmulatorServer
+from .store import EmulatorStore
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pexipay.emulator", description="Local Pexipay API emulator"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--payments", type=int, default=10_000, help="Synthetic payments")
+    parser.add_argument("--customers", type=int, default=1_000, help="Synthetic customers")
+    parser.add_argument("--payment-links", type=int, default=1_000, help="Synthetic links")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for data and faults")
+    parser.add_argument("--latency", type=float, default=0.0, help="Median latency (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Log-normal spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected 5xx fraction")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Dropped connections")
+    parser.add_argument("--rate-limit", type=int, help="Requests per window and API key")
+    parser.add_argument("--rate-limit-window", type=float, default=60.0)
+    parser.add_argument("--settle-delay", type=float, default=0.5)
+    parser.add_argument("--webhook-url", help="Deliver webhooks here")
+    parser.add_argument("--webhook-secret", default="whsec_emulator")
+    args = parser.parse_args(argv)
+
+    config = EmulatorConfig(
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        settle_delay=args.settle_delay,
+        webhook_url=args.webhook_url,
+        webhook_secret=args.webhook_secret,
+        seed=args.seed,
+    )
+    store = EmulatorStore(
+        payments=args.payments,
+        customers=args.customers,
+        payment_links=args.payment_links,
+        seed=args.seed,
+    )
+    server = EmulatorServer(config, store, host=args.host, port=args.port).start()
+    print(f"Pexipay emulator listening on {server.url}", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
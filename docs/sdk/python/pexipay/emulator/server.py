@@ -0,0 +1,850 @@
+"""HTTP server emulating the Pexipay API"""
+
+import gzip
+import hashlib
+import hmac
+import heapq
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .._rate_limit import TokenBucket
+from .._timestamps import format_timestamp, parse_timestamp
+from .store import DECLINED_CARD, THREE_DS_CARD, EmulatorStore, Match, Record
+
+Result = Tuple[int, Any]
+Response = Tuple[int, Dict[str, str], bytes]
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+_CURRENCY = re.compile(r"^[A-Z]{3}$")
+
+
+@dataclass(frozen=True)
+class EmulatorConfig:
+    """
+    Faults and limits applied by the emulator
+
+    Attributes:
+        latency: Median delay added to every response, in seconds
+        latency_sigma: Spread of the log-normal delay; 0 makes every delay ``latency``
+        error_rate: Fraction of requests answered with one of ``error_statuses``
+        error_statuses: Status codes used for injected errors
+        drop_rate: Fraction of requests whose connection is closed without a response
+        rate_limit: Requests allowed per ``rate_limit_window`` and API key (None: no limit)
+        rate_limit_window: Length of the rate-limit window, in seconds
+        compress: Gzip responses larger than 1 KiB when the client accepts it
+        settle_delay: Seconds before a processing payment or pending refund settles
+        webhook_url: Where webhooks are delivered when a payment has no ``webhookUrl``
+        webhook_secret: Secret used to sign webhook payloads
+        webhook_retries: Delivery attempts after the first one fails
+        seed: Seed for latency and fault injection, for reproducible runs
+    """
+
+    latency: float = 0.0
+    latency_sigma: float = 0.0
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (500, 502, 503)
+    drop_rate: float = 0.0
+    rate_limit: Optional[int] = None
+    rate_limit_window: float = 60.0
+    compress: bool = True
+    settle_delay: float = 0.5
+    webhook_url: Optional[str] = None
+    webhook_secret: str = "whsec_emulator"
+    webhook_retries: int = 3
+    seed: Optional[int] = None
+
+
+@dataclass
+class EmulatorStats:
+    """Counters of what the emulator has done since it started"""
+
+    requests: int = 0
+    injected_errors: int = 0
+    dropped: int = 0
+    rate_limited: int = 0
+    idempotent_replays: int = 0
+    webhooks_delivered: int = 0
+    webhooks_failed: int = 0
+    by_status: Dict[int, int] = field(default_factory=dict)
+
+
+class ApiError(Exception):
+    """Error answered in the API's error format"""
+
+    def __init__(self, status_code: int, message: str, code: str, details: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.code = code
+        self.details = details
+
+    def payload(self) -> Dict[str, Any]:
+        payload = {"error": self.message, "message": self.message, "code": self.code}
+        if self.details is not None:
+            payload["details"] = self.details
+        return payload
+
+
+def _not_found(kind: str, record_id: str) -> ApiError:
+    return ApiError(404, f"No such {kind}: {record_id}", "resource_not_found")
+
+
+def _invalid(message: str, param: str) -> ApiError:
+    return ApiError(400, message, "validation_error", {"param": param})
+
+
+def _invalid_state(kind: str, record: Record, action: str) -> ApiError:
+    return ApiError(
+        400, f"Cannot {action} a {kind} with status {record['status']}", "invalid_state"
+    )
+
+
+def _amount(body: Mapping[str, Any]) -> float:
+    value = body.get("amount")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise _invalid("amount must be a positive number", "amount")
+    return round(float(value), 2)
+
+
+def _optional_amount(body: Mapping[str, Any]) -> Optional[float]:
+    return None if body.get("amount") is None else _amount(body)
+
+
+def _currency(body: Mapping[str, Any]) -> str:
+    value = body.get("currency")
+    if not isinstance(value, str) or not _CURRENCY.match(value.upper()):
+        raise _invalid("currency must be a three-letter ISO 4217 code", "currency")
+    return value.upper()
+
+
+class _Scheduler:
+    """Runs callbacks after a delay on one background thread"""
+
+    def __init__(self) -> None:
+        self._queue: List[Tuple[float, int, Callable[[], None]]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="pexipay-emulator", daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> None:
+        with self._condition:
+            entry = (time.monotonic() + delay, next(self._counter), callback)
+            heapq.heappush(self._queue, entry)
+            self._condition.notify()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                callback = heapq.heappop(self._queue)[2]
+            try:
+                callback()
+            except Exception:  # pragma: no cover - keep the scheduler alive
+                pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    emulator: "EmulatorServer"
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this each response waits for
+    # the client's delayed ACK
+    disable_nagle_algorithm = True
+    server: _HTTPServer
+
+    def _dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        response = self.server.emulator.handle(self.command, self.path, self.headers, body)
+        if response is None:
+            self.close_connection = True
+            return
+        status, headers, content = response
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class EmulatorServer:
+    """
+    Local stand-in for the Pexipay API
+
+    Serves every endpoint used by the SDK's resources from an ``EmulatorStore``, with
+    cursor pagination, per-API-key rate limiting and rate-limit headers, idempotent
+    ``POST`` replays, latency and fault injection, and signed webhook delivery. Created
+    payments start out ``processing`` and settle after ``settle_delay``; the sandbox
+    test cards decline (``4000000000000002``) or require 3D Secure (``4000000000003220``).
+
+    ``handle()`` does not depend on the HTTP server, so the emulator can also sit behind
+    an ``InMemoryTransport``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[EmulatorConfig] = None,
+        store: Optional[EmulatorStore] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the server
+
+        Args:
+            config: Faults and limits (defaults: none)
+            store: Data to serve (default: a store with 10,000 synthetic payments)
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+        """
+        self.config = config or EmulatorConfig()
+        self.store = store if store is not None else EmulatorStore()
+        self.host = host
+        self.port = port
+        self.stats = EmulatorStats()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._idempotent: "OrderedDict[Tuple[str, str], Response]" = OrderedDict()
+        self._request_ids = itertools.count(1)
+        self._scheduler: Optional[_Scheduler] = None
+        self._httpd: Optional[_HTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: List[Tuple[str, Pattern[str], Callable[..., Result]]] = []
+        for method, path, handler in (
+            ("POST", "/payments", self._create_payment),
+            ("GET", "/payments", self._list_payments),
+            ("GET", "/payments/{id}", self._retrieve_payment),
+            ("POST", "/payments/{id}/3ds/confirm", self._confirm_3ds),
+            ("POST", "/payments/{id}/cancel", self._cancel_payment),
+            ("POST", "/payments/{id}/capture", self._capture_payment),
+            ("POST", "/refunds", self._create_refund),
+            ("GET", "/refunds", self._list_refunds),
+            ("GET", "/refunds/{id}", self._retrieve_refund),
+            ("POST", "/refunds/{id}/cancel", self._cancel_refund),
+            ("POST", "/customers", self._create_customer),
+            ("GET", "/customers", self._list_customers),
+            ("GET", "/customers/{id}", self._retrieve_customer),
+            ("PATCH", "/customers/{id}", self._update_customer),
+            ("DELETE", "/customers/{id}", self._delete_customer),
+            ("POST", "/payment-links", self._create_payment_link),
+            ("GET", "/payment-links", self._list_payment_links),
+            ("GET", "/payment-links/{id}", self._retrieve_payment_link),
+            ("POST", "/payment-links/{id}/cancel", self._cancel_payment_link),
+            ("GET", "/transactions", self._list_transactions),
+            ("GET", "/transactions/{id}", self._retrieve_transaction),
+            ("GET", "/balance", self._retrieve_balance),
+            ("GET", "/balance/transactions", self._list_balance_transactions),
+        ):
+            pattern = re.compile("^/v1" + path.replace("{id}", "(?P<id>[^/]+)") + "$")
+            self._routes.append((method, pattern, handler))
+
+    # Server lifecycle
+
+    @property
+    def url(self) -> str:
+        """API base URL to pass as ``api_base_url``"""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "EmulatorServer":
+        """Start serving on a background thread"""
+        self._bind()
+        assert self._httpd is not None
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="pexipay-emulator-http", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted"""
+        self._bind()
+        assert self._httpd is not None
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            if self._thread is not None:
+                self._httpd.shutdown()
+                self._thread.join()
+                self._thread = None
+            self._httpd.server_close()
+            self._httpd = None
+        if self._scheduler is not None:
+            self._scheduler.stop()
+            self._scheduler = None
+
+    def _bind(self) -> None:
+        if self._httpd is not None:
+            raise RuntimeError("Emulator is already running")
+        self._httpd = _HTTPServer((self.host, self.port), _RequestHandler)
+        self._httpd.emulator = self
+        self.port = self._httpd.server_address[1]
+        self._scheduler = _Scheduler()
+
+    def __enter__(self) -> "EmulatorServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _later(self, delay: float, callback: Callable[[], None]) -> None:
+        if self._scheduler is None:
+            # Not serving over HTTP: settle immediately instead
+            callback()
+        else:
+            self._scheduler.call_later(delay, callback)
+
+    # Request handling
+
+    def handle(
+        self, method: str, target: str, headers: Mapping[str, str], body: bytes
+    ) -> Optional[Response]:
+        """
+        Answer one request
+
+        Returns:
+            Status, headers and body, or None if the connection should be dropped
+        """
+        config = self.config
+        with self._lock:
+            self.stats.requests += 1
+            roll = self._random.random()
+            delay = config.latency
+            if config.latency and config.latency_sigma:
+                delay = self._random.lognormvariate(math.log(config.latency), config.latency_sigma)
+            failure = self._random.choice(config.error_statuses) if config.error_statuses else 500
+
+        if delay:
+            time.sleep(delay)
+        if roll < config.drop_rate:
+            with self._lock:
+                self.stats.dropped += 1
+            return None
+
+        response_headers = {"X-Request-Id": f"req_emu_{next(self._request_ids):010d}"}
+        api_key = (headers.get("Authorization") or "").partition("Bearer ")[2].strip()
+        if not api_key:
+            error = ApiError(401, "Invalid API key", "authentication_error")
+            return self._respond(error.status_code, error.payload(), response_headers, headers)
+
+        if config.rate_limit is not None and not self._admit(api_key, response_headers):
+            with self._lock:
+                self.stats.rate_limited += 1
+            retry_after = float(response_headers["Retry-After"])
+            error = ApiError(429, "Rate limit exceeded", "rate_limit_error")
+            payload = dict(error.payload(), retryAfter=retry_after)
+            return self._respond(429, payload, response_headers, headers)
+
+        if roll < config.drop_rate + config.error_rate:
+            with self._lock:
+                self.stats.injected_errors += 1
+            error = ApiError(failure, "Injected failure", "internal_error")
+            return self._respond(failure, error.payload(), response_headers, headers)
+
+        idempotency_key = headers.get("Idempotency-Key") if method == "POST" else None
+        if idempotency_key:
+            with self._lock:
+                cached = self._idempotent.get((api_key, idempotency_key))
+                if cached is not None:
+                    self.stats.idempotent_replays += 1
+            if cached is not None:
+                status, cached_headers, content = cached
+                replay = dict(cached_headers, **response_headers)
+                replay["Idempotent-Replayed"] = "true"
+                return status, replay, content
+
+        status, payload = self._route(method, target, headers, body)
+        response = self._respond(status, payload, response_headers, headers)
+        if idempotency_key and response[0] < 500:
+            with self._lock:
+                self._idempotent[(api_key, idempotency_key)] = response
+                while len(self._idempotent) > 100_000:
+                    self._idempotent.popitem(last=False)
+        return response
+
+    def _admit(self, api_key: str, response_headers: Dict[str, str]) -> bool:
+        config = self.config
+        assert config.rate_limit is not None
+        with self._lock:
+            bucket = self._buckets.get(api_key)
+            if bucket is None:
+                rate = config.rate_limit / config.rate_limit_window
+                bucket = TokenBucket(rate, config.rate_limit)
+                self._buckets[api_key] = bucket
+        admitted = bucket.try_acquire()
+        response_headers["X-RateLimit-Limit"] = str(config.rate_limit)
+        response_headers["X-RateLimit-Remaining"] = str(int(bucket.available))
+        response_headers["X-RateLimit-Reset"] = str(math.ceil(time.time() + bucket.full_in()))
+        if not admitted:
+            response_headers["Retry-After"] = f"{max(bucket.wait_time(), 0.001):.3f}"
+        return admitted
+
+    def _route(
+        self, method: str, target: str, headers: Mapping[str, str], body: bytes
+    ) -> Result:
+        parts = urlsplit(target)
+        path_matched = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(parts.path)
+            if match is None:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            try:
+                data = self._decode_body(headers, body)
+                query = dict(parse_qsl(parts.query))
+                return handler(data, query, **match.groupdict())
+            except ApiError as error:
+                return error.status_code, error.payload()
+        if path_matched:
+            return 405, ApiError(405, "Method not allowed", "method_not_allowed").payload()
+        return 404, ApiError(404, f"Unknown endpoint: {parts.path}", "not_found").payload()
+
+    @staticmethod
+    def _decode_body(headers: Mapping[str, str], body: bytes) -> Dict[str, Any]:
+        if not body:
+            return {}
+        if (headers.get("Content-Encoding") or "").lower() == "gzip":
+            body = gzip.decompress(body)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON", "invalid_request")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object", "invalid_request")
+        return data
+
+    def _respond(
+        self,
+        status: int,
+        payload: Any,
+        response_headers: Dict[str, str],
+        request_headers: Mapping[str, str],
+    ) -> Response:
+        content = _encode(payload).encode("utf-8")
+        response_headers["Content-Type"] = "application/json"
+        if (
+            self.config.compress
+            and len(content) > 1024
+            and "gzip" in (request_headers.get("Accept-Encoding") or "")
+        ):
+            content = gzip.compress(content, 5)
+            response_headers["Content-Encoding"] = "gzip"
+        response_headers["Content-Length"] = str(len(content))
+        with self._lock:
+            self.stats.by_status[status] = self.stats.by_status.get(status, 0) + 1
+        return status, response_headers, content
+
+    # Lists
+
+    def _list(
+        self, table: Any, query: Mapping[str, str], filters: Mapping[str, str] = {}
+    ) -> Result:
+        try:
+            limit = int(query.get("limit") or 10)
+        except ValueError:
+            raise _invalid("limit must be an integer", "limit")
+        if not 1 <= limit <= 100:
+            raise _invalid("limit must be between 1 and 100", "limit")
+        bounds = {}
+        for param in ("createdAfter", "createdBefore"):
+            value = query.get(param)
+            bounds[param] = parse_timestamp(value) if value else None
+            if value and bounds[param] is None:
+                raise _invalid(f"{param} must be an ISO 8601 timestamp", param)
+        wanted = {field: query[param] for param, field in filters.items() if query.get(param)}
+        match: Optional[Match] = None
+        if wanted:
+            match = lambda record: all(  # noqa: E731
+                str(record.get(field)) == value for field, value in wanted.items()
+            )
+        created_after = bounds["createdAfter"]
+        with self.store.lock:
+            try:
+                records, has_more = table.page(
+                    limit,
+                    starting_after=query.get("startingAfter"),
+                    ending_before=query.get("endingBefore"),
+                    # createdAfter is exclusive; the table's lower bound is inclusive
+                    created_after=None if created_after is None else created_after + 1e-6,
+                    created_before=bounds["createdBefore"],
+                    match=match,
+                )
+            except KeyError as error:
+                raise _invalid(f"Unknown cursor: {error.args[0]}", "cursor")
+        return 200, {"data": records, "hasMore": has_more}
+
+    # Payments
+
+    def _find(self, table: Any, kind: str, record_id: str) -> Record:
+        record = table.find(record_id)
+        if record is None:
+            raise _not_found(kind, record_id)
+        return dict(record)
+
+    def _list_payments(self, body: Record, query: Dict[str, str]) -> Result:
+        filters = {"status": "status", "customerEmail": "customerEmail"}
+        return self._list(self.store.payments, query, filters)
+
+    def _retrieve_payment(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            return 200, {"data": self._find(self.store.payments, "payment", id)}
+
+    def _create_payment(self, body: Record, query: Dict[str, str]) -> Result:
+        amount = _amount(body)
+        currency = _currency(body)
+        method = body.get("paymentMethod") or {}
+        card = (method.get("card") or {}).get("number") if isinstance(method, dict) else None
+        status = "requires_action" if card == THREE_DS_CARD else "processing"
+
+        def build(record_id: str, created: float) -> Record:
+            stamp = format_timestamp(created)
+            record: Record = {
+                "id": record_id,
+                "amount": amount,
+                "currency": currency,
+                "status": status,
+                "description": body.get("description"),
+                "customerEmail": body.get("customerEmail"),
+                "customerName": body.get("customerName"),
+                "returnUrl": body.get("returnUrl"),
+                "cancelUrl": body.get("cancelUrl"),
+                "webhookUrl": body.get("webhookUrl"),
+                "amountRefunded": 0.0,
+                "metadata": body.get("metadata") or {},
+                "createdAt": stamp,
+                "updatedAt": stamp,
+            }
+            if status == "requires_action":
+                record["nextAction"] = {
+                    "type": "redirect_to_url",
+                    "url": f"https://pay.pexipay.com/3ds/{record_id}",
+                }
+            return record
+
+        with self.store.lock:
+            payment = self.store.payments.append(build)
+            if status == "processing":
+                self.store.pending += amount
+        if status == "processing":
+            self._schedule_settlement(payment["id"], card == DECLINED_CARD)
+        else:
+            self._send_webhook("payment.requires_action", payment)
+        return 201, {"data": payment}
+
+    def _schedule_settlement(self, payment_id: str, declined: bool) -> None:
+        self._later(self.config.settle_delay, lambda: self._settle(payment_id, declined))
+
+    def _settle(self, payment_id: str, declined: bool) -> Optional[Record]:
+        store = self.store
+        with store.lock:
+            payment = store.payments.find(payment_id)
+            if payment is None or payment["status"] != "processing":
+                return None
+            payment = dict(payment, updatedAt=format_timestamp(time.time()))
+            store.pending -= payment["amount"]
+            if declined:
+                payment.update(status="failed", failureReason="card_declined")
+            else:
+                payment["status"] = "succeeded"
+                store.add_transaction(
+                    "payment", payment["amount"], payment["currency"], payment["id"]
+                )
+            store.payments.put(payment)
+        self._send_webhook("payment.failed" if declined else "payment.succeeded", payment)
+        return payment
+
+    def _confirm_3ds(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        result = body.get("threeDSResult")
+        if not isinstance(result, str) or not result:
+            raise _invalid("threeDSResult is required", "threeDSResult")
+        with self.store.lock:
+            payment = self._find(self.store.payments, "payment", id)
+            if payment["status"] != "requires_action":
+                raise _invalid_state("payment", payment, "confirm 3D Secure for")
+            payment.pop("nextAction", None)
+            payment["updatedAt"] = format_timestamp(time.time())
+            failed = result.lower() in ("failed", "failure", "n")
+            if failed:
+                payment.update(status="failed", failureReason="authentication_failed")
+            else:
+                payment["status"] = "processing"
+                self.store.pending += payment["amount"]
+            self.store.payments.put(payment)
+        if failed:
+            self._send_webhook("payment.failed", payment)
+        else:
+            self._schedule_settlement(id, False)
+        return 200, {"data": payment}
+
+    def _cancel_payment(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            payment = self._find(self.store.payments, "payment", id)
+            if payment["status"] not in ("processing", "requires_action"):
+                raise _invalid_state("payment", payment, "cancel")
+            if payment["status"] == "processing":
+                self.store.pending -= payment["amount"]
+            payment.pop("nextAction", None)
+            payment.update(status="canceled", updatedAt=format_timestamp(time.time()))
+            self.store.payments.put(payment)
+        return 200, {"data": payment}
+
+    def _capture_payment(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        amount = _optional_amount(body)
+        with self.store.lock:
+            payment = self._find(self.store.payments, "payment", id)
+            if payment["status"] != "processing":
+                raise _invalid_state("payment", payment, "capture")
+            if amount is not None and amount > payment["amount"]:
+                raise _invalid("amount exceeds the payment amount", "amount")
+            captured = self._settle(id, False)
+        return 200, {"data": captured}
+
+    # Refunds
+
+    def _list_refunds(self, body: Record, query: Dict[str, str]) -> Result:
+        filters = {"paymentId": "paymentId", "status": "status"}
+        return self._list(self.store.refunds, query, filters)
+
+    def _retrieve_refund(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            return 200, {"data": self._find(self.store.refunds, "refund", id)}
+
+    def _create_refund(self, body: Record, query: Dict[str, str]) -> Result:
+        payment_id = body.get("paymentId")
+        if not isinstance(payment_id, str) or not payment_id:
+            raise _invalid("paymentId is required", "paymentId")
+        amount = _optional_amount(body)
+        with self.store.lock:
+            payment = self._find(self.store.payments, "payment", payment_id)
+            if payment["status"] != "succeeded":
+                raise _invalid_state("payment", payment, "refund")
+            refundable = round(payment["amount"] - payment["amountRefunded"], 2)
+            amount = refundable if amount is None else amount
+            if amount > refundable:
+                raise _invalid(f"amount exceeds the refundable {refundable}", "amount")
+            payment["amountRefunded"] = round(payment["amountRefunded"] + amount, 2)
+            self.store.payments.put(payment)
+            refund = self.store.refunds.append(
+                lambda record_id, created: {
+                    "id": record_id,
+                    "paymentId": payment_id,
+                    "amount": amount,
+                    "currency": payment["currency"],
+                    "status": "pending",
+                    "reason": body.get("reason"),
+                    "metadata": body.get("metadata") or {},
+                    "createdAt": format_timestamp(created),
+                }
+            )
+        self._later(self.config.settle_delay, lambda: self._settle_refund(refund["id"]))
+        return 201, {"data": refund}
+
+    def _settle_refund(self, refund_id: str) -> None:
+        store = self.store
+        with store.lock:
+            refund = store.refunds.find(refund_id)
+            if refund is None or refund["status"] != "pending":
+                return
+            store.refunds.put(dict(refund, status="succeeded"))
+            store.add_transaction("refund", -refund["amount"], refund["currency"], refund_id)
+            payment = store.payments.find(refund["paymentId"])
+            if payment is None:
+                return
+            if payment["amountRefunded"] >= payment["amount"]:
+                payment = dict(payment, status="refunded")
+                store.payments.put(payment)
+        self._send_webhook("payment.refunded", payment)
+
+    def _cancel_refund(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            refund = self._find(self.store.refunds, "refund", id)
+            if refund["status"] != "pending":
+                raise _invalid_state("refund", refund, "cancel")
+            refund["status"] = "canceled"
+            self.store.refunds.put(refund)
+            payment = self.store.payments.find(refund["paymentId"])
+            if payment is not None:
+                refunded = round(payment["amountRefunded"] - refund["amount"], 2)
+                self.store.payments.put(dict(payment, amountRefunded=refunded))
+        return 200, {"data": refund}
+
+    # Customers
+
+    def _list_customers(self, body: Record, query: Dict[str, str]) -> Result:
+        return self._list(self.store.customers, query, {"email": "email"})
+
+    def _retrieve_customer(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            return 200, {"data": self._find(self.store.customers, "customer", id)}
+
+    def _create_customer(self, body: Record, query: Dict[str, str]) -> Result:
+        email = body.get("email")
+        if not isinstance(email, str) or "@" not in email:
+            raise _invalid("email must be an email address", "email")
+        with self.store.lock:
+            customer = self.store.customers.append(
+                lambda record_id, created: {
+                    "id": record_id,
+                    "email": email,
+                    "name": body.get("name"),
+                    "phone": body.get("phone"),
+                    "address": body.get("address"),
+                    "metadata": body.get("metadata") or {},
+                    "createdAt": format_timestamp(created),
+                }
+            )
+        return 201, {"data": customer}
+
+    def _update_customer(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            customer = self._find(self.store.customers, "customer", id)
+            for name in ("email", "name", "phone", "address", "metadata"):
+                if name in body:
+                    customer[name] = body[name]
+            self.store.customers.put(customer)
+        return 200, {"data": customer}
+
+    def _delete_customer(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            self._find(self.store.customers, "customer", id)
+            self.store.customers.delete(id)
+        return 200, {"id": id, "deleted": True}
+
+    # Payment links
+
+    def _list_payment_links(self, body: Record, query: Dict[str, str]) -> Result:
+        return self._list(self.store.payment_links, query, {"status": "status"})
+
+    def _retrieve_payment_link(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            return 200, {"data": self._find(self.store.payment_links, "payment link", id)}
+
+    def _create_payment_link(self, body: Record, query: Dict[str, str]) -> Result:
+        amount = _amount(body)
+        currency = _currency(body)
+        with self.store.lock:
+            link = self.store.payment_links.append(
+                lambda record_id, created: {
+                    "id": record_id,
+                    "url": f"https://pay.pexipay.com/l/{record_id}",
+                    "amount": amount,
+                    "currency": currency,
+                    "status": "active",
+                    "description": body.get("description"),
+                    "customerInfo": body.get("customerInfo"),
+                    "returnUrl": body.get("returnUrl"),
+                    "cancelUrl": body.get("cancelUrl"),
+                    "webhookUrl": body.get("webhookUrl"),
+                    "expiresAt": body.get("expiresAt"),
+                    "metadata": body.get("metadata") or {},
+                    "createdAt": format_timestamp(created),
+                }
+            )
+        return 201, {"data": link}
+
+    def _cancel_payment_link(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            link = self._find(self.store.payment_links, "payment link", id)
+            if link["status"] != "active":
+                raise _invalid_state("payment link", link, "cancel")
+            link["status"] = "canceled"
+            self.store.payment_links.put(link)
+        return 200, {"data": link}
+
+    # Transactions and balance
+
+    def _list_transactions(self, body: Record, query: Dict[str, str]) -> Result:
+        filters = {"type": "type", "status": "status"}
+        return self._list(self.store.transactions, query, filters)
+
+    def _retrieve_transaction(self, body: Record, query: Dict[str, str], id: str) -> Result:
+        with self.store.lock:
+            return 200, {"data": self._find(self.store.transactions, "transaction", id)}
+
+    def _retrieve_balance(self, body: Record, query: Dict[str, str]) -> Result:
+        with self.store.lock:
+            return 200, {"data": self.store.balance()}
+
+    def _list_balance_transactions(self, body: Record, query: Dict[str, str]) -> Result:
+        # Every ledger entry is settled, so the balance history is the ledger itself
+        return self._list(self.store.transactions, query)
+
+    # Webhooks
+
+    def _send_webhook(self, event: str, payment: Record) -> None:
+        url = payment.get("webhookUrl") or self.config.webhook_url
+        if not url:
+            return
+        payload = _encode(
+            {"event": event, "timestamp": format_timestamp(time.time()), "data": payment}
+        )
+        self._later(0, lambda: self._deliver(url, payload, 0))
+
+    def _deliver(self, url: str, payload: str, attempt: int) -> None:
+        import urllib.request
+
+        signature = hmac.new(
+            self.config.webhook_secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+        request = urllib.request.Request(
+            url,
+            data=payload.encode("utf-8"),
+            method="POST",
+            headers={"Content-Type": "application/json", "X-Pexipay-Signature": signature},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                response.read()
+            delivered = True
+        except Exception:
+            delivered = False
+        with self._lock:
+            if delivered:
+                self.stats.webhooks_delivered += 1
+            elif attempt >= self.config.webhook_retries:
+                self.stats.webhooks_failed += 1
+        if not delivered and attempt < self.config.webhook_retries:
+            # Back off 1s, 2s, 4s, ...
+            self._later(2.0**attempt, lambda: self._deliver(url, payload, attempt + 1))
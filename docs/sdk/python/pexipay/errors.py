@@ -40,7 +40,10 @@ class RateLimitError(PexipayError):
     """Rate limit exceeded"""
 
     def __init__(
-        self, message: str = "Rate limit exceeded", retry_after: Optional[int] = None, request_id: Optional[str] = None
+        self,
+        message: str = "Rate limit exceeded",
+        retry_after: Optional[float] = None,
+        request_id: Optional[str] = None,
     ):
         super().__init__(message, 429, "rate_limit_error", request_id)
         self.retry_after = retry_after
@@ -49,8 +52,35 @@ class RateLimitError(PexipayError):
 class NetworkError(PexipayError):
     """Network error"""
 
-    def __init__(self, message: str = "Network error occurred"):
+    def __init__(self, message: str = "Network error occurred", request_sent: bool = True):
         super().__init__(message, None, "network_error")
+        # False when the connection failed before the request could reach the server
+        self.request_sent = request_sent
+
+
+class RequestTimeoutError(NetworkError):
+    """Connecting or reading the response timed out"""
+
+    def __init__(self, message: str = "Request timed out", request_sent: bool = True):
+        super().__init__(message, request_sent)
+        self.code = "timeout"
+
+
+class DeadlineExceededError(RequestTimeoutError):
+    """The request did not complete within its total time budget"""
+
+    def __init__(self, message: str = "Request deadline exceeded"):
+        super().__init__(message)
+        self.code = "deadline_exceeded"
+
+
+class CircuitOpenError(PexipayError):
+    """Request rejected without being sent because the endpoint group's circuit is open"""
+
+    def __init__(self, group: str, retry_in: float = 0.0):
+        super().__init__(f"Circuit open for {group}; failing fast", None, "circuit_open")
+        self.group = group
+        self.retry_in = retry_in
 
 
 class ResourceNotFoundError(PexipayError):
@@ -66,3 +96,18 @@ class PaymentFailedError(PexipayError):
 
     def __init__(self, message: str, details: Optional[Any] = None, request_id: Optional[str] = None):
         super().__init__(message, 402, "payment_failed", request_id, details)
+
+
+class RequestQueuedError(PexipayError):
+    """The API was unreachable, so the request was stored in the outbox to be replayed"""
+
+    def __init__(self, entry_id: int, idempotency_key: str, error: PexipayError):
+        super().__init__(
+            f"Request queued for replay ({error.message})",
+            error.status_code,
+            "request_queued",
+            error.request_id,
+        )
+        self.entry_id = entry_id
+        self.idempotency_key = idempotency_key
+        self.error = error
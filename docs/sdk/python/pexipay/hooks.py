@@ -0,0 +1,327 @@
+"""Request lifecycle hooks and latency aggregation"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import _fork
+
+HookCallback = Callable[..., None]
+
+HOOK_EVENTS = (
+    "before_request",
+    "after_response",
+    "on_retry",
+    "on_error",
+    "on_circuit_state_change",
+    "on_cache_lookup",
+)
+
+_ID_SEGMENT = re.compile(r"^(?:[A-Za-z]+_[A-Za-z0-9]+|(?=.*\d)[A-Za-z0-9-]{5,})$")
+
+
+def endpoint_route(endpoint: str) -> str:
+    """Collapse resource IDs in a path, e.g. /payments/pay_1/capture -> /payments/{id}/capture"""
+    path = endpoint.split("?", 1)[0]
+    return "/".join("{id}" if _ID_SEGMENT.match(part) else part for part in path.split("/"))
+
+
+@dataclass
+class RequestTimings:
+    """Per-phase timings of a request, in seconds"""
+
+    queue_wait: float = 0.0
+    """Time spent waiting for a pooled connection"""
+    connect: float = 0.0
+    """TCP connect and TLS handshake, when a new connection was opened"""
+    ttfb: float = 0.0
+    """From sending the request to receiving the response headers"""
+    body_read: float = 0.0
+    """Reading the response body"""
+    decode: float = 0.0
+    """Decoding the JSON payload"""
+    total: float = 0.0
+    """Wall time of the whole request"""
+
+
+@dataclass
+class RequestEvent:
+    """State of a request passed to every hook"""
+
+    method: str
+    endpoint: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    attempt: int = 1
+    status_code: Optional[int] = None
+    request_id: Optional[str] = None
+    bytes_sent: int = 0
+    """Request body size before compression"""
+    bytes_received: int = 0
+    """Response body size after decompression"""
+    wire_bytes_sent: int = 0
+    """Request body size as sent (after compression)"""
+    wire_bytes_received: int = 0
+    """Response body size as received (before decompression)"""
+    timings: RequestTimings = field(default_factory=RequestTimings)
+    error: Optional[BaseException] = None
+    retry_delay: Optional[float] = None
+    """Backoff before the next attempt, set for on_retry"""
+    hedged: bool = False
+    """Whether a duplicate of this attempt was sent (see pexipay.hedging)"""
+    context: Dict[str, Any] = field(default_factory=dict)
+    """Scratch space for hooks to share state across events of one request"""
+    _route: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def route(self) -> str:
+        """Endpoint with resource IDs collapsed, suitable as a metrics label"""
+        route = self._route
+        if route is None:
+            # Resources pass their endpoint template; other paths are collapsed once
+            route = self._route = endpoint_route(self.endpoint)
+        return route
+
+
+class Hooks:
+    """
+    Registry of request lifecycle callbacks
+
+    Events:
+        before_request(event): before each attempt is sent; ``event.headers`` may be modified
+        after_response(event): after each HTTP response has been received and decoded
+        on_retry(event): before a failed attempt is retried; ``event.attempt`` is the
+            attempt that failed and ``event.retry_delay`` the backoff before the next one
+        on_error(event): once, when the request finally fails, with ``event.error`` set
+        on_circuit_state_change(group, previous_state, state): when an endpoint group's
+            circuit breaker opens, half-opens or closes
+        on_cache_lookup(cache, hit): when a call is looked up in an SDK cache, e.g.
+            ``("balance", True)`` when ``balance.retrieve()`` is served from the cache
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: Dict[str, List[HookCallback]] = {name: [] for name in HOOK_EVENTS}
+
+    def register(self, event: str, callback: HookCallback) -> HookCallback:
+        """Register a callback for an event"""
+        if event not in self._callbacks:
+            raise ValueError(f"Unknown hook event: {event}")
+        self._callbacks[event].append(callback)
+        return callback
+
+    def unregister(self, event: str, callback: HookCallback) -> None:
+        """Remove a previously registered callback"""
+        if callback in self._callbacks.get(event, []):
+            self._callbacks[event].remove(callback)
+
+    def add(self, middleware: Any) -> Any:
+        """Register every hook method (before_request, after_response, ...) of an object"""
+        for name in self._callbacks:
+            callback = getattr(middleware, name, None)
+            if callable(callback):
+                self._callbacks[name].append(callback)
+        return middleware
+
+    def remove(self, middleware: Any) -> None:
+        """Remove every hook method of an object registered with add()"""
+        for name in self._callbacks:
+            callback = getattr(middleware, name, None)
+            if callback is not None:
+                self.unregister(name, callback)
+
+    def before_request(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering a before_request callback"""
+        return self.register("before_request", callback)
+
+    def after_response(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering an after_response callback"""
+        return self.register("after_response", callback)
+
+    def on_retry(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering an on_retry callback"""
+        return self.register("on_retry", callback)
+
+    def on_error(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering an on_error callback"""
+        return self.register("on_error", callback)
+
+    def on_circuit_state_change(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering an on_circuit_state_change callback"""
+        return self.register("on_circuit_state_change", callback)
+
+    def on_cache_lookup(self, callback: HookCallback) -> HookCallback:
+        """Decorator registering an on_cache_lookup callback"""
+        return self.register("on_cache_lookup", callback)
+
+    def has(self, event: str) -> bool:
+        """Whether any callback is registered for an event"""
+        return bool(self._callbacks.get(event))
+
+    def emit(self, event: str, *args: Any) -> None:
+        """Invoke every callback registered for an event"""
+        for callback in self._callbacks[event]:
+            callback(*args)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram
+
+    Buckets grow geometrically by ``2 ** (1 / precision)`` from ``lowest`` to ``highest``
+    seconds, so recording is O(1) and memory is a fixed small list of counters.
+    """
+
+    def __init__(self, lowest: float = 0.0001, highest: float = 120.0, precision: int = 4):
+        self.lowest = lowest
+        self._log_ratio = math.log(2.0) / precision
+        self._size = int(math.ceil(math.log(highest / lowest) / self._log_ratio)) + 2
+        self.counts = [0] * self._size
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        index = int(math.log(value / self.lowest) / self._log_ratio) + 1
+        return index if index < self._size else self._size - 1
+
+    def upper_bound(self, index: int) -> float:
+        """Upper bound in seconds of a bucket"""
+        return self.lowest * math.exp(self._log_ratio * index)
+
+    def record(self, value: float) -> None:
+        """Record a latency in seconds"""
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Approximate latency at a percentile (0-100), or None when empty"""
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, int(math.ceil(self.count * percent / 100.0)))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Non-empty buckets as (upper bound, count) pairs"""
+        with self._lock:
+            return [(self.upper_bound(i), c) for i, c in enumerate(self.counts) if c]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary statistics"""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class LatencyAggregator:
+    """
+    In-memory per-endpoint latency histograms
+
+    Register on a client with ``client.hooks.add(LatencyAggregator())``. Requests are keyed
+    by method and route, with resource IDs collapsed into ``{id}``.
+    """
+
+    PHASES = ("queue_wait", "connect", "ttfb", "body_read", "decode")
+
+    def __init__(self, **histogram_options: Any):
+        self._histogram_options = histogram_options
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._phase_totals: Dict[Tuple[str, str], List[float]] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._retries: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _histogram(self, key: Tuple[str, str]) -> LatencyHistogram:
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = LatencyHistogram(**self._histogram_options)
+                    self._phase_totals[key] = [0.0] * len(self.PHASES)
+                    self._histograms[key] = histogram
+        return histogram
+
+    def _record(self, event: RequestEvent) -> None:
+        key = (event.method, event.route)
+        timings = event.timings
+        self._histogram(key).record(timings.total)
+        totals = self._phase_totals[key]
+        with self._lock:
+            for i, phase in enumerate(self.PHASES):
+                totals[i] += getattr(timings, phase)
+
+    def after_response(self, event: RequestEvent) -> None:
+        self._record(event)
+
+    def on_retry(self, event: RequestEvent) -> None:
+        key = (event.method, event.route)
+        if event.status_code is None:
+            self._record(event)
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def on_error(self, event: RequestEvent) -> None:
+        key = (event.method, event.route)
+        if event.status_code is None:
+            # Responses were already recorded by after_response
+            self._record(event)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def histogram(self, method: str, endpoint: str) -> Optional[LatencyHistogram]:
+        """Histogram for an endpoint, if any requests were recorded"""
+        return self._histograms.get((method.upper(), endpoint_route(endpoint)))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Latency statistics per ``"METHOD /route"``, including mean time per phase"""
+        result = {}
+        for key, histogram in list(self._histograms.items()):
+            stats = histogram.snapshot()
+            count = stats["count"] or 1
+            totals = self._phase_totals[key]
+            stats["phases"] = {phase: totals[i] / count for i, phase in enumerate(self.PHASES)}
+            stats["errors"] = self._errors.get(key, 0)
+            stats["retries"] = self._retries.get(key, 0)
+            result[f"{key[0]} {key[1]}"] = stats
+        return result
+
+    def reset(self) -> None:
+        """Discard all recorded data"""
+        with self._lock:
+            self._histograms.clear()
+            self._phase_totals.clear()
+            self._errors.clear()
+            self._retries.clear()
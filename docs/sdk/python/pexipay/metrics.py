@@ -0,0 +1,393 @@
+"""
+Client-side SDK metrics in the OpenMetrics text format
+
+Usage:
+    from pexipay.metrics import MetricsCollector
+
+    metrics = MetricsCollector()
+    metrics.instrument(client)
+    metrics.start_http_server(9464)  # or metrics.start_directory_writer(path)
+"""
+
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from . import _fork
+from .errors import CircuitOpenError
+from .hooks import RequestEvent
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+# name -> (type, help)
+METRICS = {
+    "pexipay_requests": ("counter", "Completed API requests by status code"),
+    "pexipay_request_errors": ("counter", "Failed API requests by error kind"),
+    "pexipay_rate_limited": ("counter", "Requests rejected with HTTP 429"),
+    "pexipay_retries": ("counter", "Retried request attempts"),
+    "pexipay_request_bytes": ("counter", "Request body bytes before compression"),
+    "pexipay_response_bytes": ("counter", "Response body bytes after decompression"),
+    "pexipay_request_wire_bytes": ("counter", "Request body bytes sent on the wire"),
+    "pexipay_response_wire_bytes": ("counter", "Response body bytes received on the wire"),
+    "pexipay_cache_requests": ("counter", "SDK cache lookups by result"),
+    "pexipay_circuit_transitions": ("counter", "Circuit breaker state changes by new state"),
+    "pexipay_requests_in_flight": ("gauge", "Requests currently in progress"),
+    "pexipay_circuit_state": ("gauge", "1 while a group's circuit breaker is open or half-open"),
+    "pexipay_request_duration_seconds": ("histogram", "Total request latency"),
+    "pexipay_pool_wait_seconds": ("histogram", "Time spent waiting for a pooled connection"),
+}
+
+
+class _Shard:
+    """Metric values recorded by a single thread"""
+
+    __slots__ = ("values", "histograms", "thread")
+
+    def __init__(self, thread: Optional[threading.Thread]):
+        self.values: Dict[SeriesKey, float] = {}
+        # series -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[SeriesKey, List[float]] = {}
+        self.thread = weakref.ref(thread) if thread is not None else None
+
+
+class MetricsCollector:
+    """
+    Records SDK counters and histograms with per-thread accumulation
+
+    Each thread writes to its own shard without taking a lock, and shards are merged only
+    when metrics are rendered. Register on one or more clients with ``instrument()``.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_stop = threading.Event()
+        self._writer_options: Optional[Tuple[str, float]] = None
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Start from zero: the parent reports what it recorded before the fork, and with a
+        # directory writer every process's file is added up
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        writer_running = self._writer is not None and not self._writer_stop.is_set()
+        self._writer = None
+        self._writer_stop = threading.Event()
+        if writer_running and self._writer_options is not None:
+            # The atexit handler registered by the parent is inherited
+            self._start_writer_thread(*self._writer_options)
+
+    # Recording
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        """Increment a counter (or adjust a gauge) for a label set"""
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Record a histogram observation"""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        series = histograms.get(key)
+        if series is None:
+            series = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """Record an SDK cache lookup"""
+        self.inc("pexipay_cache_requests", (("cache", cache), ("result", "hit" if hit else "miss")))
+
+    # Hooks
+
+    def instrument(self, client: "PexipayClient") -> "MetricsCollector":
+        """Register this collector on a client's hooks"""
+        client.hooks.add(self)
+        return self
+
+    def before_request(self, event: RequestEvent) -> None:
+        self.inc("pexipay_requests_in_flight")
+
+    def after_response(self, event: RequestEvent) -> None:
+        self._finish(event)
+
+    def on_retry(self, event: RequestEvent) -> None:
+        if event.status_code is None:
+            self._finish(event)
+        self.inc("pexipay_retries", (("method", event.method), ("route", event.route)))
+
+    def on_error(self, event: RequestEvent) -> None:
+        if event.status_code is None:
+            self._finish(event)
+            kind = "circuit_open" if isinstance(event.error, CircuitOpenError) else "network"
+        else:
+            kind = f"http_{event.status_code // 100}xx"
+        labels = (("method", event.method), ("route", event.route), ("kind", kind))
+        self.inc("pexipay_request_errors", labels)
+
+    def on_circuit_state_change(self, group: str, previous: str, state: str) -> None:
+        self.inc("pexipay_circuit_transitions", (("group", group), ("state", state)))
+        # Only non-closed states are reported; a group with no series is closed
+        if previous != "closed":
+            self.inc("pexipay_circuit_state", (("group", group), ("state", previous)), -1.0)
+        if state != "closed":
+            self.inc("pexipay_circuit_state", (("group", group), ("state", state)))
+
+    def on_cache_lookup(self, cache: str, hit: bool) -> None:
+        self.record_cache(cache, hit)
+
+    def _finish(self, event: RequestEvent) -> None:
+        route = event.route
+        labels = (("method", event.method), ("route", route))
+        status = str(event.status_code) if event.status_code is not None else "error"
+        self.inc("pexipay_requests_in_flight", value=-1.0)
+        self.inc("pexipay_requests", labels + (("status", status),))
+        if event.status_code == 429:
+            self.inc("pexipay_rate_limited", (("route", route),))
+        self.inc("pexipay_request_bytes", labels, event.bytes_sent)
+        self.inc("pexipay_response_bytes", labels, event.bytes_received)
+        self.inc("pexipay_request_wire_bytes", labels, event.wire_bytes_sent)
+        self.inc("pexipay_response_wire_bytes", labels, event.wire_bytes_received)
+        self.observe("pexipay_request_duration_seconds", event.timings.total, labels)
+        self.observe("pexipay_pool_wait_seconds", event.timings.queue_wait)
+
+    # Aggregation
+
+    def collect(self) -> Dict[str, Any]:
+        """Merge all thread shards into a JSON-serializable snapshot"""
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                thread = shard.thread() if shard.thread is not None else None
+                if thread is None or not thread.is_alive():
+                    # Fold finished threads into one shard so memory stays bounded
+                    _merge(self._retired, shard.values.copy(), shard.histograms.copy())
+                else:
+                    live.append(shard)
+            self._shards = live
+            merged = _Shard(None)
+            _merge(merged, self._retired.values.copy(), self._retired.histograms.copy())
+        for shard in live:
+            _merge(merged, shard.values.copy(), shard.histograms.copy())
+        return {
+            "buckets": list(self.buckets),
+            "values": [
+                [name, list(labels), value] for (name, labels), value in merged.values.items()
+            ],
+            "histograms": [
+                [name, list(labels), series] for (name, labels), series in merged.histograms.items()
+            ],
+        }
+
+    def render(self) -> str:
+        """Render current metrics in the OpenMetrics text format"""
+        return render_snapshots([self.collect()])
+
+    # Exposition
+
+    def start_http_server(
+        self, port: int, addr: str = "0.0.0.0", directory: Optional[str] = None
+    ) -> ThreadingHTTPServer:
+        """
+        Serve metrics at ``/metrics`` from a background thread
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            addr: Address to bind
+            directory: Serve the merged metrics of every process writing to this
+                directory instead of this process only
+        """
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                text = render_directory(directory) if directory else collector.render()
+                body = text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(
+            target=server.serve_forever, name="pexipay-metrics-http", daemon=True
+        )
+        thread.start()
+        return server
+
+    def write_to_directory(self, directory: str) -> str:
+        """Atomically write this process's metrics to a per-process file in a directory"""
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.collect()
+        snapshot["pid"] = os.getpid()
+        path = os.path.join(directory, f"pexipay_metrics_{os.getpid()}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".pexipay_metrics_")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def start_directory_writer(self, directory: str, interval: float = 10.0) -> None:
+        """
+        Periodically write metrics to a multiprocess directory
+
+        Intended for pre-fork servers such as gunicorn: every worker writes its own file
+        and one process serves ``render_directory(directory)``. The file is also written
+        at interpreter exit.
+        """
+        if self._writer is not None and self._writer.is_alive():
+            return
+        self._writer_stop.clear()
+        self._start_writer_thread(directory, interval)
+        atexit.register(self.write_to_directory, directory)
+
+    def _start_writer_thread(self, directory: str, interval: float) -> None:
+        stop = self._writer_stop
+
+        def run() -> None:
+            while not stop.wait(interval):
+                self.write_to_directory(directory)
+
+        self._writer_options = (directory, interval)
+        self._writer = threading.Thread(target=run, name="pexipay-metrics-writer", daemon=True)
+        self._writer.start()
+
+    def stop_directory_writer(self) -> None:
+        """Stop the periodic writer started by start_directory_writer()"""
+        self._writer_stop.set()
+
+
+def _merge(
+    target: _Shard, values: Dict[SeriesKey, float], histograms: Dict[SeriesKey, List[float]]
+) -> None:
+    for key, value in values.items():
+        target.values[key] = target.values.get(key, 0.0) + value
+    for key, series in histograms.items():
+        existing = target.histograms.get(key)
+        if existing is None:
+            target.histograms[key] = list(series)
+        else:
+            for i, value in enumerate(series):
+                existing[i] += value
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def render_directory(directory: str) -> str:
+    """Merge the metrics files written by every process in a directory"""
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(directory, "pexipay_metrics_*.json"))):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(int(snapshot.get("pid", 0))):
+            # Counters of exited workers are kept; their gauges no longer apply
+            snapshot["values"] = [
+                v for v in snapshot["values"] if METRICS.get(v[0], ("",))[0] != "gauge"
+            ]
+        snapshots.append(snapshot)
+    return render_snapshots(snapshots)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Iterable[str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [tuple(pair) for pair in labels]
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_snapshots(snapshots: List[Dict[str, Any]]) -> str:
+    """Render one or more collector snapshots, summed, in the OpenMetrics text format"""
+    merged = _Shard(None)
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    for snapshot in snapshots:
+        buckets = tuple(snapshot.get("buckets", buckets))
+        values = {(n, tuple(map(tuple, l))): v for n, l, v in snapshot["values"]}
+        histograms = {(n, tuple(map(tuple, l))): s for n, l, s in snapshot["histograms"]}
+        _merge(merged, values, histograms)  # type: ignore[arg-type]
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+        if kind == "histogram":
+            for (series_name, labels), series in sorted(merged.histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0.0
+                for bound, count in zip(buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, ('le', le))} "
+                        f"{_format_value(cumulative)}"
+                    )
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+        else:
+            suffix = "_total" if kind == "counter" else ""
+            for (series_name, labels), value in sorted(merged.values.items()):
+                if series_name == name:
+                    lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,416 @@
+"""Durable outbox for mutating calls that fail while the API is unavailable"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from . import _fork
+from ._rate_limit import TokenBucket
+from .errors import CircuitOpenError, NetworkError, PexipayError, RateLimitError
+from .hooks import RequestEvent
+from .retry import IDEMPOTENCY_HEADER, RetryPolicy
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Replays are single attempts; the drainer does its own backoff between them
+_REPLAY_POLICY = RetryPolicy(max_retries=0, deadline=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    route TEXT,
+    params TEXT,
+    data TEXT,
+    headers TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+)
+"""
+
+
+def is_outage(error: PexipayError) -> bool:
+    """Whether an error means the API could not process the request at all"""
+    if isinstance(error, (NetworkError, CircuitOpenError)):
+        return True
+    return error.status_code is not None and error.status_code >= 500
+
+
+@dataclass
+class OutboxEntry:
+    """A stored request waiting to be replayed"""
+
+    id: int
+    method: str
+    endpoint: str
+    route: Optional[str]
+    params: Optional[Dict[str, Any]]
+    data: Optional[Dict[str, Any]]
+    headers: Dict[str, str]
+    """Headers passed to the original call, including the idempotency key"""
+    idempotency_key: str
+    created_at: float
+    """Epoch seconds when the request was queued"""
+    attempts: int = 0
+    """Replays tried so far"""
+    failed: bool = False
+    """Whether the API rejected a replay; failed entries are kept but not replayed"""
+    last_error: Optional[str] = None
+
+
+DeliveredCallback = Callable[[OutboxEntry, Dict[str, Any]], None]
+FailedCallback = Callable[[OutboxEntry, PexipayError], None]
+
+
+class Outbox:
+    """
+    Stores mutating requests that failed because the API was unavailable, and replays them
+
+    When a client has an outbox, a POST, PUT, PATCH or DELETE that fails with a network
+    error, a timeout, an open circuit or a 5xx response, after the client's own retries,
+    is written to an SQLite file together with its idempotency key, and the call raises
+    ``RequestQueuedError``. The write is committed before the error is raised, so a
+    queued request survives a crash. API keys are not stored.
+
+    A background drainer replays queued requests oldest first, at most ``rate`` per
+    second without bursts, so the API is not flooded when it comes back. While replays
+    keep failing it backs off from ``min_backoff`` to ``max_backoff`` seconds, sending a
+    single request per attempt. A successful response to any other call of the client
+    ends the backoff early. Each replay carries the original idempotency key, so a
+    request that reached the API before the outage takes effect once.
+
+    A replay the API rejects (a 4xx other than 429) is kept as failed and passed to the
+    ``on_failed`` callbacks instead of being retried. Any other error while replaying,
+    such as a database error, is logged and backed off from like an outage, so the
+    drainer keeps running. Exceptions raised by callbacks are logged and ignored.
+    """
+
+    def __init__(
+        self,
+        path: str = "pexipay-outbox.sqlite3",
+        rate: float = 10.0,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        """
+        Initialize the outbox
+
+        Args:
+            path: SQLite file holding queued requests (``":memory:"`` for a
+                non-durable outbox, e.g. in tests)
+            rate: Most replays per second
+            min_backoff: Wait after the first failed replay, in seconds
+            max_backoff: Longest wait between replays while the API is unavailable
+        """
+        self.path = path
+        self.rate = rate
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stats = {"queued": 0, "delivered": 0, "failed": 0, "replays": 0}
+        self._bucket = TokenBucket(rate, capacity=1.0)
+        self._backoff = 0.0
+        self._resume_at = 0.0
+        self._client: Optional["PexipayClient"] = None
+        self._delivered_callbacks: List[DeliveredCallback] = []
+        self._failed_callbacks: List[FailedCallback] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._replaying = threading.local()
+        self._db = self._connect()
+        _fork.register(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+        db.execute(_SCHEMA)
+        return db
+
+    def _after_fork(self) -> None:
+        # SQLite connections must not cross a fork. The drainer is not restarted until
+        # the child queues a request itself, so a pre-fork server does not drain per worker.
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._replaying = threading.local()
+        # An in-memory outbox starts empty in the child; the parent keeps its entries
+        self._db = self._connect()
+
+    def on_delivered(self, callback: DeliveredCallback) -> DeliveredCallback:
+        """Register a callback invoked with each replayed entry and its response"""
+        self._delivered_callbacks.append(callback)
+        return callback
+
+    def on_failed(self, callback: FailedCallback) -> FailedCallback:
+        """Register a callback invoked with each entry the API rejected and the error"""
+        self._failed_callbacks.append(callback)
+        return callback
+
+    # Queue
+
+    def covers(self, method: str) -> bool:
+        """Whether calls with this HTTP method may be queued"""
+        return method in OUTBOX_METHODS
+
+    def accepts(self, method: str, error: PexipayError) -> bool:
+        """Whether a call that failed with ``error`` should be queued"""
+        if getattr(self._replaying, "active", False):
+            # A failed replay stays where it is rather than being queued again
+            return False
+        return method in OUTBOX_METHODS and is_outage(error)
+
+    def add(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+        route: Optional[str] = None,
+    ) -> OutboxEntry:
+        """Queue a request; ``headers`` must hold its idempotency key"""
+        key = headers[IDEMPOTENCY_HEADER]
+        created_at = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (method, endpoint, route, params, data, headers,"
+                " idempotency_key, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    method,
+                    endpoint,
+                    route,
+                    None if params is None else json.dumps(params),
+                    None if data is None else json.dumps(data),
+                    json.dumps(headers),
+                    key,
+                    created_at,
+                ),
+            )
+            self.stats["queued"] += 1
+        entry_id = cursor.lastrowid
+        assert entry_id is not None
+        self._ensure_drainer()
+        self._wakeup.set()
+        return OutboxEntry(
+            entry_id, method, endpoint, route, params, data, headers, key, created_at
+        )
+
+    def pending(self) -> List[OutboxEntry]:
+        """Entries waiting to be replayed, oldest first"""
+        return self._select("WHERE failed = 0 ORDER BY id")
+
+    def failed(self) -> List[OutboxEntry]:
+        """Entries the API rejected on replay"""
+        return self._select("WHERE failed = 1 ORDER BY id")
+
+    def retry_failed(self) -> int:
+        """Queue failed entries for replay again; returns how many"""
+        with self._lock:
+            count = self._db.execute("UPDATE outbox SET failed = 0 WHERE failed = 1").rowcount
+        if count:
+            self._ensure_drainer()
+            self._wakeup.set()
+        return count
+
+    def discard(self, entry_id: int) -> None:
+        """Remove an entry without replaying it"""
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()
+        return int(row[0])
+
+    def _select(self, clause: str, *args: Any) -> List[OutboxEntry]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, method, endpoint, route, params, data, headers, idempotency_key,"
+                f" created_at, attempts, failed, last_error FROM outbox {clause}",
+                args,
+            ).fetchall()
+        return [
+            OutboxEntry(
+                row[0],
+                row[1],
+                row[2],
+                row[3],
+                None if row[4] is None else json.loads(row[4]),
+                None if row[5] is None else json.loads(row[5]),
+                json.loads(row[6]),
+                row[7],
+                row[8],
+                row[9],
+                bool(row[10]),
+                row[11],
+            )
+            for row in rows
+        ]
+
+    # Draining
+
+    def attach(self, client: "PexipayClient") -> None:
+        """
+        Replay through ``client`` (called by the client that owns the outbox)
+
+        Entries left over from an earlier process start draining right away.
+        """
+        if self._client is None:
+            self._client = client
+        if len(self):
+            self._ensure_drainer()
+
+    def _ensure_drainer(self) -> None:
+        if self._client is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="pexipay-outbox-drainer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background drainer; queued entries stay in the file"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                self._wakeup.clear()
+                self._wakeup.wait(wait)
+                continue
+            self._wakeup.clear()
+            try:
+                drained = self.drain()
+            except Exception as e:
+                logger.exception("Outbox drain failed")
+                self._back_off(e)
+                continue
+            if not drained:
+                if self._resume_at <= time.monotonic():
+                    # Nothing due: sleep until a request is queued or the API recovers
+                    self._wakeup.wait()
+
+    def drain(self, limit: Optional[int] = None) -> int:
+        """
+        Replay queued entries now, oldest first, at the outbox's rate
+
+        Stops early when the API is still unavailable. Returns the number delivered.
+        """
+        client = self._client
+        if client is None:
+            raise RuntimeError("Outbox is not attached to a client")
+        delivered = 0
+        self._replaying.active = True
+        try:
+            while limit is None or delivered < limit:
+                if self._stop.is_set() or self._resume_at > time.monotonic():
+                    break
+                entries = self._select("WHERE failed = 0 ORDER BY id LIMIT 1")
+                if not entries:
+                    break
+                self._bucket.acquire()
+                if not self._replay(client, entries[0]):
+                    break
+                delivered += 1
+        finally:
+            self._replaying.active = False
+        return delivered
+
+    def _replay(self, client: "PexipayClient", entry: OutboxEntry) -> bool:
+        self.stats["replays"] += 1
+        try:
+            response = client.request(
+                entry.method,
+                entry.endpoint,
+                params=entry.params,
+                data=entry.data,
+                headers=entry.headers,
+                retry=_REPLAY_POLICY,
+                route=entry.route,
+            )
+        except PexipayError as error:
+            entry.attempts += 1
+            entry.last_error = str(error)
+            if is_outage(error) or isinstance(error, RateLimitError):
+                self._back_off(error)
+                self._record_attempt(entry, failed=False)
+                return False
+            entry.failed = True
+            self._record_attempt(entry, failed=True)
+            self.stats["failed"] += 1
+            for failed_callback in self._failed_callbacks:
+                self._notify(failed_callback, entry, error)
+            # The API answered, so it is healthy; carry on with the next entry
+            return True
+        except Exception as e:
+            # Not an API answer (a raising hook, a transport bug): keep the entry and retry
+            logger.exception("Outbox replay of entry %s failed", entry.id)
+            entry.attempts += 1
+            entry.last_error = repr(e)
+            self._back_off(e)
+            self._record_attempt(entry, failed=False)
+            return False
+        self._backoff = 0.0
+        self.discard(entry.id)
+        self.stats["delivered"] += 1
+        for callback in self._delivered_callbacks:
+            self._notify(callback, entry, response)
+        return True
+
+    def _notify(self, callback: Callable[..., None], *args: Any) -> None:
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Outbox callback %r failed", callback)
+
+    def _record_attempt(self, entry: OutboxEntry, failed: bool) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET attempts = ?, failed = ?, last_error = ? WHERE id = ?",
+                (entry.attempts, int(failed), entry.last_error, entry.id),
+            )
+
+    def _back_off(self, error: Exception) -> None:
+        delay = min(self.max_backoff, max(self.min_backoff, self._backoff * 2))
+        if isinstance(error, RateLimitError) and error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        elif isinstance(error, CircuitOpenError):
+            delay = max(delay, error.retry_in)
+        self._backoff = delay
+        self._resume_at = time.monotonic() + delay
+
+    # Hooks (registered by the client)
+
+    def after_response(self, event: RequestEvent) -> None:
+        # Any other call getting through means the API is back; stop waiting
+        status = event.status_code
+        if self._resume_at and status is not None and status < 500 and status != 429:
+            if not getattr(self._replaying, "active", False):
+                self._resume_at = 0.0
+                self._wakeup.set()
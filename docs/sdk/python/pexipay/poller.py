@@ -0,0 +1,346 @@
+"""Adaptive payment status poller"""
+
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import _fork
+from ._timestamps import format_timestamp, parse_timestamp
+from .errors import PexipayError
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+
+TERMINAL_STATUSES = frozenset({"succeeded", "failed", "canceled"})
+SCAN_STATUSES = ("processing", "requires_action", "succeeded", "failed", "canceled")
+
+
+@dataclass
+class StatusChange:
+    """A status transition observed by the poller"""
+
+    payment_id: str
+    previous_status: Optional[str]
+    status: str
+    payment: Dict[str, Any]
+
+
+StatusCallback = Callable[[StatusChange], None]
+ErrorCallback = Callable[[Optional[str], PexipayError], None]
+
+
+class _TrackedPayment:
+    __slots__ = ("payment_id", "status", "created_at", "tracked_at", "next_due", "generation")
+
+    def __init__(
+        self, payment_id: str, status: Optional[str], created_at: Optional[float], now: float
+    ):
+        self.payment_id = payment_id
+        self.status = status
+        self.created_at = created_at
+        self.tracked_at = now
+        self.next_due = now
+        self.generation = 0
+
+
+class PaymentStatusPoller:
+    """
+    Track many in-flight payments and report status changes
+
+    Each payment is polled on its own interval, which starts at ``min_interval`` and grows
+    with the payment's age up to ``max_interval``. When a batch of payments falls due, the
+    poller compares the cost of retrieving each one against a paged ``payments.list`` scan
+    by status and creation time, and uses whichever needs fewer requests. A scan never
+    sends more requests than the retrieves it replaces; one that runs out of that budget,
+    such as the first scan before the density of payments is known, stops and the
+    payments it did not see are retrieved.
+    """
+
+    def __init__(
+        self,
+        client: "PexipayClient",
+        min_interval: float = 2.0,
+        max_interval: float = 300.0,
+        age_factor: float = 0.1,
+        page_size: int = 100,
+        scan_statuses: Iterable[str] = SCAN_STATUSES,
+        terminal_statuses: Iterable[str] = TERMINAL_STATUSES,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the poller
+
+        Args:
+            client: Pexipay client used for retrieve and list calls
+            min_interval: Polling interval in seconds for newly created payments
+            max_interval: Upper bound for the polling interval in seconds
+            age_factor: Fraction of a payment's age used as its polling interval
+            page_size: Page size for list scans
+            scan_statuses: Statuses covered by list scans (should include every
+                status a pending payment can move to)
+            terminal_statuses: Statuses after which a payment stops being tracked
+            clock: Time source returning epoch seconds
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.age_factor = age_factor
+        self.page_size = page_size
+        self.scan_statuses = tuple(scan_statuses)
+        self.terminal_statuses = frozenset(terminal_statuses)
+        self.clock = clock
+
+        self._tracked: Dict[str, _TrackedPayment] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._lock = threading.RLock()
+        self._callbacks: List[StatusCallback] = []
+        self._error_callbacks: List[ErrorCallback] = []
+        # Observed density of scanned payments per second of creation time
+        self._scan_rate: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {"requests": 0, "retrieves": 0, "scans": 0, "changes": 0}
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # A background thread started in the parent is not copied into the child, and is
+        # not restarted so a pre-fork server does not poll once per worker
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_change(self, callback: StatusCallback) -> StatusCallback:
+        """Register a callback invoked with a StatusChange for every transition"""
+        self._callbacks.append(callback)
+        return callback
+
+    def on_error(self, callback: ErrorCallback) -> ErrorCallback:
+        """Register a callback invoked when a retrieve or scan fails"""
+        self._error_callbacks.append(callback)
+        return callback
+
+    def track(
+        self,
+        payment_id: str,
+        status: Optional[str] = None,
+        created_at: Any = None,
+    ) -> None:
+        """
+        Start tracking a payment
+
+        Args:
+            payment_id: Payment ID
+            status: Last known status, if any
+            created_at: Payment creation time (ISO 8601 string or epoch seconds).
+                Payments without a creation time are retrieved once to learn it.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._tracked.get(payment_id)
+            if entry is None:
+                entry = _TrackedPayment(payment_id, status, parse_timestamp(created_at), now)
+                self._tracked[payment_id] = entry
+            else:
+                entry.status = status or entry.status
+                entry.created_at = parse_timestamp(created_at) or entry.created_at
+            self._schedule_entry(entry, now)
+
+    def track_payment(self, payment: Dict[str, Any]) -> None:
+        """Start tracking a payment object returned by the API"""
+        self.track(payment["id"], payment.get("status"), payment.get("createdAt"))
+
+    def untrack(self, payment_id: str) -> None:
+        """Stop tracking a payment"""
+        with self._lock:
+            self._tracked.pop(payment_id, None)
+
+    def __len__(self) -> int:
+        return len(self._tracked)
+
+    def __contains__(self, payment_id: object) -> bool:
+        return payment_id in self._tracked
+
+    def interval_for(self, entry_created_at: Optional[float], now: float) -> float:
+        """Polling interval for a payment created at the given time"""
+        if entry_created_at is None:
+            return self.min_interval
+        age = max(0.0, now - entry_created_at)
+        return min(self.max_interval, max(self.min_interval, age * self.age_factor))
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next payment falls due, or None when nothing is tracked"""
+        with self._lock:
+            while self._schedule:
+                due, generation, payment_id = self._schedule[0]
+                entry = self._tracked.get(payment_id)
+                if entry is not None and entry.generation == generation:
+                    return max(0.0, due - self.clock())
+                heapq.heappop(self._schedule)
+        return None
+
+    def poll_once(self) -> List[StatusChange]:
+        """Poll every payment that is due and return the changes observed"""
+        now = self.clock()
+        due = self._pop_due(now)
+        if not due:
+            return []
+
+        # Payments with an unknown creation time cannot be bounded by a scan
+        scannable = [entry for entry in due if entry.created_at is not None]
+        unscannable = [entry for entry in due if entry.created_at is None]
+
+        changes: List[StatusChange] = []
+        if scannable:
+            oldest = min(entry.created_at for entry in scannable if entry.created_at is not None)
+            budget = len(scannable) - 1
+            if self._estimate_scan_cost(oldest, now) <= budget:
+                complete, seen = self._scan(oldest, changes, budget)
+                if not complete:
+                    unscannable.extend(e for e in scannable if e.payment_id not in seen)
+            else:
+                unscannable.extend(scannable)
+
+        for entry in unscannable:
+            self._retrieve(entry, changes)
+
+        now = self.clock()
+        with self._lock:
+            for entry in due:
+                if self._tracked.get(entry.payment_id) is entry:
+                    self._schedule_entry(entry, now)
+
+        for change in changes:
+            for callback in self._callbacks:
+                callback(change)
+        return changes
+
+    def run(self, stop_event: Optional[threading.Event] = None, idle_wait: float = 1.0) -> None:
+        """Poll in a loop until the stop event is set"""
+        stop = stop_event or self._stop
+        while not stop.is_set():
+            self.poll_once()
+            wait = self.next_due_in()
+            stop.wait(idle_wait if wait is None else min(wait, idle_wait))
+
+    def start(self) -> None:
+        """Run the poller in a background daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="pexipay-status-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread started by start()"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _schedule_entry(self, entry: _TrackedPayment, now: float) -> None:
+        entry.generation += 1
+        entry.next_due = now + self.interval_for(entry.created_at, now)
+        heapq.heappush(self._schedule, (entry.next_due, entry.generation, entry.payment_id))
+
+    def _pop_due(self, now: float) -> List[_TrackedPayment]:
+        due = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                _, generation, payment_id = heapq.heappop(self._schedule)
+                entry = self._tracked.get(payment_id)
+                # Skip heap entries superseded by a later reschedule or untrack
+                if entry is not None and entry.generation == generation:
+                    due.append(entry)
+        return due
+
+    def _estimate_scan_cost(self, created_after: float, now: float) -> float:
+        """Estimated number of list requests needed to scan every status since a time"""
+        statuses = len(self.scan_statuses)
+        if self._scan_rate is None:
+            return statuses
+        window = max(0.0, now - created_after)
+        return statuses + math.ceil(self._scan_rate * window / self.page_size)
+
+    def _scan(
+        self, created_after: float, changes: List[StatusChange], max_requests: int
+    ) -> Tuple[bool, Set[str]]:
+        """
+        List payments of every scanned status created since a time, in at most
+        ``max_requests`` requests
+
+        Returns whether the scan covered every status, and the IDs of the payments seen.
+        """
+        started = self.clock()
+        seen: Set[str] = set()
+        sent = 0
+        try:
+            for status in self.scan_statuses:
+                starting_after = None
+                while True:
+                    if sent == max_requests:
+                        # Too many payments to beat retrieves; the rate is at least one
+                        # more page than this
+                        window = max(1.0, started - created_after)
+                        self._scan_rate = (len(seen) + self.page_size) / window
+                        return False, seen
+                    sent += 1
+                    page = self.client.payments.list(
+                        limit=self.page_size,
+                        starting_after=starting_after,
+                        status=status,
+                        created_after=format_timestamp(created_after),
+                    )
+                    self.stats["requests"] += 1
+                    items = page.get("data") or []
+                    for payment in items:
+                        seen.add(payment.get("id"))
+                        self._apply(payment, changes)
+                    if not page.get("hasMore") or not items:
+                        break
+                    starting_after = items[-1]["id"]
+        except PexipayError as e:
+            self._report_error(None, e)
+            return False, seen
+
+        self.stats["scans"] += 1
+        window = max(1.0, started - created_after)
+        self._scan_rate = len(seen) / window
+        return True, seen
+
+    def _retrieve(self, entry: _TrackedPayment, changes: List[StatusChange]) -> None:
+        try:
+            payment = self.client.payments.retrieve(entry.payment_id)
+        except PexipayError as e:
+            self._report_error(entry.payment_id, e)
+            return
+        finally:
+            self.stats["requests"] += 1
+            self.stats["retrieves"] += 1
+        if entry.created_at is None:
+            entry.created_at = parse_timestamp(payment.get("createdAt")) or entry.tracked_at
+        self._apply(payment, changes)
+
+    def _apply(self, payment: Dict[str, Any], changes: List[StatusChange]) -> None:
+        payment_id = payment.get("id")
+        status = payment.get("status")
+        if payment_id is None or status is None:
+            return
+        with self._lock:
+            entry = self._tracked.get(payment_id)
+            if entry is None or entry.status == status:
+                return
+            previous = entry.status
+            entry.status = status
+            if status in self.terminal_statuses:
+                del self._tracked[payment_id]
+        self.stats["changes"] += 1
+        changes.append(StatusChange(payment_id, previous, status, payment))
+
+    def _report_error(self, payment_id: Optional[str], error: PexipayError) -> None:
+        for callback in self._error_callbacks:
+            callback(payment_id, error)
@@ -0,0 +1,124 @@
+"""
+Fan SDK calls out across worker processes, each with one long-lived client
+
+Usage:
+    from pexipay.process_pool import ClientProcessPool
+
+    with ClientProcessPool(api_key="sk_live_...", max_workers=8) as pool:
+        payments = list(pool.map("payments.retrieve", payment_ids))
+"""
+
+import functools
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+# A client method path such as "payments.retrieve", or a picklable function called with
+# the worker's client as its first argument
+Task = Union[str, Callable[..., Any]]
+
+# The client of the current worker process
+_client: "Optional[PexipayClient]" = None
+
+
+def _init_worker(
+    client_factory: "Optional[Callable[[], PexipayClient]]",
+    client_options: Any,
+    warmup: int,
+) -> None:
+    global _client
+    if client_factory is not None:
+        _client = client_factory()
+    else:
+        from .client import PexipayClient
+
+        _client = PexipayClient(**client_options)
+    if warmup:
+        try:
+            _client.warmup(warmup)
+        except Exception:
+            # Best effort: the first request connects if warming up failed
+            pass
+
+
+def worker_client() -> "PexipayClient":
+    """The client of the current worker (only valid inside a ClientProcessPool task)"""
+    if _client is None:
+        raise RuntimeError("worker_client() called outside a ClientProcessPool worker")
+    return _client
+
+
+def _run(task: Task, *args: Any, **kwargs: Any) -> Any:
+    client = worker_client()
+    if isinstance(task, str):
+        method: Any = functools.reduce(getattr, task.split("."), client)
+        return method(*args, **kwargs)
+    return task(client, *args, **kwargs)
+
+
+class ClientProcessPool:
+    """
+    Process pool whose workers each build one client at startup and reuse it
+
+    Every worker keeps its own connection pool warm across tasks, so CPU-heavy work
+    around SDK calls (parsing, reconciliation, report generation) spreads over all cores
+    without reconnecting for every call. Tasks are either a client method path, called
+    with the task arguments, or a picklable module-level function called with the
+    worker's client first. Results must be picklable too.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        client_factory: "Optional[Callable[[], PexipayClient]]" = None,
+        warmup: int = 1,
+        mp_context: Any = None,
+        **client_options: Any,
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            api_key: API key for the worker clients
+            max_workers: Number of worker processes (default: number of CPUs)
+            client_factory: Picklable callable returning a client, for clients that
+                need a custom transport or hooks (replaces api_key and client_options)
+            warmup: Connections each worker opens at startup (0 to connect lazily)
+            mp_context: multiprocessing context, e.g. multiprocessing.get_context("spawn")
+            client_options: Other PexipayClient arguments
+        """
+        if client_factory is None:
+            if not api_key:
+                raise ValueError("api_key or client_factory is required")
+            client_options["api_key"] = api_key
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(client_factory, client_options, warmup),
+        )
+
+    def submit(self, task: Task, *args: Any, **kwargs: Any) -> "Future[Any]":
+        """Schedule a task in a worker, e.g. ``pool.submit("payments.retrieve", id)``"""
+        return self._executor.submit(_run, task, *args, **kwargs)
+
+    def map(self, task: Task, items: Iterable[Any], chunksize: int = 1) -> Iterator[Any]:
+        """
+        Run a task for every item and yield the results in order
+
+        Larger chunks cut inter-process overhead when there are many quick calls.
+        """
+        return self._executor.map(functools.partial(_run, task), items, chunksize=chunksize)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers once pending tasks have finished"""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ClientProcessPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
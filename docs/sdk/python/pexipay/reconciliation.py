@@ -0,0 +1,320 @@
+"""Reconciliation of payments and refunds against balance transactions"""
+
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ._timestamps import format_timestamp, parse_timestamp
+from .errors import PexipayError
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+Record = Dict[str, Any]
+
+# Balance transaction fields that may hold the ID of the payment or refund behind it
+REFERENCE_FIELDS = ("sourceId", "source", "reference", "paymentId", "refundId")
+
+# Statuses whose money moved, so they must have a balance transaction
+SETTLED_PAYMENT_STATUSES = frozenset({"succeeded", "refunded"})
+SETTLED_REFUND_STATUSES = frozenset({"succeeded"})
+
+# ID prefix -> client resource holding records with that prefix
+_ID_PREFIXES = {"pay_": "payments", "re_": "refunds"}
+
+# Index entries are [amount, status, ledger amount, ledger entries, X], where X is the
+# refunded amount for payments and the payment ID for refunds
+_LEDGER, _ENTRIES, _REFUNDED = 2, 3, 4
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    """One discrepancy found by reconciliation; amounts are in minor units (cents)"""
+
+    kind: str
+    """
+    missing_balance_entry, duplicate_balance_entry, unexpected_balance_entry,
+    amount_mismatch, missing_refund, over_refunded, orphaned_refund or
+    orphaned_balance_entry
+    """
+    record_type: str
+    """payment, refund or balance_transaction"""
+    record_id: str
+    expected: Optional[int] = None
+    actual: Optional[int] = None
+    related_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "record_type": self.record_type,
+            "record_id": self.record_id,
+            "expected": self.expected,
+            "actual": self.actual,
+            "related_id": self.related_id,
+        }
+
+
+@dataclass
+class ReconciliationStats:
+    """Counts from a reconciliation run"""
+
+    payments: int = 0
+    refunds: int = 0
+    balance_transactions: int = 0
+    matched: int = 0
+    mismatches: Dict[str, int] = field(default_factory=dict)
+
+
+def _cents(value: Any) -> int:
+    try:
+        return int(round(float(value) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+class Reconciler:
+    """
+    Joins payments, refunds and balance transactions in one pass over each source
+
+    Payments and refunds are indexed by ID as compact lists of integers and strings, and
+    the records themselves are dropped once indexed. Balance transactions are then
+    matched through their reference field in a single pass, and the indexes are walked
+    once to report what never matched. Every lookup is a hash lookup, so the whole run
+    is linear in the number of records.
+
+    Memory is not bounded: the indexes hold every payment and refund of the period until
+    the run ends, roughly 250 bytes each (about 250 MB per million). Balance
+    transactions are streamed and not kept. Split a large period into shorter ones to
+    reconcile it in less memory.
+
+    Sources can be any iterables of API records (for example exported files); use
+    ``from_client()`` to stream them from the API.
+    """
+
+    def __init__(
+        self,
+        payments: Iterable[Record],
+        refunds: Iterable[Record],
+        balance_transactions: Iterable[Record],
+        reference_fields: Tuple[str, ...] = REFERENCE_FIELDS,
+        resolve: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initialize the reconciler
+
+        Args:
+            payments: Payment records of the period
+            refunds: Refund records of the period
+            balance_transactions: Balance transactions that may reference them
+            reference_fields: Balance transaction fields holding the payment or refund ID
+            resolve: Called with an unmatched reference; return True when the record
+                exists outside the period so it is not reported as orphaned
+        """
+        self._payments = payments
+        self._refunds = refunds
+        self._balance_transactions = balance_transactions
+        self.reference_fields = reference_fields
+        self._resolve = resolve
+        self.stats = ReconciliationStats()
+
+    @classmethod
+    def from_client(
+        cls,
+        client: "PexipayClient",
+        created_after: Union[float, str, None] = None,
+        created_before: Union[float, str, None] = None,
+        settlement_lag: float = 3 * 86400,
+        page_size: int = 100,
+        resolve_orphans: bool = True,
+    ) -> "Reconciler":
+        """
+        Reconcile a period straight from the API
+
+        Balance transactions have no time filter. They are read newest first, those
+        created more than ``settlement_lag`` seconds after the period are skipped, and
+        reading stops at the start of the period.
+
+        Args:
+            client: Client to stream the records with
+            created_after: Start of the period (epoch seconds or ISO 8601)
+            created_before: End of the period (epoch seconds or ISO 8601)
+            settlement_lag: How long after a payment its balance transaction may post
+            page_size: Records per list request
+            resolve_orphans: Retrieve unmatched references, so balance entries of
+                payments and refunds from other periods are not reported
+        """
+        start = parse_timestamp(created_after)
+        end = parse_timestamp(created_before)
+        period: Dict[str, Any] = {
+            "created_after": _iso(start),
+            "created_before": _iso(end),
+            "page_size": page_size,
+        }
+
+        def balance_transactions() -> Iterator[Record]:
+            cutoff = None if end is None else end + settlement_lag
+            for entry in client.balance.list_all_transactions(page_size=page_size):
+                created = parse_timestamp(entry.get("createdAt"))
+                if created is not None:
+                    if start is not None and created < start:
+                        return
+                    if cutoff is not None and created >= cutoff:
+                        continue
+                yield entry
+
+        def resolve(reference: str) -> bool:
+            # One retrieve when the prefix names the resource; unprefixed IDs try both
+            names = [name for prefix, name in _ID_PREFIXES.items() if reference.startswith(prefix)]
+            for name in names or _ID_PREFIXES.values():
+                try:
+                    getattr(client, name).retrieve(reference)
+                    return True
+                except PexipayError as error:
+                    # A missing record is a 404; anything else must not pass as an orphan
+                    if error.status_code != 404:
+                        raise
+            return False
+
+        return cls(
+            client.payments.list_all(**period),
+            client.refunds.list_all(**period),
+            balance_transactions(),
+            resolve=resolve if resolve_orphans else None,
+        )
+
+    def _reference(self, entry: Record) -> Optional[str]:
+        for name in self.reference_fields:
+            value = entry.get(name)
+            if isinstance(value, dict):
+                value = value.get("id")
+            if value:
+                return str(value)
+        return None
+
+    def run(self) -> Iterator[Mismatch]:
+        """Reconcile, yielding mismatches as they are found; ``stats`` is final afterwards"""
+        stats = self.stats = ReconciliationStats()
+        payments: Dict[str, List[Any]] = {}
+        refunds: Dict[str, List[Any]] = {}
+
+        for payment in self._payments:
+            stats.payments += 1
+            amount = _cents(payment.get("amount"))
+            payments[payment["id"]] = [amount, payment.get("status"), 0, 0, 0]
+
+        for refund in self._refunds:
+            stats.refunds += 1
+            amount = _cents(refund.get("amount"))
+            status = refund.get("status")
+            payment_id = refund.get("paymentId")
+            refunds[refund["id"]] = [amount, status, 0, 0, payment_id]
+            indexed = payments.get(payment_id) if payment_id else None
+            if indexed is not None:
+                if status in SETTLED_REFUND_STATUSES:
+                    indexed[_REFUNDED] += amount
+            elif not payment_id or self._resolve is None or not self._resolve(payment_id):
+                orphan = Mismatch("orphaned_refund", "refund", refund["id"], related_id=payment_id)
+                yield self._found(orphan)
+
+        for entry in self._balance_transactions:
+            stats.balance_transactions += 1
+            reference = self._reference(entry)
+            indexed = None
+            if reference is not None:
+                indexed = payments.get(reference)
+                if indexed is None:
+                    indexed = refunds.get(reference)
+            if indexed is None:
+                if reference is None or self._resolve is None or not self._resolve(reference):
+                    yield self._found(
+                        Mismatch(
+                            "orphaned_balance_entry",
+                            "balance_transaction",
+                            str(entry.get("id")),
+                            None,
+                            _cents(entry.get("amount")),
+                            reference,
+                        )
+                    )
+                continue
+            indexed[_LEDGER] += _cents(entry.get("amount"))
+            indexed[_ENTRIES] += 1
+
+        for payment_id, (amount, status, ledger, entries, refunded) in payments.items():
+            found = _check_payment(payment_id, amount, status, ledger, entries, refunded)
+            if not found:
+                stats.matched += 1
+            for mismatch in found:
+                yield self._found(mismatch)
+
+        for refund_id, (amount, status, ledger, entries, payment_id) in refunds.items():
+            found = _check_refund(refund_id, amount, status, ledger, entries, payment_id)
+            if not found:
+                stats.matched += 1
+            for mismatch in found:
+                yield self._found(mismatch)
+
+    def _found(self, mismatch: Mismatch) -> Mismatch:
+        counts = self.stats.mismatches
+        counts[mismatch.kind] = counts.get(mismatch.kind, 0) + 1
+        return mismatch
+
+
+def _check_ledger(
+    record_type: str,
+    record_id: str,
+    expected: int,
+    ledger: int,
+    entries: int,
+    related_id: Optional[str] = None,
+) -> List[Mismatch]:
+    if not entries:
+        kind = "missing_balance_entry"
+    elif entries > 1:
+        kind = "duplicate_balance_entry"
+    elif ledger != expected:
+        kind = "amount_mismatch"
+    else:
+        return []
+    return [Mismatch(kind, record_type, record_id, expected, ledger, related_id)]
+
+
+def _check_payment(
+    payment_id: str, amount: int, status: Any, ledger: int, entries: int, refunded: int
+) -> List[Mismatch]:
+    found = []
+    if status in SETTLED_PAYMENT_STATUSES:
+        found += _check_ledger("payment", payment_id, amount, ledger, entries)
+        if status == "refunded" and refunded < amount:
+            found.append(Mismatch("missing_refund", "payment", payment_id, amount, refunded))
+    elif entries:
+        found.append(Mismatch("unexpected_balance_entry", "payment", payment_id, 0, ledger))
+    if refunded > amount:
+        found.append(Mismatch("over_refunded", "payment", payment_id, amount, refunded))
+    return found
+
+
+def _check_refund(
+    refund_id: str, amount: int, status: Any, ledger: int, entries: int, payment_id: Any
+) -> List[Mismatch]:
+    if status in SETTLED_REFUND_STATUSES:
+        # Refunds take money out of the balance
+        return _check_ledger("refund", refund_id, -amount, ledger, entries, payment_id)
+    if entries:
+        return [Mismatch("unexpected_balance_entry", "refund", refund_id, 0, ledger, payment_id)]
+    return []
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    return None if epoch is None else format_timestamp(epoch)
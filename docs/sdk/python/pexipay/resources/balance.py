@@ -1,7 +1,10 @@
 """Balance resource"""
 
+from functools import partial
 from typing import TYPE_CHECKING, Optional, Dict, Any
 
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
+
 if TYPE_CHECKING:
     from ..client import PexipayClient
 
@@ -12,8 +15,24 @@ class BalanceResource:
     def __init__(self, client: "PexipayClient"):
         self.client = client
 
-    def retrieve(self) -> Dict[str, Any]:
-        """Retrieve account balance"""
+    def retrieve(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve account balance
+
+        With the client's balance cache enabled this is usually a local lookup; pass
+        ``fresh=True`` to bypass the cache (the result still refreshes it).
+        """
+        cache = self.client.balance_cache
+        if cache is None:
+            return self._fetch()
+        if fresh:
+            return cache.refresh(self._fetch)
+        on_lookup = None
+        if self.client.hooks.has("on_cache_lookup"):
+            on_lookup = partial(self.client.hooks.emit, "on_cache_lookup", "balance")
+        return cache.get(self._fetch, on_lookup)
+
+    def _fetch(self) -> Dict[str, Any]:
         response = self.client.request("GET", "/balance")
         return response.get("data", response)
 
@@ -24,12 +43,29 @@ class BalanceResource:
         ending_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List balance transactions"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/balance/transactions", params=params)
+
+    def list_all_transactions(
+        self,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all balance transactions, resumable (see ListIterator)"""
+        return ListIterator.open(
+            self.list_transactions,
+            "balance.list_transactions",
+            {},
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
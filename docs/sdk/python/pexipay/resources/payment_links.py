@@ -2,6 +2,9 @@
 
 from typing import TYPE_CHECKING, Optional, Dict, Any
 
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
+from ..retry import IDEMPOTENCY_HEADER
+
 if TYPE_CHECKING:
     from ..client import PexipayClient
 
@@ -23,28 +26,39 @@ class PaymentLinksResource:
         webhook_url: Optional[str] = None,
         expires_at: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Create a new payment link"""
-        data = {
-            "amount": amount,
-            "currency": currency,
-            "description": description,
-            "customerInfo": customer_info,
-            "returnUrl": return_url,
-            "cancelUrl": cancel_url,
-            "webhookUrl": webhook_url,
-            "expiresAt": expires_at,
-            "metadata": metadata,
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        """
+        Create a new payment link
 
-        response = self.client.request("POST", "/payment-links", data=data)
+        Retries of a create with the same ``idempotency_key`` return the original link
+        instead of creating another one (a random key is used when none is given).
+        """
+        data: Dict[str, Any] = {"amount": amount, "currency": currency}
+        if description is not None:
+            data["description"] = description
+        if customer_info is not None:
+            data["customerInfo"] = customer_info
+        if return_url is not None:
+            data["returnUrl"] = return_url
+        if cancel_url is not None:
+            data["cancelUrl"] = cancel_url
+        if webhook_url is not None:
+            data["webhookUrl"] = webhook_url
+        if expires_at is not None:
+            data["expiresAt"] = expires_at
+        if metadata is not None:
+            data["metadata"] = metadata
+
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+        response = self.client.request("POST", "/payment-links", data=data, headers=headers)
         return response.get("data", response)
 
     def retrieve(self, payment_link_id: str) -> Dict[str, Any]:
         """Retrieve a payment link by ID"""
-        response = self.client.request("GET", f"/payment-links/{payment_link_id}")
+        response = self.client.request(
+            "GET", f"/payment-links/{payment_link_id}", route="/payment-links/{id}"
+        )
         return response.get("data", response)
 
     def list(
@@ -57,7 +71,8 @@ class PaymentLinksResource:
         created_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List payment links"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
@@ -65,12 +80,33 @@ class PaymentLinksResource:
             "createdAfter": created_after,
             "createdBefore": created_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/payment-links", params=params)
 
+    def list_all(
+        self,
+        status: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all payment links, resumable from a checkpoint (see ListIterator)"""
+        return ListIterator.open(
+            self.list,
+            "payment_links.list",
+            {"status": status, "created_after": created_after, "created_before": created_before},
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
+
     def cancel(self, payment_link_id: str) -> Dict[str, Any]:
         """Cancel a payment link"""
-        response = self.client.request("POST", f"/payment-links/{payment_link_id}/cancel")
+        response = self.client.request(
+            "POST", f"/payment-links/{payment_link_id}/cancel", route="/payment-links/{id}/cancel"
+        )
         return response.get("data", response)
@@ -1,6 +1,10 @@
 """Payments resource"""
 
-from typing import TYPE_CHECKING, Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Union
+
+from ..feed import ChangeFeed, FeedState
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
+from ..retry import IDEMPOTENCY_HEADER
 
 if TYPE_CHECKING:
     from ..client import PexipayClient
@@ -24,29 +28,39 @@ class PaymentsResource:
         cancel_url: Optional[str] = None,
         webhook_url: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Create a new payment"""
-        data = {
-            "amount": amount,
-            "currency": currency,
-            "description": description,
-            "paymentMethod": payment_method,
-            "customerEmail": customer_email,
-            "customerName": customer_name,
-            "returnUrl": return_url,
-            "cancelUrl": cancel_url,
-            "webhookUrl": webhook_url,
-            "metadata": metadata,
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        """
+        Create a new payment
+
+        Retries of a create with the same ``idempotency_key`` return the original payment
+        instead of creating another one (a random key is used when none is given).
+        """
+        data: Dict[str, Any] = {"amount": amount, "currency": currency}
+        if description is not None:
+            data["description"] = description
+        if payment_method is not None:
+            data["paymentMethod"] = payment_method
+        if customer_email is not None:
+            data["customerEmail"] = customer_email
+        if customer_name is not None:
+            data["customerName"] = customer_name
+        if return_url is not None:
+            data["returnUrl"] = return_url
+        if cancel_url is not None:
+            data["cancelUrl"] = cancel_url
+        if webhook_url is not None:
+            data["webhookUrl"] = webhook_url
+        if metadata is not None:
+            data["metadata"] = metadata
 
-        response = self.client.request("POST", "/payments", data=data)
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+        response = self.client.request("POST", "/payments", data=data, headers=headers)
         return response.get("data", response)
 
     def retrieve(self, payment_id: str) -> Dict[str, Any]:
         """Retrieve a payment by ID"""
-        response = self.client.request("GET", f"/payments/{payment_id}")
+        response = self.client.request("GET", f"/payments/{payment_id}", route="/payments/{id}")
         return response.get("data", response)
 
     def list(
@@ -60,7 +74,8 @@ class PaymentsResource:
         created_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List payments"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
@@ -69,24 +84,81 @@ class PaymentsResource:
             "createdAfter": created_after,
             "createdBefore": created_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/payments", params=params)
 
+    def list_all(
+        self,
+        status: Optional[str] = None,
+        customer_email: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all payments, resumable from a checkpoint (see ListIterator)"""
+        return ListIterator.open(
+            self.list,
+            "payments.list",
+            {
+                "status": status,
+                "customer_email": customer_email,
+                "created_after": created_after,
+                "created_before": created_before,
+            },
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
+
+    def changes(
+        self,
+        status: Optional[str] = None,
+        customer_email: Optional[str] = None,
+        start_at: Union[float, str, None] = None,
+        state: Optional[FeedState] = None,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+    ) -> ChangeFeed:
+        """Feed of newly created payments, each yielded once (see ChangeFeed)"""
+        return ChangeFeed(
+            self.list,
+            "payments.list",
+            {
+                "status": status,
+                "customer_email": customer_email,
+            },
+            start_at=start_at,
+            state=state,
+            min_interval=min_interval,
+            max_interval=max_interval,
+        )
+
     def confirm_3ds(self, payment_id: str, three_ds_result: str) -> Dict[str, Any]:
         """Confirm 3D Secure authentication"""
         data = {"threeDSResult": three_ds_result}
-        response = self.client.request("POST", f"/payments/{payment_id}/3ds/confirm", data=data)
+        response = self.client.request(
+            "POST",
+            f"/payments/{payment_id}/3ds/confirm",
+            data=data,
+            route="/payments/{id}/3ds/confirm",
+        )
         return response.get("data", response)
 
     def cancel(self, payment_id: str) -> Dict[str, Any]:
         """Cancel a payment"""
-        response = self.client.request("POST", f"/payments/{payment_id}/cancel")
+        response = self.client.request(
+            "POST", f"/payments/{payment_id}/cancel", route="/payments/{id}/cancel"
+        )
         return response.get("data", response)
 
     def capture(self, payment_id: str, amount: Optional[float] = None) -> Dict[str, Any]:
         """Capture a payment"""
         data = {"amount": amount} if amount is not None else {}
-        response = self.client.request("POST", f"/payments/{payment_id}/capture", data=data)
+        response = self.client.request(
+            "POST", f"/payments/{payment_id}/capture", data=data, route="/payments/{id}/capture"
+        )
         return response.get("data", response)
@@ -0,0 +1,135 @@
+"""Retry policy with Retry-After support, decorrelated jitter and a deadline budget"""
+
+import os
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, FrozenSet, Mapping, Optional
+
+from .errors import DeadlineExceededError, NetworkError, PexipayError, RateLimitError
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def new_idempotency_key() -> str:
+    """Random (version 4) UUID string, formatted without building a uuid.UUID"""
+    raw = bytearray(os.urandom(16))
+    raw[6] = raw[6] & 0x0F | 0x40
+    raw[8] = raw[8] & 0x3F | 0x80
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def derive_idempotency_key(namespace: str, key: str) -> str:
+    """
+    Idempotency key that is always the same for a namespace and key
+
+    Lets a rerun of a bulk job (namespace: the job, key: the item) send the keys of the
+    first run, so items that already went through are not applied twice.
+    """
+    import hashlib
+
+    h = hashlib.sha256(f"{namespace}\0{key}".encode("utf-8")).hexdigest()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How failed requests are retried
+
+    Attributes:
+        max_retries: Maximum number of retries after the first attempt
+        base_delay: Smallest backoff delay in seconds
+        max_delay: Largest backoff delay in seconds
+        deadline: Total time budget in seconds across all attempts and backoff
+            (None for no budget beyond the per-attempt timeout)
+        max_retry_after: Longest server-requested wait that is honoured; a longer
+            Retry-After fails the request immediately instead
+        retry_status_codes: HTTP statuses that may be retried
+    """
+
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    deadline: Optional[float] = None
+    max_retry_after: float = 60.0
+    retry_status_codes: FrozenSet[int] = RETRYABLE_STATUS_CODES
+
+    def with_options(self, **changes: Any) -> "RetryPolicy":
+        """Copy of this policy with some fields replaced"""
+        return replace(self, **changes)
+
+    def is_retryable(self, method: str, error: PexipayError, idempotent: bool) -> bool:
+        """
+        Classify a failed attempt
+
+        Requests rejected before processing (429, or a connection that was never
+        established) are always safe to retry. Timeouts, dropped connections and 5xx
+        responses are retried only for idempotent requests, i.e. idempotent methods or
+        requests that carry an idempotency key.
+        """
+        if isinstance(error, DeadlineExceededError):
+            return False
+        if isinstance(error, RateLimitError):
+            return True
+        if isinstance(error, NetworkError):
+            return idempotent or not error.request_sent
+        if error.status_code in self.retry_status_codes:
+            return idempotent
+        return False
+
+    def next_delay(self, previous_delay: float, retry_after: Optional[float] = None) -> float:
+        """
+        Backoff before the next attempt
+
+        Uses decorrelated jitter (a random delay between ``base_delay`` and three times the
+        previous delay) so that clients failing together do not retry in lockstep. A
+        server-provided Retry-After is honoured with a small jitter on top.
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, min(1.0, self.base_delay))
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+def parse_retry_after(
+    headers: Mapping[str, str], body: Optional[Mapping[str, Any]] = None
+) -> Optional[float]:
+    """
+    Seconds to wait before retrying, from Retry-After, X-RateLimit-Reset or the error body
+
+    Retry-After may be a number of seconds or an HTTP date. X-RateLimit-Reset is an epoch
+    timestamp (values that are too small to be one are treated as seconds).
+    """
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # HTTP-date form; rare enough not to load the email package at import time
+            from email.utils import parsedate_to_datetime
+
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    value = headers.get("X-RateLimit-Reset")
+    if value:
+        try:
+            reset = float(value)
+        except ValueError:
+            reset = None
+        if reset is not None:
+            if reset > 1e12:
+                reset /= 1000.0
+            return max(0.0, reset - time.time()) if reset > 1e9 else max(0.0, reset)
+
+    if body:
+        value = body.get("retryAfter")
+        if isinstance(value, (int, float)):
+            return max(0.0, float(value))
+    return None
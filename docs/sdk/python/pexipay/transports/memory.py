@@ -0,0 +1,102 @@
+"""In-memory transport for tests and profiling"""
+
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from .base import Headers, Transport, TransportRequest, TransportResponse
+
+Handler = Callable[..., Union[TransportResponse, Dict[str, Any], Tuple[int, Any]]]
+
+
+def json_response(
+    payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> TransportResponse:
+    """Build a JSON TransportResponse"""
+    response_headers = Headers({"Content-Type": "application/json"})
+    if headers:
+        response_headers.update(headers)
+    return TransportResponse(status_code, response_headers, json.dumps(payload).encode("utf-8"))
+
+
+class InMemoryTransport(Transport):
+    """
+    Serves requests from registered Python handlers without touching the network
+
+    Routes are matched by method and a path pattern relative to the API base, where
+    ``{name}`` matches one path segment and is passed to the handler as a keyword
+    argument. Handlers receive the TransportRequest and return a TransportResponse, a JSON
+    payload (status 200) or a ``(status_code, payload)`` tuple. Every request is kept in
+    ``requests`` for assertions.
+    """
+
+    def __init__(self, handler: Optional[Handler] = None, base_path: str = "/v1"):
+        """
+        Initialize the transport
+
+        Args:
+            handler: Fallback handler for requests that match no route
+            base_path: URL path prefix stripped before matching routes
+        """
+        self.base_path = base_path.rstrip("/")
+        self.fallback = handler
+        self.routes: List[Tuple[str, Pattern[str], Handler]] = []
+        self.requests: List[TransportRequest] = []
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, handler: Union[Handler, Any]) -> None:
+        """Register a handler (or a static JSON payload) for a method and path pattern"""
+        pattern = re.compile(
+            "^" + re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(path)) + "$"
+        )
+        if not callable(handler):
+            payload = handler
+            handler = lambda request, **params: payload  # noqa: E731
+        self.routes.append((method.upper(), pattern, handler))
+
+    def route(self, method: str, path: str) -> Callable[[Handler], Handler]:
+        """Decorator form of add()"""
+
+        def decorator(handler: Handler) -> Handler:
+            self.add(method, path, handler)
+            return handler
+
+        return decorator
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        with self._lock:
+            self.requests.append(request)
+        parts = urlsplit(request.url)
+        path = parts.path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path) :]
+
+        handler = self.fallback
+        path_params: Dict[str, str] = {}
+        for method, pattern, route_handler in self.routes:
+            match = pattern.match(path)
+            if method == request.method and match:
+                handler = route_handler
+                path_params = match.groupdict()
+                break
+        if handler is None:
+            return json_response({"error": f"No route for {request.method} {path}"}, 404)
+
+        result = handler(request, **path_params)
+        if isinstance(result, TransportResponse):
+            return result
+        if isinstance(result, tuple):
+            return json_response(result[1], result[0])
+        return json_response(result)
+
+    @staticmethod
+    def query(request: TransportRequest) -> Dict[str, str]:
+        """Decoded query parameters of a request"""
+        return dict(parse_qsl(urlsplit(request.url).query))
+
+    @staticmethod
+    def json_body(request: TransportRequest) -> Any:
+        """Decoded JSON body of a request"""
+        return json.loads(request.body) if request.body else None
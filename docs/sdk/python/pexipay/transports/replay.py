@@ -0,0 +1,139 @@
+"""Record and replay HTTP traffic"""
+
+import base64
+import gzip
+import json
+import threading
+from collections import defaultdict, deque
+from typing import IO, Any, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .base import Headers, Transport, TransportRequest, TransportResponse
+
+# Request headers never written to a cassette
+REDACTED_HEADERS = frozenset({"authorization", "cookie"})
+# Response headers describing the encoded body; cassettes store the decoded body
+_ENCODING_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def _request_key(method: str, url: str, body: Optional[bytes]) -> Tuple[str, str, str]:
+    """Match key that ignores the host and the order of query parameters and JSON keys"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    canonical_body = ""
+    if body:
+        if body[:2] == b"\x1f\x8b":
+            body = gzip.decompress(body)
+        try:
+            canonical_body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            canonical_body = base64.b64encode(body).decode("ascii")
+    return method.upper(), f"{parts.path}?{query}" if query else parts.path, canonical_body
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(entry: Dict[str, Any]) -> bytes:
+    if "body_base64" in entry:
+        return base64.b64decode(entry["body_base64"])
+    return str(entry.get("body", "")).encode("utf-8")
+
+
+class RecordingTransport(Transport):
+    """
+    Wraps another transport and appends every exchange to a JSON Lines cassette
+
+    Authorization and cookie headers are not recorded.
+    """
+
+    def __init__(self, inner: Transport, path: str):
+        self.inner = inner
+        self.path = path
+        self._file: IO[str] = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        response = self.inner.send(request)
+        entry = {
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "headers": {
+                    k: v for k, v in request.headers.items() if k.lower() not in REDACTED_HEADERS
+                },
+                **_encode_body(request.body or b""),
+            },
+            "response": {
+                "status_code": response.status_code,
+                "headers": {
+                    k: v for k, v in response.headers.items() if k.lower() not in _ENCODING_HEADERS
+                },
+                **_encode_body(response.content),
+            },
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Serves responses from a cassette written by RecordingTransport
+
+    Requests are matched on method, path, query and JSON body (ignoring host, header,
+    parameter order and key order). Identical requests are answered in recorded order.
+    Unmatched requests raise LookupError, so a replayed run is fully deterministic.
+    """
+
+    def __init__(self, path: str, repeat_last: bool = False):
+        """
+        Initialize the transport
+
+        Args:
+            path: Cassette file
+            repeat_last: Keep answering with the last recorded response once the
+                recordings for a request are used up, instead of raising
+        """
+        self.repeat_last = repeat_last
+        self._responses: Dict[Tuple[str, str, str], Deque[TransportResponse]] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str, str], TransportResponse] = {}
+        self._lock = threading.Lock()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                recorded = entry["request"]
+                key = _request_key(recorded["method"], recorded["url"], _decode_body(recorded))
+                recorded_response = entry["response"]
+                self._responses[key].append(
+                    TransportResponse(
+                        recorded_response["status_code"],
+                        Headers(recorded_response.get("headers", {})),
+                        _decode_body(recorded_response),
+                    )
+                )
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        key = _request_key(request.method, request.url, request.body)
+        with self._lock:
+            queue = self._responses.get(key)
+            if queue:
+                response = queue.popleft()
+                self._last[key] = response
+                return response
+            if self.repeat_last and key in self._last:
+                return self._last[key]
+        raise LookupError(f"No recorded response for {key[0]} {key[1]}")
@@ -0,0 +1,126 @@
+"""Transport backed by requests.Session"""
+
+import time
+from typing import Optional, Union
+
+import requests
+from urllib3.exceptions import HTTPError, NewConnectionError, ReadTimeoutError
+
+from .. import _fork, _timing
+from ..connections import DNSCache, session_reusing_context
+from ..errors import NetworkError, PexipayError, RequestTimeoutError
+from .base import Transport, TransportRequest, TransportResponse, read_body
+
+CHUNK_SIZE = 65536
+
+
+class RequestsTransport(Transport):
+    """Sends requests through a requests.Session with an instrumented connection pool"""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        dns_cache: Union[bool, DNSCache, None] = None,
+        tls_session_reuse: bool = False,
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            session: Session to use (a new one is created by default)
+            pool_connections: Number of host pools to cache
+            pool_maxsize: Connections kept per host
+            dns_cache: Reuse resolved addresses for new connections (True for a
+                5 minute TTL, or a DNSCache)
+            tls_session_reuse: Resume earlier TLS sessions when opening connections
+        """
+        self.session = session or requests.Session()
+        self.dns_cache: Optional[DNSCache] = None
+        if isinstance(dns_cache, DNSCache):
+            self.dns_cache = dns_cache
+        elif dns_cache:
+            self.dns_cache = DNSCache()
+        self.ssl_context = session_reusing_context() if tls_session_reuse else None
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._mount_adapter()
+        _fork.register(self)
+
+    def _mount_adapter(self) -> None:
+        adapter = _timing.TimedHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            ssl_context=self.ssl_context,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _after_fork(self) -> None:
+        # The parent keeps using the inherited sockets, so the old pools are dropped
+        # without closing their connections
+        self._mount_adapter()
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        timings = request.timings
+        start = time.perf_counter()
+        _timing.activate(timings, self.dns_cache, request.cancel)
+        try:
+            response = self.session.request(
+                method=request.method,
+                url=request.url,
+                data=request.body,
+                headers=request.headers,
+                timeout=request.timeout,
+                stream=True,
+            )
+            headers_received = time.perf_counter()
+            try:
+                # Read undecoded bytes so compressed sizes can be counted
+                content, received = read_body(
+                    response.raw.stream(CHUNK_SIZE, decode_content=False),
+                    response.headers.get("Content-Encoding"),
+                    request,
+                )
+            except (PexipayError, HTTPError):
+                response.close()
+                raise
+        except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                connect = isinstance(e, requests.exceptions.ConnectTimeout)
+                raise RequestTimeoutError(f"Network error: {str(e)}", not connect) from e
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            request_sent = not isinstance(reason, NewConnectionError)
+            raise NetworkError(f"Network error: {str(e)}", request_sent=request_sent) from e
+        except HTTPError as e:
+            # Raised by the raw body stream, which requests does not wrap
+            if isinstance(e, ReadTimeoutError):
+                raise RequestTimeoutError(f"Network error: {str(e)}") from e
+            raise NetworkError(f"Network error: {str(e)}") from e
+        finally:
+            _timing.activate(None)
+
+        timings.ttfb = max(0.0, headers_received - start - timings.queue_wait - timings.connect)
+        timings.body_read = time.perf_counter() - headers_received
+        return TransportResponse(response.status_code, response.headers, content, received)
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        session = self.session
+        adapter = session.get_adapter(url)
+        if not isinstance(adapter, requests.adapters.HTTPAdapter):
+            return 0
+        # Resolve settings and look the pool up the way Session.request() and
+        # HTTPAdapter.send() do, so the warmed pool is the one requests will use
+        settings = session.merge_environment_settings(url, {}, None, None, None)
+        verify, cert, proxies = settings["verify"], settings["cert"], settings["proxies"]
+        get_pool = getattr(adapter, "get_connection_with_tls_context", None)
+        if get_pool is not None:
+            pool = get_pool(requests.Request("GET", url).prepare(), verify, proxies, cert)
+        else:
+            pool = adapter.get_connection(url, proxies)
+        adapter.cert_verify(pool, url, verify, cert)
+        return _timing.warm_pool(pool, connections, self.dns_cache)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,40 @@
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from pexipay import PexipayClient, RetryPolicy
+from pexipay.emulator import EmulatorConfig, EmulatorServer, EmulatorStore
+from pexipay.transports.memory import InMemoryTransport
+
+API_BASE_URL = "http://pexipay.test/v1"
+
+# Retries without real backoff, so retry paths run in milliseconds
+FAST_RETRY = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.001, deadline=5.0)
+
+
+@pytest.fixture
+def transport() -> InMemoryTransport:
+    return InMemoryTransport()
+
+
+@pytest.fixture
+def make_client(transport: InMemoryTransport) -> Iterator[Callable[..., PexipayClient]]:
+    clients = []
+
+    def make(**options: Any) -> PexipayClient:
+        options.setdefault("retry", FAST_RETRY)
+        client = PexipayClient("sk_test", api_base_url=API_BASE_URL, transport=transport, **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        if client.outbox is not None:
+            client.outbox.stop(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def emulator() -> Iterator[EmulatorServer]:
+    store = EmulatorStore(payments=500, customers=50)
+    with EmulatorServer(EmulatorConfig(settle_delay=0.0, seed=1), store) as server:
+        yield server
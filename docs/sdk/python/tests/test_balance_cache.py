@@ -0,0 +1,74 @@
+import threading
+
+from pexipay import BalanceCache
+from pexipay.metrics import MetricsCollector
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cached_balance_is_served_until_max_staleness(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    clock = Clock()
+    cache = BalanceCache(max_staleness=10, refresh_after=10, clock=clock)
+    client = make_client(balance_cache=cache)
+
+    client.balance.retrieve()
+    clock.now = 9.0
+    client.balance.retrieve()
+    assert len(transport.requests) == 1
+
+    clock.now = 10.0
+    client.balance.retrieve()
+    assert len(transport.requests) == 2
+
+
+def test_refunds_invalidate_the_cached_balance(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    transport.add("POST", "/refunds", {"id": "re_1"})
+    client = make_client(balance_cache=True)
+
+    client.balance.retrieve()
+    client.refunds.create("pay_1")
+    client.balance.retrieve()
+    assert [request.method for request in transport.requests] == ["GET", "POST", "GET"]
+
+
+def test_lookups_reach_the_metrics_collector(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    client = make_client(balance_cache=True)
+    metrics = MetricsCollector().instrument(client)
+
+    for _ in range(3):
+        client.balance.retrieve()
+
+    rendered = metrics.render()
+    assert 'pexipay_cache_requests_total{cache="balance",result="hit"} 2' in rendered
+    assert 'pexipay_cache_requests_total{cache="balance",result="miss"} 1' in rendered
+
+
+def test_lookup_hook_may_use_the_cache(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    client = make_client(balance_cache=True)
+    seen = []
+
+    @client.hooks.on_cache_lookup
+    def reentrant(cache, hit):
+        seen.append(hit)
+        if not hit:
+            # Runs after the fetch lock is released, so this is a plain hit
+            seen.append(client.balance_cache.age is not None)
+            client.balance.retrieve()
+
+    thread = threading.Thread(target=client.balance.retrieve, daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert seen == [False, True, True]
+    assert len(transport.requests) == 1
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+
+import pytest
+
+from pexipay import PaymentLinkCampaign, PexipayClient
+from pexipay.campaigns import CsvSink, JsonlSink, LinkResult, _FileSink
+from pexipay.emulator import EmulatorConfig, EmulatorServer, EmulatorStore
+
+from conftest import FAST_RETRY
+
+TEMPLATE = {
+    "amount": 25,
+    "currency": "EUR",
+    "description": "Spring sale for {name}",
+    "metadata": {"campaign": "spring", "greeting": "Hi {name}"},
+}
+
+RECIPIENTS = [
+    {"id": "cus_1", "name": "Ana"},
+    {"id": "cus_2", "name": "Ben", "amount": 40, "metadata": {"tier": "gold"}},
+    {"id": "cus_3", "name": "Cy"},
+]
+
+
+@pytest.fixture
+def emulator():
+    # Campaigns create links, so each test gets an emulator of its own
+    with EmulatorServer(EmulatorConfig(settle_delay=0.0), EmulatorStore(payments=50)) as server:
+        yield server
+
+
+def test_render_formats_the_template_and_merges_overrides(make_client):
+    campaign = PaymentLinkCampaign(make_client(), TEMPLATE, "spring")
+
+    assert campaign.render(RECIPIENTS[1]) == {
+        "amount": 40,
+        "currency": "EUR",
+        "description": "Spring sale for Ben",
+        "metadata": {"campaign": "spring", "greeting": "Hi Ben", "tier": "gold"},
+    }
+
+
+def test_unknown_template_fields_are_rejected(make_client):
+    with pytest.raises(ValueError):
+        PaymentLinkCampaign(make_client(), {"amount": 1, "colour": "red"}, "spring")
+
+
+def test_rerun_returns_the_links_already_created(emulator):
+    client = PexipayClient("sk_test", api_base_url=emulator.url, retry=FAST_RETRY)
+    campaign = PaymentLinkCampaign(client, TEMPLATE, "spring", max_workers=4)
+
+    first = {result.key: result.id for result in campaign.results(RECIPIENTS)}
+    second = {result.key: result.id for result in campaign.results(RECIPIENTS)}
+
+    assert campaign.stats.created == 3
+    assert first == second
+    assert len(set(first.values())) == 3
+    newest = client.payment_links.list(limit=100)["data"]
+    assert sum(link["metadata"].get("campaign") == "spring" for link in newest) == 3
+
+
+def test_failed_recipients_are_reported_without_stopping_the_run(transport, make_client):
+    def create(request):
+        body = json.loads(request.body)
+        if body["amount"] > 30:
+            return 400, {"error": "Amount too large"}
+        return 201, {"data": {"id": "pl_1", "url": "https://pay.test/pl_1", **body}}
+
+    transport.add("POST", "/payment-links", create)
+    campaign = PaymentLinkCampaign(make_client(), TEMPLATE, "spring")
+    recipients = RECIPIENTS + [{"id": "cus_4"}]
+
+    results = {result.key: result for result in campaign.results(recipients)}
+
+    assert results["cus_1"].ok and results["cus_3"].ok
+    assert results["cus_2"].error == "Amount too large"
+    assert "'name'" in results["cus_4"].error
+    assert (campaign.stats.created, campaign.stats.failed) == (2, 2)
+
+
+def test_sinks_write_one_row_per_result():
+    results = [LinkResult(0, "cus_1", "pl_1", "https://pay.test/pl_1", 25, "EUR", "active")]
+    results.append(LinkResult(1, "cus_2", error="Amount too large"))
+    csv_file, jsonl_file = io.StringIO(), io.StringIO()
+
+    for sink in (CsvSink(csv_file), JsonlSink(jsonl_file)):
+        with sink:
+            for result in results:
+                sink.write(result)
+
+    rows = list(csv.DictReader(io.StringIO(csv_file.getvalue())))
+    assert [row["key"] for row in rows] == ["cus_1", "cus_2"]
+    assert rows[1]["error"] == "Amount too large"
+    lines = [json.loads(line) for line in jsonl_file.getvalue().splitlines()]
+    assert lines == [result.to_dict() for result in results]
+
+
+def test_file_sink_requires_a_row_format():
+    with pytest.raises(TypeError):
+        _FileSink(io.StringIO())
@@ -0,0 +1,163 @@
+import pytest
+
+from pexipay import CircuitOpenError, DeadlineExceededError, PexipayError
+from pexipay.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerConfig,
+)
+from pexipay.concurrency import AdaptiveConcurrencyLimiter
+
+from conftest import FAST_RETRY
+
+CONFIG = CircuitBreakerConfig(window=4, min_calls=4, open_duration=10.0, half_open_probes=2)
+NO_RETRY = FAST_RETRY.with_options(max_retries=0)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def open_breaker(clock: Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker("payments", CONFIG, clock=clock)
+    for _ in range(CONFIG.min_calls):
+        breaker.before_call()
+        breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 4.0
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_in == pytest.approx(6.0)
+
+
+def test_closes_once_every_probe_succeeds():
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+
+    breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+    assert breaker.opened_at == 10.0
+
+
+def test_cancelled_probe_is_given_back():
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+
+    breaker.before_call()
+    breaker.before_call()
+    breaker.cancel()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_lost_probes_are_rearmed_after_open_duration():
+    clock = Clock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+    breaker.before_call()
+
+    clock.now = 15.0
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_in == pytest.approx(5.0)
+
+    clock.now = 20.0
+    breaker.before_call()
+    breaker.before_call()
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+@pytest.fixture
+def failing_balance(transport):
+    status = [503]
+    transport.add(
+        "GET",
+        "/balance",
+        lambda request: (status[0], {"error": "down"}) if status[0] >= 400 else {"ok": True},
+    )
+    return status
+
+
+def tripped(client, clock):
+    for _ in range(CONFIG.min_calls):
+        with pytest.raises(PexipayError):
+            client.balance.retrieve()
+    breaker = client.circuit_breakers.for_endpoint("/balance")
+    assert breaker.state == OPEN
+    breaker.clock = clock
+    breaker.opened_at = 0.0
+    clock.now = CONFIG.open_duration
+    return breaker
+
+
+def test_client_probe_ended_by_a_raising_hook_is_not_lost(failing_balance, make_client):
+    clock = Clock()
+    client = make_client(circuit_breaker=CONFIG, retry=NO_RETRY)
+    breaker = tripped(client, clock)
+    failing_balance[0] = 200
+
+    def broken_hook(event):
+        raise RuntimeError("hook failed")
+
+    client.hooks.after_response(broken_hook)
+    for _ in range(CONFIG.half_open_probes + 1):
+        with pytest.raises(RuntimeError):
+            client.balance.retrieve()
+    client.hooks.unregister("after_response", broken_hook)
+
+    assert breaker.state == HALF_OPEN
+    client.balance.retrieve()
+    client.balance.retrieve()
+    assert breaker.state == CLOSED
+
+
+def test_client_probe_that_never_gets_a_slot_is_not_lost(failing_balance, make_client):
+    clock = Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1)
+    client = make_client(circuit_breaker=CONFIG, concurrency_limiter=limiter, retry=NO_RETRY)
+    breaker = tripped(client, clock)
+    failing_balance[0] = 200
+
+    assert limiter.try_acquire()
+    with pytest.raises(DeadlineExceededError):
+        client.request("GET", "/balance", deadline=0.01)
+    limiter.release()
+
+    client.balance.retrieve()
+    client.balance.retrieve()
+    assert breaker.state == CLOSED
@@ -0,0 +1,141 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from pexipay import cli
+from pexipay._timestamps import format_timestamp
+from pexipay.emulator import EmulatorConfig, EmulatorServer, EmulatorStore
+from pexipay.pagination import ListCheckpoint
+
+PAYMENTS = 20_000
+NEWEST = 1_700_000_000.0
+INTERVAL = 60.0
+PERIOD = [
+    "--created-after",
+    format_timestamp(NEWEST - PAYMENTS * INTERVAL),
+    "--created-before",
+    format_timestamp(NEWEST + 1),
+]
+
+
+@pytest.fixture(scope="module")
+def slow_emulator():
+    store = EmulatorStore(payments=PAYMENTS, now=NEWEST, interval=INTERVAL)
+    with EmulatorServer(EmulatorConfig(latency=0.01, settle_delay=0.0), store) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def emulator():
+    # Bulk tests create payments, so they get an emulator of their own
+    with EmulatorServer(EmulatorConfig(settle_delay=0.0), EmulatorStore(payments=500)) as server:
+        yield server
+
+
+def run(server, *args):
+    return cli.main([*args[:2], "--api-key", "sk_test", "--base-url", server.url, *args[2:]])
+
+
+def lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.endswith("\n")]
+
+
+def interrupt_when(condition, cancelled):
+    """Send SIGINT to this process, as Ctrl-C would, once ``condition`` holds"""
+
+    def watch():
+        deadline = time.monotonic() + 30
+        while not cancelled.is_set() and time.monotonic() < deadline:
+            if condition():
+                os.kill(os.getpid(), signal.SIGINT)
+                return
+            time.sleep(0.005)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def test_interrupted_export_stops_early_and_resumes(slow_emulator, tmp_path):
+    output = str(tmp_path / "payments.jsonl")
+    checkpoints = str(tmp_path / "checkpoints")
+    args = ["-o", output, "--shards", "4", "--page-size", "50", "--checkpoint-dir", checkpoints]
+    cancelled = threading.Event()
+    interrupt_when(lambda: os.path.exists(output) and os.path.getsize(output) > 100_000, cancelled)
+    try:
+        code = run(slow_emulator, "export", "payments", *PERIOD, *args)
+    finally:
+        cancelled.set()
+
+    assert code == 130
+    exported = lines(output)
+    assert 0 < len(exported) < PAYMENTS / 2
+    saved = [
+        ListCheckpoint.load(os.path.join(checkpoints, name)) for name in os.listdir(checkpoints)
+    ]
+    assert len(saved) == 4
+    assert not any(checkpoint.done for checkpoint in saved)
+
+    assert run(slow_emulator, "export", "payments", *PERIOD, *args) == 0
+    ids = [payment["id"] for payment in lines(output)]
+    assert len(ids) == PAYMENTS
+    assert len(set(ids)) == PAYMENTS
+    for name in os.listdir(checkpoints):
+        assert ListCheckpoint.load(os.path.join(checkpoints, name)).done
+
+
+def test_export_writes_csv_columns(emulator, tmp_path):
+    output = str(tmp_path / "payments.csv")
+
+    assert run(emulator, "export", "payments", "-o", output, "--fields", "id,amount") == 0
+    with open(output) as file:
+        rows = file.read().splitlines()
+    assert rows[0] == "id,amount"
+    assert len(rows) == 1 + 500
+
+
+def test_bulk_resume_skips_rows_that_succeeded(emulator, tmp_path):
+    rows = tmp_path / "payments.jsonl"
+    rows.write_text(
+        '{"id": "a", "amount": 10, "currency": "USD"}\n'
+        '{"id": "b", "amount": 20, "currency": "USD"}\n'
+        '{"id": "c", "amount": 30, "currency": "USD", "colour": "red"}\n'
+    )
+    results = str(tmp_path / "results.jsonl")
+    args = ["bulk", "create-payments", str(rows), "-o", results, "--job-id", "test"]
+
+    assert run(emulator, *args) == 1
+    first = {result["key"]: result for result in lines(results)}
+    assert first["a"]["ok"] and first["b"]["ok"]
+    assert not first["c"]["ok"]
+
+    assert run(emulator, *args, "--resume") == 1
+    retried = lines(results)[3:]
+    assert [result["key"] for result in retried] == ["c"]
+
+
+def test_bulk_creates_are_idempotent_across_runs(emulator, tmp_path):
+    rows = tmp_path / "payments.jsonl"
+    rows.write_text('{"id": "once", "amount": 10, "currency": "USD"}\n')
+    args = ["bulk", "create-payments", str(rows), "--job-id", "idempotent"]
+
+    assert run(emulator, *args, "-o", str(tmp_path / "first.jsonl")) == 0
+    assert run(emulator, *args, "-o", str(tmp_path / "second.jsonl")) == 0
+    [first] = lines(str(tmp_path / "first.jsonl"))
+    [second] = lines(str(tmp_path / "second.jsonl"))
+    assert first["id"] == second["id"]
+
+
+def test_bench_reports_json(capsys):
+    code = cli.main(["bench", "--emulator", "--operation", "balance", "--requests", "20", "--json"])
+
+    assert code == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 20
+    assert report["errors"] == {}
+    assert report["p50_ms"] is not None
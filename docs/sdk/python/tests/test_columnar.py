@@ -0,0 +1,100 @@
+import pytest
+
+from pexipay import columnar
+from pexipay.columnar import COLUMNS, column_chunks, resolve_columns
+
+COLUMNS_USED = {
+    "id": "string",
+    "amount": "number",
+    "status": "category",
+    "metadata": "json",
+    "createdAt": "timestamp",
+}
+
+RECORDS = [
+    {
+        "id": "txn_1",
+        "amount": "12.50",
+        "status": "succeeded",
+        "metadata": {"order": 7},
+        "createdAt": "2023-11-14T22:13:20.123Z",
+        "ignored": True,
+    },
+    {"id": "txn_2", "amount": 3, "status": "failed", "createdAt": 1_700_000_000},
+    {"id": "txn_3", "amount": "n/a"},
+]
+
+
+@pytest.fixture
+def transactions(transport, make_client):
+    transport.add("GET", "/transactions", {"data": RECORDS, "hasMore": False})
+    return make_client().transactions
+
+
+def test_records_become_typed_columns():
+    (chunk,) = column_chunks(RECORDS, COLUMNS_USED)
+
+    assert chunk == {
+        "id": ["txn_1", "txn_2", "txn_3"],
+        "amount": [12.5, 3.0, None],
+        "status": ["succeeded", "failed", None],
+        "metadata": ['{"order":7}', None, None],
+        "createdAt": [1_700_000_000_123, 1_700_000_000_000, None],
+    }
+
+
+def test_chunks_hold_batch_size_rows():
+    records = ({"id": f"txn_{n}"} for n in range(5))
+
+    chunks = list(column_chunks(records, {"id": "string"}, batch_size=2))
+
+    assert [chunk["id"] for chunk in chunks] == [["txn_0", "txn_1"], ["txn_2", "txn_3"], ["txn_4"]]
+    assert list(column_chunks([], {"id": "string"})) == []
+
+
+def test_columns_default_to_the_list_being_iterated(transactions):
+    assert resolve_columns(transactions.list_all()) == COLUMNS["transactions"]
+    assert resolve_columns(RECORDS, resource="refunds") == COLUMNS["refunds"]
+    assert resolve_columns(RECORDS, {"id": "string"}) == {"id": "string"}
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"resource": "invoices"}, {"columns": {"id": "text"}}],
+)
+def test_unresolvable_columns_are_rejected(options):
+    with pytest.raises(ValueError):
+        resolve_columns(RECORDS, **options)
+
+
+@pytest.mark.skipif(columnar.pyarrow is not None, reason="pyarrow is installed")
+def test_missing_pyarrow_fails_before_the_first_request(transactions, transport):
+    with pytest.raises(ImportError):
+        transactions.list_all().record_batches()
+
+    assert transport.requests == []
+
+
+def test_arrow_batches_are_typed(transactions):
+    pyarrow = pytest.importorskip("pyarrow")
+
+    table = transactions.list_all().to_arrow(COLUMNS_USED, batch_size=2)
+
+    assert table.num_rows == 3
+    assert len(table.to_batches()) == 2
+    assert table.schema.field("amount").type == pyarrow.float64()
+    assert table.schema.field("createdAt").type == pyarrow.timestamp("ms", tz="UTC")
+    assert pyarrow.types.is_dictionary(table.schema.field("status").type)
+    assert table.column("amount").to_pylist() == [12.5, 3.0, None]
+
+
+def test_dataframes_are_typed(transactions):
+    pytest.importorskip("pandas")
+
+    frame = transactions.list_all().to_pandas(COLUMNS_USED)
+
+    assert list(frame.columns) == list(COLUMNS_USED)
+    assert str(frame["amount"].dtype) == "float64"
+    assert str(frame["status"].dtype) == "category"
+    assert str(frame["createdAt"].dtype).startswith("datetime64")
+    assert frame["createdAt"].isna().tolist() == [False, False, True]
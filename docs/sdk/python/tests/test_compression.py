@@ -0,0 +1,109 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from pexipay import PexipayClient
+from pexipay.compression import StreamDecoder, compress_body, supported_encodings
+
+PAYLOAD = json.dumps({"data": [{"id": f"pay_{n}", "status": "succeeded"} for n in range(200)]})
+BODY = PAYLOAD.encode()
+
+
+def decode_in_chunks(content_encoding, encoded, size=7):
+    decoder = StreamDecoder(content_encoding)
+    chunks = [encoded[start:][:size] for start in range(0, len(encoded), size)]
+    return b"".join(decoder.decompress(chunk) for chunk in chunks) + decoder.flush()
+
+
+def deflate(data, wbits):
+    compressor = zlib.compressobj(wbits=wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize(
+    "content_encoding, encoded",
+    [
+        ("gzip", gzip.compress(BODY)),
+        ("x-gzip", gzip.compress(BODY)),
+        ("deflate", deflate(BODY, zlib.MAX_WBITS)),
+        ("deflate", deflate(BODY, -zlib.MAX_WBITS)),
+        ("gzip, deflate", deflate(gzip.compress(BODY), zlib.MAX_WBITS)),
+        ("GZIP", gzip.compress(BODY)),
+    ],
+)
+def test_bodies_are_decoded_chunk_by_chunk(content_encoding, encoded):
+    assert decode_in_chunks(content_encoding, encoded) == BODY
+
+
+@pytest.mark.parametrize("content_encoding", [None, "", "identity"])
+def test_unencoded_bodies_pass_through(content_encoding):
+    decoder = StreamDecoder(content_encoding)
+
+    assert not decoder.active
+    assert decoder.decompress(BODY) == BODY
+    assert decoder.flush() == b""
+
+
+def test_bad_encodings_raise_value_error():
+    with pytest.raises(ValueError):
+        StreamDecoder("compress")
+    with pytest.raises(ValueError):
+        decode_in_chunks("gzip", b"not gzip at all")
+
+
+def test_optional_encodings_are_offered_only_when_installed():
+    encodings = supported_encodings()
+
+    assert encodings[-2:] == ["gzip", "deflate"]
+    for encoding, module in (("br", "brotli"), ("zstd", "zstandard")):
+        try:
+            __import__(module)
+        except ImportError:
+            assert encoding not in encodings
+        else:
+            assert encoding in encodings
+
+
+def test_compressed_bodies_are_reproducible():
+    assert compress_body(BODY) == compress_body(BODY)
+    assert gzip.decompress(compress_body(BODY)) == BODY
+
+
+def test_large_request_bodies_are_gzipped(transport, make_client):
+    transport.add("POST", "/payments", lambda request: {"id": "pay_1"})
+    client = make_client(compress_requests=True)
+    sent = []
+    client.hooks.after_response(lambda event: sent.append(event))
+
+    client.payments.create(amount=100, currency="USD", description="x" * 2000)
+    client.payments.create(amount=100, currency="USD")
+
+    large, small = transport.requests
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(large.body))["description"] == "x" * 2000
+    assert sent[0].wire_bytes_sent < sent[0].bytes_sent
+    assert "Content-Encoding" not in small.headers
+    assert json.loads(small.body) == {"amount": 100, "currency": "USD"}
+
+
+def test_compress_requests_takes_a_minimum_size(transport, make_client):
+    transport.add("POST", "/payments", lambda request: {"id": "pay_1"})
+    client = make_client(compress_requests=10)
+
+    client.payments.create(amount=100, currency="USD")
+
+    assert transport.requests[0].headers["Content-Encoding"] == "gzip"
+
+
+def test_emulator_responses_are_decompressed(emulator):
+    client = PexipayClient("sk_test", api_base_url=emulator.url)
+    received = []
+    client.hooks.after_response(lambda event: received.append(event))
+
+    page = client.payments.list(limit=50)
+
+    assert len(page["data"]) == 50
+    event = received[0]
+    assert event.wire_bytes_received < event.bytes_received
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from pexipay import PexipayError
+from pexipay.concurrency import OVERLOAD, AdaptiveConcurrencyLimiter
+
+from conftest import FAST_RETRY
+
+NO_RETRY = FAST_RETRY.with_options(max_retries=0)
+
+
+def test_acquire_waits_for_a_released_slot():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    assert limiter.try_acquire()
+    assert not limiter.acquire(timeout=0.01)
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(limiter.acquire(timeout=5)))
+    waiter.start()
+    limiter.release(0.01)
+    waiter.join()
+    assert acquired == [True]
+    assert limiter.in_flight == 1
+
+
+def test_overload_shrinks_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, overload_ratio=0.5)
+    limiter.try_acquire()
+    limiter.release(0.01, OVERLOAD)
+    assert limiter.limit == 5
+
+
+def test_slot_is_released_when_a_hook_raises(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+    client = make_client(concurrency_limiter=limiter, deadline=1.0)
+
+    @client.hooks.after_response
+    def broken_hook(event):
+        raise RuntimeError("hook failed")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            client.balance.retrieve()
+    assert limiter.in_flight == 0
+
+
+def test_slot_is_released_on_api_errors(transport, make_client):
+    transport.add("GET", "/balance", lambda request: (503, {"error": "down"}))
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    client = make_client(concurrency_limiter=limiter, retry=NO_RETRY)
+
+    with pytest.raises(PexipayError):
+        client.balance.retrieve()
+    assert limiter.in_flight == 0
+    assert limiter.limit < 4
+
+
+def test_slot_is_released_when_the_transport_breaks(transport, make_client):
+    def broken_transport(request):
+        raise KeyError("transport bug")
+
+    transport.add("GET", "/balance", broken_transport)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    client = make_client(concurrency_limiter=limiter)
+
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            client.balance.retrieve()
+    assert limiter.in_flight == 0
+    assert limiter.limit == 1
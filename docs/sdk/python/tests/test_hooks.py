@@ -0,0 +1,100 @@
+import pytest
+
+from pexipay import PexipayError
+from pexipay.hooks import LatencyAggregator, LatencyHistogram, endpoint_route
+
+from conftest import FAST_RETRY
+
+
+@pytest.mark.parametrize(
+    "endpoint, route",
+    [
+        ("/payments", "/payments"),
+        ("/payments/pay_1a2b/capture", "/payments/{id}/capture"),
+        ("/refunds/re_9?expand=payment", "/refunds/{id}"),
+        ("/customers/3f2c9a1e-77aa", "/customers/{id}"),
+        ("/balance/transactions", "/balance/transactions"),
+    ],
+)
+def test_endpoint_route_collapses_ids(endpoint, route):
+    assert endpoint_route(endpoint) == route
+
+
+def test_events_fire_in_order(transport, make_client):
+    answers = [(503, {"error": "unavailable"})]
+    transport.add("GET", "/payments/{id}", lambda request, id: answers.pop() if answers else {})
+    client = make_client()
+    events = []
+    for name in ("before_request", "after_response", "on_retry", "on_error"):
+        client.hooks.register(name, lambda event, name=name: events.append((name, event.attempt)))
+
+    client.payments.retrieve("pay_1")
+
+    assert events == [
+        ("before_request", 1),
+        ("after_response", 1),
+        ("on_retry", 1),
+        ("before_request", 2),
+        ("after_response", 2),
+    ]
+
+
+def test_before_request_may_add_headers(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    client = make_client()
+    client.hooks.before_request(lambda event: event.headers.update({"X-Trace": "t1"}))
+
+    client.balance.retrieve()
+
+    assert transport.requests[0].headers["X-Trace"] == "t1"
+
+
+def test_middleware_objects_are_added_and_removed(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    client = make_client()
+
+    class Counter:
+        calls = 0
+
+        def after_response(self, event):
+            self.calls += 1
+
+    counter = client.hooks.add(Counter())
+    client.balance.retrieve()
+    client.hooks.remove(counter)
+    client.balance.retrieve()
+
+    assert counter.calls == 1
+    with pytest.raises(ValueError):
+        client.hooks.register("on_nothing", print)
+
+
+def test_histogram_percentiles_stay_within_a_bucket():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.2)
+    assert histogram.percentile(99) == pytest.approx(0.099, rel=0.2)
+    assert histogram.percentile(100) == pytest.approx(0.100)
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_aggregator_summarises_each_route(transport, make_client):
+    transport.add("GET", "/payments/{id}", {"id": "pay_1"})
+    transport.add("POST", "/payments", lambda request: (400, {"error": "invalid"}))
+    client = make_client(retry=FAST_RETRY.with_options(max_retries=0))
+    aggregator = client.hooks.add(LatencyAggregator())
+
+    for id in ("pay_1", "pay_2", "pay_3"):
+        client.payments.retrieve(id)
+    with pytest.raises(PexipayError):
+        client.payments.create(amount=10, currency="USD")
+
+    summary = aggregator.summary()
+    assert set(summary) == {"GET /payments/{id}", "POST /payments"}
+    assert summary["GET /payments/{id}"]["count"] == 3
+    assert summary["POST /payments"]["errors"] == 1
+    assert set(summary["GET /payments/{id}"]["phases"]) == set(LatencyAggregator.PHASES)
+    assert aggregator.histogram("get", "/payments/pay_9").count == 3
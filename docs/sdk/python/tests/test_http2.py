@@ -0,0 +1,107 @@
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("h2")
+
+import h2.config  # noqa: E402
+import h2.connection  # noqa: E402
+import h2.events  # noqa: E402
+
+from pexipay import NetworkError, PexipayClient  # noqa: E402
+from pexipay.transports.http2 import HTTP2Transport  # noqa: E402
+
+from conftest import FAST_RETRY  # noqa: E402
+
+NO_RETRY = FAST_RETRY.with_options(max_retries=0)
+
+
+@pytest.fixture
+def h2_server():
+    """Cleartext HTTP/2 server (prior knowledge) answering every stream with its path"""
+    listener = socket.create_server(("127.0.0.1", 0))
+    connections = []
+
+    def serve(sock):
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        with sock:
+            while True:
+                data = sock.recv(65535)
+                if not data:
+                    return
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = dict(event.headers)
+                        body = json.dumps({"path": headers[b":path"].decode()}).encode()
+                        conn.send_headers(
+                            event.stream_id,
+                            [
+                                (":status", "200"),
+                                ("content-type", "application/json"),
+                                ("content-length", str(len(body))),
+                            ],
+                        )
+                        conn.send_data(event.stream_id, body, end_stream=True)
+                sock.sendall(conn.data_to_send())
+
+    def accept():
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            connections.append(sock)
+            threading.Thread(target=serve, args=(sock,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}/v1", connections
+    listener.close()
+
+
+def test_concurrent_requests_share_one_connection(h2_server):
+    url, connections = h2_server
+    transport = HTTP2Transport(http1=False)
+    client = PexipayClient("sk_test", api_base_url=url, transport=transport, retry=NO_RETRY)
+
+    with ThreadPoolExecutor(8) as pool:
+        payments = list(pool.map(client.payments.retrieve, [f"pay_{n}" for n in range(16)]))
+
+    assert [payment["path"] for payment in payments] == [f"/v1/payments/pay_{n}" for n in range(16)]
+    assert len(connections) == 1
+    transport.close()
+
+
+def test_plain_http_falls_back_to_http_1(emulator):
+    transport = HTTP2Transport()
+    client = PexipayClient("sk_test", api_base_url=emulator.url, transport=transport)
+    timings = []
+    client.hooks.after_response(lambda event: timings.append(event.timings))
+
+    page = client.payments.list(limit=50)
+    client.balance.retrieve()
+
+    assert len(page["data"]) == 50
+    assert timings[0].connect > 0
+    assert timings[1].connect == 0
+    transport.close()
+
+
+def test_refused_connections_were_not_sent():
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        port = listener.getsockname()[1]
+    client = PexipayClient(
+        "sk_test",
+        api_base_url=f"http://127.0.0.1:{port}/v1",
+        transport=HTTP2Transport(),
+        retry=NO_RETRY,
+    )
+
+    with pytest.raises(NetworkError) as info:
+        client.balance.retrieve()
+
+    assert info.value.request_sent is False
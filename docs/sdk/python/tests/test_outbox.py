@@ -0,0 +1,167 @@
+import sqlite3
+import time
+
+import pytest
+
+from pexipay import Outbox, PexipayError, RequestQueuedError
+from pexipay.retry import IDEMPOTENCY_HEADER
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def api(transport):
+    """Payments endpoint that answers 503 while ``api["down"]`` is set"""
+    state = {"down": True, "status": 200}
+
+    def create(request):
+        if state["down"]:
+            return 503, {"error": "unavailable"}
+        if state["status"] >= 400:
+            return state["status"], {"error": "rejected"}
+        return {"id": "pay_1", "key": request.headers[IDEMPOTENCY_HEADER]}
+
+    transport.add("POST", "/payments", create)
+    transport.add("GET", "/payments/{id}", lambda request, id: (503, {"error": "unavailable"}))
+    return state
+
+
+def test_failed_create_is_queued_and_replayed_with_its_key(api, transport, make_client):
+    outbox = Outbox(":memory:", rate=100, min_backoff=0.01, max_backoff=0.05)
+    delivered = []
+    outbox.on_delivered(lambda entry, response: delivered.append(response))
+    client = make_client(outbox=outbox)
+
+    with pytest.raises(RequestQueuedError) as raised:
+        client.payments.create(amount=10, currency="USD")
+    assert raised.value.error.status_code == 503
+    assert len(outbox) == 1
+
+    api["down"] = False
+    wait_for(lambda: delivered)
+    assert len(outbox) == 0
+    assert delivered[0]["key"] == raised.value.idempotency_key
+    sent_keys = {request.headers[IDEMPOTENCY_HEADER] for request in transport.requests}
+    assert sent_keys == {raised.value.idempotency_key}
+
+
+def test_reads_are_not_queued(api, make_client):
+    outbox = Outbox(":memory:")
+    client = make_client(outbox=outbox)
+
+    with pytest.raises(PexipayError) as raised:
+        client.payments.retrieve("pay_1")
+    assert not isinstance(raised.value, RequestQueuedError)
+    assert len(outbox) == 0
+
+
+def test_rejected_replay_is_kept_as_failed(api, make_client):
+    outbox = Outbox(":memory:", rate=100, min_backoff=0.01, max_backoff=0.05)
+    failures = []
+    outbox.on_failed(lambda entry, error: failures.append(error.status_code))
+    client = make_client(outbox=outbox)
+
+    with pytest.raises(RequestQueuedError):
+        client.payments.create(amount=10, currency="USD")
+    api.update(down=False, status=400)
+    wait_for(lambda: failures)
+
+    assert failures == [400]
+    assert len(outbox.failed()) == 1
+    assert outbox.pending() == []
+
+    api["status"] = 200
+    assert outbox.retry_failed() == 1
+    wait_for(lambda: len(outbox) == 0)
+
+
+def test_queued_requests_survive_a_restart(api, tmp_path, make_client):
+    path = str(tmp_path / "outbox.sqlite3")
+    outbox = Outbox(path, min_backoff=60)
+    client = make_client(outbox=outbox)
+    with pytest.raises(RequestQueuedError) as raised:
+        client.payments.create(amount=10, currency="USD")
+    outbox.stop(timeout=5)
+
+    reopened = Outbox(path, rate=100)
+    [entry] = reopened.pending()
+    assert entry.idempotency_key == raised.value.idempotency_key
+    assert entry.data == {"amount": 10, "currency": "USD"}
+
+    api["down"] = False
+    make_client(outbox=reopened)
+    wait_for(lambda: len(reopened) == 0)
+
+
+def test_raising_callbacks_do_not_stop_the_drainer(api, make_client):
+    outbox = Outbox(":memory:", rate=100, min_backoff=0.01, max_backoff=0.05)
+    delivered = []
+
+    @outbox.on_delivered
+    def fragile(entry, response):
+        delivered.append(entry.id)
+        raise RuntimeError("callback bug")
+
+    client = make_client(outbox=outbox)
+    for _ in range(2):
+        with pytest.raises(RequestQueuedError):
+            client.payments.create(amount=10, currency="USD")
+
+    api["down"] = False
+    wait_for(lambda: len(delivered) == 2)
+    assert len(outbox) == 0
+    assert outbox._thread.is_alive()
+
+
+def test_database_errors_are_backed_off_from(api, make_client, monkeypatch):
+    outbox = Outbox(":memory:", rate=100, min_backoff=0.01, max_backoff=0.05)
+    client = make_client(outbox=outbox)
+    with pytest.raises(RequestQueuedError):
+        client.payments.create(amount=10, currency="USD")
+
+    select = outbox._select
+    errors = []
+
+    def locked(*args):
+        if not errors:
+            errors.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return select(*args)
+
+    monkeypatch.setattr(outbox, "_select", locked)
+    api["down"] = False
+    outbox._wakeup.set()
+    wait_for(lambda: outbox.stats["delivered"] == 1)
+    assert errors == [1]
+    assert outbox._thread.is_alive()
+
+
+def test_in_memory_outbox_starts_empty_after_fork(api, make_client):
+    outbox = Outbox(":memory:", min_backoff=60)
+    client = make_client(outbox=outbox)
+    with pytest.raises(RequestQueuedError):
+        client.payments.create(amount=10, currency="USD")
+    outbox.stop(timeout=5)
+    parent_db = outbox._db
+
+    outbox._after_fork()
+
+    assert outbox._db is not parent_db
+    assert len(outbox) == 0
+
+
+def test_queued_entry_keeps_the_callers_key_under_one_name(api, make_client):
+    outbox = Outbox(":memory:", min_backoff=60)
+    client = make_client(outbox=outbox)
+
+    with pytest.raises(RequestQueuedError) as raised:
+        client.request("POST", "/payments", data={"amount": 10}, headers={"idempotency-key": "k1"})
+
+    assert raised.value.idempotency_key == "k1"
+    assert outbox.pending()[0].headers == {IDEMPOTENCY_HEADER: "k1"}
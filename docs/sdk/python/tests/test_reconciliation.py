@@ -0,0 +1,166 @@
+import pytest
+
+from pexipay import PexipayClient, PexipayError
+from pexipay.reconciliation import Reconciler
+
+from conftest import FAST_RETRY
+
+
+def payment(id, amount, status="succeeded"):
+    return {"id": id, "amount": amount, "status": status}
+
+
+def refund(id, payment_id, amount, status="succeeded"):
+    return {"id": id, "paymentId": payment_id, "amount": amount, "status": status}
+
+
+def entry(id, source_id, amount):
+    return {"id": id, "sourceId": source_id, "amount": amount}
+
+
+def kinds(mismatches):
+    return sorted((m.kind, m.record_id) for m in mismatches)
+
+
+def test_matching_records_reconcile_cleanly():
+    reconciler = Reconciler(
+        [payment("pay_1", 10), payment("pay_2", "20.50", "refunded")],
+        [refund("re_1", "pay_2", 20.5)],
+        [entry("txn_1", "pay_1", 10), entry("txn_2", "pay_2", 20.5), entry("txn_3", "re_1", -20.5)],
+    )
+
+    assert list(reconciler.run()) == []
+    assert reconciler.stats.matched == 3
+    assert reconciler.stats.balance_transactions == 3
+
+
+def test_every_kind_of_mismatch_is_reported():
+    reconciler = Reconciler(
+        [
+            payment("pay_missing", 10),
+            payment("pay_twice", 10),
+            payment("pay_amount", 10),
+            payment("pay_failed", 10, "failed"),
+            payment("pay_refunded", 10, "refunded"),
+            payment("pay_over", 10),
+        ],
+        [
+            refund("re_over_1", "pay_over", 8),
+            refund("re_over_2", "pay_over", 8),
+            refund("re_orphan", "pay_gone", 1, "pending"),
+        ],
+        [
+            entry("txn_1", "pay_twice", 10),
+            entry("txn_2", "pay_twice", 10),
+            entry("txn_3", "pay_amount", 9.99),
+            entry("txn_4", "pay_failed", 10),
+            entry("txn_5", "pay_refunded", 10),
+            entry("txn_6", "pay_over", 10),
+            entry("txn_7", "re_over_1", -8),
+            entry("txn_8", "re_over_2", -8),
+            entry("txn_9", "pay_unknown", 5),
+        ],
+    )
+
+    assert kinds(reconciler.run()) == [
+        ("amount_mismatch", "pay_amount"),
+        ("duplicate_balance_entry", "pay_twice"),
+        ("missing_balance_entry", "pay_missing"),
+        ("missing_refund", "pay_refunded"),
+        ("orphaned_balance_entry", "txn_9"),
+        ("orphaned_refund", "re_orphan"),
+        ("over_refunded", "pay_over"),
+        ("unexpected_balance_entry", "pay_failed"),
+    ]
+    assert sum(reconciler.stats.mismatches.values()) == 8
+
+
+def test_resolved_references_are_not_orphans():
+    reconciler = Reconciler(
+        [],
+        [refund("re_1", "pay_last_month", 5, "pending")],
+        [entry("txn_1", "pay_last_month", 5)],
+        resolve=lambda reference: reference == "pay_last_month",
+    )
+
+    assert list(reconciler.run()) == []
+
+
+@pytest.fixture
+def api(transport):
+    """A period with one payment; other records exist only through their retrieve"""
+    transport.add("GET", "/payments", {"data": [payment("pay_1", 10)], "hasMore": False})
+    transport.add("GET", "/refunds", {"data": [], "hasMore": False})
+    transport.add(
+        "GET",
+        "/balance/transactions",
+        {
+            "data": [
+                entry("txn_1", "pay_1", 10),
+                entry("txn_2", "re_old", -3),
+                entry("txn_3", "pay_gone", 4),
+                entry("txn_4", "ch_legacy", 2),
+            ],
+            "hasMore": False,
+        },
+    )
+    known = {"payments": {"pay_1"}, "refunds": {"re_old"}}
+    state = {"status": 404}
+
+    def retrieve(resource):
+        def handler(request, id):
+            if id in known[resource]:
+                return {"id": id}
+            return state["status"], {"error": f"No such {resource[:-1]}: {id}"}
+
+        return handler
+
+    transport.add("GET", "/payments/{id}", retrieve("payments"))
+    transport.add("GET", "/refunds/{id}", retrieve("refunds"))
+    return state
+
+
+def test_from_client_reports_404_references_as_orphans(api, make_client):
+    client = make_client()
+    lookups = []
+    client.hooks.before_request(
+        lambda event: lookups.append(event.endpoint) if event.route.endswith("{id}") else None
+    )
+    reconciler = Reconciler.from_client(client)
+
+    assert kinds(reconciler.run()) == [
+        ("orphaned_balance_entry", "txn_3"),
+        ("orphaned_balance_entry", "txn_4"),
+    ]
+    # Prefixed IDs take one retrieve; an unknown prefix tries both resources
+    assert lookups == [
+        "/refunds/re_old",
+        "/payments/pay_gone",
+        "/payments/ch_legacy",
+        "/refunds/ch_legacy",
+    ]
+
+
+def test_from_client_propagates_errors_other_than_404(api, make_client):
+    api["status"] = 500
+    reconciler = Reconciler.from_client(make_client(retry=FAST_RETRY.with_options(max_retries=0)))
+
+    with pytest.raises(PexipayError) as raised:
+        list(reconciler.run())
+    assert raised.value.status_code == 500
+
+
+def test_emulator_period_reconciles_cleanly(emulator):
+    client = PexipayClient("sk_test", api_base_url=emulator.url)
+    newest = client.payments.list(limit=100)["data"]
+
+    reconciler = Reconciler.from_client(
+        client,
+        created_after=newest[-1]["createdAt"],
+        created_before=newest[0]["createdAt"],
+        page_size=25,
+    )
+
+    assert list(reconciler.run()) == []
+    assert reconciler.stats.payments == 99
+    assert reconciler.stats.matched == reconciler.stats.payments + reconciler.stats.refunds
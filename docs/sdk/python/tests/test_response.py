@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from pexipay import PexipayError, PexipayResponse, RateLimitInfo
+from pexipay.response import decode_json
+from pexipay.transports.base import TransportResponse
+from pexipay.transports.memory import json_response
+
+from conftest import FAST_RETRY
+
+NO_RETRY = FAST_RETRY.with_options(max_retries=0)
+
+
+def test_raw_responses_are_not_decoded_until_read(transport, make_client):
+    headers = {
+        "X-Request-Id": "req_1",
+        "X-RateLimit-Limit": "100",
+        "X-RateLimit-Remaining": "42",
+        "X-RateLimit-Reset": "30",
+    }
+    transport.add("GET", "/payments/{id}", json_response({"id": "pay_1"}, headers=headers))
+    client = make_client()
+
+    response = client.request_raw("GET", "/payments/pay_1")
+
+    assert isinstance(response, PexipayResponse)
+    assert response.content == b'{"id": "pay_1"}'
+    assert response.request_id == "req_1"
+    assert response.rate_limit == RateLimitInfo(limit=100, remaining=42, reset_in=30.0)
+    assert not response.decoded
+
+    assert response["id"] == "pay_1"
+    assert response.decoded
+    assert dict(response) == {"id": "pay_1"}
+    assert response.json() is response.json()
+
+
+def test_request_returns_the_decoded_payload(transport, make_client):
+    transport.add("GET", "/balance", {"available": 10})
+    client = make_client()
+
+    assert client.request("GET", "/balance") == {"available": 10}
+
+
+def test_raw_error_bodies_still_raise(transport, make_client):
+    transport.add(
+        "GET", "/balance", lambda request: (402, {"error": "Card declined", "code": "declined"})
+    )
+    client = make_client(retry=NO_RETRY)
+
+    with pytest.raises(PexipayError) as info:
+        client.request_raw("GET", "/balance")
+
+    assert info.value.status_code == 402
+    assert info.value.code == "declined"
+
+
+def test_non_json_bodies_are_only_rejected_when_decoded(transport, make_client):
+    page = TransportResponse(200, {"Content-Type": "text/csv"}, b"id,status\npay_1,succeeded\n")
+    transport.add("GET", "/reports/{id}", lambda request, id: page)
+    client = make_client(retry=NO_RETRY)
+
+    response = client.request_raw("GET", "/reports/rep_1")
+    assert response.text.startswith("id,status")
+    with pytest.raises(ValueError):
+        response.json()
+
+    with pytest.raises(PexipayError):
+        client.request("GET", "/reports/rep_1")
+
+
+def test_non_object_bodies_cannot_be_read_as_a_mapping():
+    response = PexipayResponse(200, {}, b"[1, 2]")
+
+    assert response.json() == [1, 2]
+    with pytest.raises(TypeError):
+        response["data"]
+
+
+def test_empty_bodies_decode_to_an_empty_object():
+    response = PexipayResponse(204, {}, b"")
+
+    assert response.json() == {}
+    assert len(response) == 0
+    assert response.rate_limit == RateLimitInfo()
+
+
+def test_json_in_other_unicode_encodings_is_decoded():
+    payload = {"name": "Zoë"}
+
+    assert decode_json(json.dumps(payload).encode("utf-16")) == payload
+    assert decode_json(json.dumps(payload, ensure_ascii=False).encode()) == payload
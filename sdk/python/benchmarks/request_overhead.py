@@ -0,0 +1,139 @@
+"""
+Client-side request overhead benchmark
+
+Calls resource methods against a transport that answers instantly, so everything
+measured is SDK work: building the URL, headers and body, hooks and JSON decoding.
+Reports time per call and the memory allocated while building and handling one call.
+
+    python benchmarks/request_overhead.py [--calls 20000] [--json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+SDK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SDK_ROOT)
+
+from pexipay import LatencyAggregator, PexipayClient  # noqa: E402
+from pexipay.metrics import MetricsCollector  # noqa: E402
+from pexipay.transports.base import (  # noqa: E402
+    Transport,
+    TransportRequest,
+    TransportResponse,
+)
+
+_PAYMENT = json.dumps(
+    {"data": {"id": "pay_1a2b3c4d", "status": "pending", "amount": 100.0, "currency": "USD"}}
+).encode("utf-8")
+
+
+class NullTransport(Transport):
+    """Returns the same response for every request without any I/O"""
+
+    def __init__(self) -> None:
+        self.response = TransportResponse(
+            200, {"Content-Type": "application/json", "X-Request-Id": "req_1"}, _PAYMENT
+        )
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        return self.response
+
+
+def scenarios(client: PexipayClient) -> Dict[str, Callable[[], Any]]:
+    return {
+        "retrieve": lambda: client.payments.retrieve("pay_1a2b3c4d"),
+        "retrieve_raw": lambda: client.request_raw(
+            "GET", "/payments/pay_1a2b3c4d", route="/payments/{id}"
+        ),
+        "list": lambda: client.payments.list(limit=50, status="pending"),
+        "create": lambda: client.payments.create(
+            amount=100.0,
+            currency="USD",
+            description="Order #1234",
+            customer_email="customer@example.com",
+        ),
+    }
+
+
+def time_per_call(func: Callable[[], Any], calls: int, repeats: int) -> List[float]:
+    """Nanoseconds per call for each repeat"""
+    for _ in range(min(calls, 1000)):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            func()
+        samples.append((time.perf_counter_ns() - start) / calls)
+    return samples
+
+
+def allocations_per_call(func: Callable[[], Any], calls: int = 1000) -> Dict[str, float]:
+    """Peak bytes allocated during a call, and memory blocks still held after it"""
+    func()
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(calls):
+        func()
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / calls
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            baseline = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:  # pragma: no cover - Python 3.8
+                tracemalloc.clear_traces()
+                baseline = 0
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": statistics.median(peaks), "retained_blocks": retained}
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000, help="Calls per timing repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repeats per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    plain = PexipayClient("sk_test_benchmark", transport=NullTransport())
+    instrumented = PexipayClient("sk_test_benchmark", transport=NullTransport())
+    MetricsCollector().instrument(instrumented)
+    instrumented.hooks.add(LatencyAggregator())
+
+    results = {}
+    for label, client in (("", plain), ("+hooks", instrumented)):
+        for name, func in scenarios(client).items():
+            samples = time_per_call(func, args.calls, args.repeats)
+            results[name + label] = {
+                "ns_per_call": min(samples),
+                "median_ns_per_call": statistics.median(samples),
+                **allocations_per_call(func),
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<20} {'ns/call':>10} {'median':>10} {'peak bytes':>11} {'retained':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result['ns_per_call']:>10.0f} {result['median_ns_per_call']:>10.0f} "
+            f"{result['peak_bytes']:>11.0f} {result['retained_blocks']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,7 @@
+"""Command-line entry point: python -m pexipay"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,47 @@
+"""Concurrent execution of many independent calls with bounded read-ahead"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, Set, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_unordered(
+    fn: Callable[[int, T], R],
+    items: Iterable[T],
+    max_workers: int,
+    thread_name_prefix: str = "pexipay-bulk",
+    stop: Optional[threading.Event] = None,
+) -> Iterator[R]:
+    """
+    Call ``fn(index, item)`` for every item on a thread pool, yielding results as they finish
+
+    Items are read at most ``2 * max_workers`` ahead of the finished calls, so any number
+    of them stream through in bounded memory. An exception raised by ``fn`` propagates.
+
+    When the generator exits early (closed, or an exception such as KeyboardInterrupt
+    raised while it waits), calls that have not started are cancelled and ``stop`` is
+    set before waiting for the running ones, so long-running calls that watch it can
+    return early instead of running to completion.
+    """
+    window = max_workers * 2
+    pending: Set["Future[R]"] = set()
+    with ThreadPoolExecutor(max_workers, thread_name_prefix=thread_name_prefix) as pool:
+        try:
+            for index, item in enumerate(items):
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(fn, index, item))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            if stop is not None:
+                stop.set()
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,78 @@
+"""Token bucket shared by rate-limited SDK components"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from . import _fork
+
+
+class TokenBucket:
+    """
+    Allows ``rate`` operations per second on average, with bursts of up to ``capacity``
+
+    Tokens refill continuously. Thread-safe; the clock is replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Tokens that can be taken right now"""
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+    def full_in(self) -> float:
+        """Seconds until the bucket is full again"""
+        with self._lock:
+            self._refill(self.clock())
+            return (self.capacity - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if enough are available"""
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` will be available (0 if they are now)"""
+        with self._lock:
+            self._refill(self.clock())
+            return max(0.0, tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Wait until tokens are available and take them; False if the timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            wait = self.wait_time(tokens)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+        return True
@@ -0,0 +1,226 @@
+"""Connection-level instrumentation and tuning for the urllib3-based transports"""
+
+import socket
+import ssl
+import threading
+import time
+from typing import Any, Callable, List, Optional, cast
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .connections import DNSCache, SessionReusingSSLContext
+from .hooks import RequestTimings
+from .transports.base import CancelEvent
+
+_local = threading.local()
+
+
+def activate(
+    timings: Optional[RequestTimings],
+    dns_cache: Optional[DNSCache] = None,
+    cancel: Optional[threading.Event] = None,
+) -> None:
+    """
+    Attribute connection pool and connect time on this thread to the given timings, resolve
+    new connections through the DNS cache, and let ``cancel`` interrupt a response wait
+    """
+    _local.timings = timings
+    _local.dns_cache = dns_cache
+    _local.cancel = cancel
+
+
+def current() -> Optional[RequestTimings]:
+    return getattr(_local, "timings", None)
+
+
+def _new_conn_cached(conn: HTTPConnection) -> socket.socket:
+    cache: Optional[DNSCache] = getattr(_local, "dns_cache", None)
+    # urllib3 connects to _dns_host; host (used for SNI and certificate checks) is
+    # derived from it, so the IP address is only swapped in while the socket is opened
+    hostname = conn._dns_host
+    try:
+        address = cache.addresses(hostname, conn.port)[0] if cache is not None else None
+    except OSError:
+        # Let urllib3 resolve and report the failure itself
+        address = None
+    if address is None:
+        return HTTPConnection._new_conn(conn)
+
+    conn._dns_host = address
+    try:
+        return HTTPConnection._new_conn(conn)
+    except Exception:
+        assert cache is not None
+        cache.invalidate(hostname, conn.port)
+        raise
+    finally:
+        conn._dns_host = hostname
+
+
+def _getresponse(conn: HTTPConnection, getresponse: Callable[[], Any]) -> Any:
+    cancel = getattr(_local, "cancel", None)
+    sock = conn.sock
+    if not isinstance(cancel, CancelEvent) or sock is None:
+        return getresponse()
+    cancel.watch(sock)
+    try:
+        return getresponse()
+    finally:
+        cancel.unwatch(sock)
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        timings = current()
+        if timings is not None:
+            timings.connect += time.perf_counter() - start
+
+    def _new_conn(self) -> socket.socket:
+        return _new_conn_cached(self)
+
+    def getresponse(self, *args: Any, **kwargs: Any) -> Any:
+        return _getresponse(
+            self, lambda: super(TimedHTTPConnection, self).getresponse(*args, **kwargs)
+        )
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        timings = current()
+        if timings is not None:
+            timings.connect += time.perf_counter() - start
+
+    def _new_conn(self) -> socket.socket:
+        return _new_conn_cached(self)
+
+    def getresponse(self, *args: Any, **kwargs: Any) -> Any:
+        response = _getresponse(
+            self, lambda: super(TimedHTTPSConnection, self).getresponse(*args, **kwargs)
+        )
+        context = self.ssl_context
+        if isinstance(context, SessionReusingSSLContext):
+            # TLS 1.3 session tickets are only available once data has been read
+            context.session_cache.remember(self.sock)
+        return response
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        timings = current()
+        if timings is not None:
+            timings.queue_wait += time.perf_counter() - start
+        return conn
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        timings = current()
+        if timings is not None:
+            timings.queue_wait += time.perf_counter() - start
+        return conn
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools record queue wait and connect time per request"""
+
+    def __init__(self, *args: Any, ssl_context: Any = None, **kwargs: Any):
+        self.ssl_context = ssl_context
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        ssl_context = getattr(self, "ssl_context", None)
+        if ssl_context is not None:
+            kwargs.setdefault("ssl_context", ssl_context)
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+def warm_pool(pool: HTTPConnectionPool, connections: int, dns_cache: Optional[DNSCache]) -> int:
+    """
+    Connect up to ``connections`` sockets in a pool and leave them idle in it, returning
+    the number of connections ready for use
+
+    The first connection is opened on its own so the others can resume its TLS session;
+    the rest connect in parallel.
+    """
+    queue = pool.pool
+    if queue is None:
+        return 0
+    connections = min(connections, queue.maxsize)
+    # The pool's connection class is TimedHTTPConnection or TimedHTTPSConnection
+    conns = [cast(HTTPConnection, pool._get_conn()) for _ in range(connections)]
+    ready: List[bool] = [False] * len(conns)
+
+    def connect(index: int) -> None:
+        conn = conns[index]
+        activate(None, dns_cache)
+        try:
+            if getattr(conn, "sock", None) is None:
+                start = time.perf_counter()
+                conn.connect()
+                _read_session_tickets(conn, time.perf_counter() - start)
+            ready[index] = True
+        except Exception:
+            conn.close()
+        finally:
+            activate(None)
+
+    if conns:
+        connect(0)
+    threads = [
+        threading.Thread(target=connect, args=(index,), daemon=True)
+        for index in range(1, len(conns))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for conn in conns:
+        pool._put_conn(conn)
+    return sum(ready)
+
+
+def _read_session_tickets(conn: HTTPConnection, handshake_time: float) -> None:
+    """
+    Process TLS 1.3 session tickets sent after the handshake
+
+    Until they are read, an idle connection looks readable, and urllib3 would discard it
+    as dropped by the server when it is taken from the pool. OpenSSL only processes them
+    on a read, and an SSLSocket cannot peek (recv() rejects MSG_PEEK). An HTTP server
+    sends no data before a request, so if a read returns any, the connection is out of
+    step and is not pooled.
+    """
+    sock = conn.sock
+    if not isinstance(sock, ssl.SSLSocket) or sock.version() != "TLSv1.3":
+        return
+    timeout = sock.gettimeout()
+    # Tickets follow the handshake within about one round trip
+    sock.settimeout(min(max(handshake_time, 0.01), 1.0))
+    try:
+        if sock.recv(1) == b"":
+            raise ConnectionError("Connection closed after the TLS handshake")
+        raise ConnectionError("Unexpected data received before the first request")
+    except (socket.timeout, ssl.SSLWantReadError):
+        pass
+    finally:
+        sock.settimeout(timeout)
+    context = getattr(conn, "ssl_context", None)
+    if isinstance(context, SessionReusingSSLContext):
+        context.session_cache.remember(sock)
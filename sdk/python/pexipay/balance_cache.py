@@ -0,0 +1,172 @@
+"""Stale-while-revalidate cache for the account balance"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from . import _fork
+from .hooks import RequestEvent
+
+# Calls that move money in or out of the balance. A response to any of them, or a
+# failure that may have reached the API, drops the cached balance.
+BALANCE_CHANGING_ROUTES = frozenset(
+    {
+        ("POST", "/payments/{id}/capture"),
+        ("POST", "/payments/{id}/cancel"),
+        ("POST", "/refunds"),
+        ("POST", "/refunds/{id}/cancel"),
+    }
+)
+
+
+class BalanceCache:
+    """
+    Serves ``balance.retrieve()`` from memory, never older than ``max_staleness``
+
+    A cached balance older than ``refresh_after`` is still served, and one background
+    refresh replaces it, so steady traffic never waits for the API. Once a balance is
+    ``max_staleness`` seconds old the next call fetches synchronously; concurrent callers
+    share that one request. Age is measured from when the fetch was sent, so the bound
+    holds however long the request took.
+
+    The cache registers itself on the client's hooks and drops the balance when the
+    client captures or cancels a payment, or creates or cancels a refund. One cache
+    belongs to one account: share it only between clients using the same API key.
+    """
+
+    def __init__(
+        self,
+        max_staleness: float = 10.0,
+        refresh_after: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_staleness: Oldest balance ever returned, in seconds
+            refresh_after: Age at which a background refresh starts (default: half of
+                max_staleness)
+            clock: Monotonic clock, replaceable in tests
+        """
+        if max_staleness <= 0:
+            raise ValueError("max_staleness must be positive")
+        self.max_staleness = max_staleness
+        self.refresh_after = max_staleness / 2 if refresh_after is None else refresh_after
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._value: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        # A refresh thread of the parent does not exist in the child
+        self._refreshing = False
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the cached balance was fetched, or None if nothing is cached"""
+        with self._lock:
+            return None if self._value is None else self.clock() - self._fetched_at
+
+    def get(
+        self,
+        fetch: Callable[[], Dict[str, Any]],
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the cached balance, calling ``fetch`` when it is missing or too old
+
+        ``on_lookup`` is called with whether the lookup was a hit once the cache's locks
+        are released (for a miss, after the fetch), so it may use the cache itself; the
+        client uses it to emit the ``on_cache_lookup`` hook.
+        """
+        cached = None
+        with self._lock:
+            value = self._value
+            if value is not None:
+                age = self.clock() - self._fetched_at
+                if age < self.max_staleness:
+                    self.hits += 1
+                    if age >= self.refresh_after and not self._refreshing:
+                        self._refreshing = True
+                        self._start_refresh(fetch, self._generation)
+                    cached = dict(value)
+        if cached is None:
+            try:
+                with self._fetch_lock:
+                    # Another caller may have fetched while this one waited
+                    with self._lock:
+                        value = self._value
+                        if (
+                            value is not None
+                            and self.clock() - self._fetched_at < self.max_staleness
+                        ):
+                            self.hits += 1
+                            cached = dict(value)
+                        else:
+                            self.misses += 1
+                            generation = self._generation
+                    if cached is None:
+                        return dict(self._fetch(fetch, generation))
+            finally:
+                if cached is None and on_lookup is not None:
+                    on_lookup(False)
+        if on_lookup is not None:
+            on_lookup(True)
+        return cached
+
+    def refresh(self, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Fetch the balance now and cache it"""
+        with self._lock:
+            generation = self._generation
+        return dict(self._fetch(fetch, generation))
+
+    def invalidate(self) -> None:
+        """Drop the cached balance; a refresh already in flight will not restore it"""
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+    def _fetch(self, fetch: Callable[[], Dict[str, Any]], generation: int) -> Dict[str, Any]:
+        started = self.clock()
+        value = fetch()
+        with self._lock:
+            if generation == self._generation and started >= self._fetched_at:
+                self._value = value
+                self._fetched_at = started
+        return value
+
+    def _start_refresh(self, fetch: Callable[[], Dict[str, Any]], generation: int) -> None:
+        def run() -> None:
+            refreshed = False
+            try:
+                self._fetch(fetch, generation)
+                refreshed = True
+            except Exception:
+                # The cached value simply ages out; the next caller fetches and sees the error
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing = False
+                    self.refreshes += refreshed
+
+        threading.Thread(target=run, name="pexipay-balance-refresh", daemon=True).start()
+
+    # Hooks (registered by the client)
+
+    def after_response(self, event: RequestEvent) -> None:
+        if (event.method, event.route) in BALANCE_CHANGING_ROUTES:
+            self.invalidate()
+
+    def on_error(self, event: RequestEvent) -> None:
+        if (event.method, event.route) in BALANCE_CHANGING_ROUTES:
+            self.invalidate()
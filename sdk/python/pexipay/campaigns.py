@@ -0,0 +1,302 @@
+"""Bulk payment link generation for campaigns"""
+
+import abc
+import csv
+import json
+import threading
+import time
+from dataclasses import dataclass
+from types import TracebackType
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Type,
+    Union,
+)
+
+from ._bulk import map_unordered
+from ._rate_limit import TokenBucket
+from .errors import PexipayError
+from .retry import derive_idempotency_key
+
+if TYPE_CHECKING:
+    from .client import PexipayClient
+
+# Keyword arguments of ``payment_links.create`` a template or recipient may set
+LINK_FIELDS = frozenset(
+    {
+        "amount",
+        "currency",
+        "description",
+        "customer_info",
+        "return_url",
+        "cancel_url",
+        "webhook_url",
+        "expires_at",
+        "metadata",
+    }
+)
+
+# Fields merged key by key when a recipient overrides them, instead of replaced
+_MERGED_FIELDS = ("customer_info", "metadata")
+
+RESULT_FIELDS = ("index", "key", "id", "url", "amount", "currency", "status", "error")
+
+
+@dataclass
+class LinkResult:
+    """Outcome of one recipient's payment link"""
+
+    index: int
+    """Position of the recipient in the input"""
+    key: str
+    """Recipient key the idempotency key was derived from"""
+    id: Optional[str] = None
+    url: Optional[str] = None
+    amount: Any = None
+    currency: Optional[str] = None
+    status: Optional[str] = None
+    error: Optional[str] = None
+    """Why the link was not created; None on success"""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in RESULT_FIELDS}
+
+
+@dataclass
+class CampaignStats:
+    """Counts from a campaign run"""
+
+    created: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Links created per second"""
+        return self.created / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _FileSink(abc.ABC):
+    def __init__(self, target: Union[str, IO[str]]):
+        if isinstance(target, str):
+            self._file: IO[str] = open(target, "w", newline="", encoding="utf-8")
+            self._owned = True
+        else:
+            self._file = target
+            self._owned = False
+        self._lock = threading.Lock()
+
+    def write(self, result: LinkResult) -> None:
+        with self._lock:
+            self._write(result)
+            # Flushed per row, so links are usable while the campaign is still running
+            self._file.flush()
+
+    @abc.abstractmethod
+    def _write(self, result: LinkResult) -> None:
+        """Write one result; called with the sink's lock held"""
+
+    def close(self) -> None:
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> "_FileSink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class CsvSink(_FileSink):
+    """Writes results as CSV rows with a header, in completion order"""
+
+    def __init__(self, target: Union[str, IO[str]]):
+        """
+        Initialize the sink
+
+        Args:
+            target: Path of the file to create, or an open text file
+        """
+        super().__init__(target)
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+        self._writer.writeheader()
+
+    def _write(self, result: LinkResult) -> None:
+        self._writer.writerow(result.to_dict())
+
+
+class JsonlSink(_FileSink):
+    """Writes results as one JSON object per line, in completion order"""
+
+    def _write(self, result: LinkResult) -> None:
+        self._file.write(json.dumps(result.to_dict(), default=str) + "\n")
+
+
+def open_sink(path: str) -> _FileSink:
+    """Create a CSV sink for ``.csv`` paths and a JSONL sink otherwise"""
+    return CsvSink(path) if path.lower().endswith(".csv") else JsonlSink(path)
+
+
+class _Variables(dict):
+    # Reports the missing name instead of a bare KeyError
+    def __missing__(self, name: str) -> Any:
+        raise ValueError(f"Template variable {name!r} is not set for this recipient")
+
+
+def _render(value: Any, variables: Mapping[str, Any]) -> Any:
+    if isinstance(value, str):
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {name: _render(item, variables) for name, item in value.items()}
+    return value
+
+
+class PaymentLinkCampaign:
+    """
+    Creates one payment link per recipient from a shared template
+
+    Template values that are strings are formatted with the recipient's fields, e.g.
+    ``"Spring sale for {name}"``, including strings nested in ``metadata`` and
+    ``customer_info``. A recipient field named like a ``payment_links.create`` argument
+    overrides the template; ``metadata`` and ``customer_info`` overrides are merged into
+    the template's.
+
+    Creates run on ``max_workers`` threads, at most ``rate`` per second, while the
+    recipients are read lazily, so any number of them can stream through in bounded
+    memory. Each create's idempotency key is derived from ``campaign_id`` and the
+    recipient's key, so running a campaign again, for example after a crash, returns
+    the links already created instead of duplicating them.
+
+    A recipient whose link fails is reported with its error and does not stop the run.
+    """
+
+    def __init__(
+        self,
+        client: "PexipayClient",
+        template: Mapping[str, Any],
+        campaign_id: str,
+        max_workers: int = 16,
+        rate: Optional[float] = None,
+        key_field: str = "id",
+    ):
+        """
+        Initialize the campaign
+
+        Args:
+            client: Client to create the links with
+            template: ``payment_links.create`` arguments shared by every link
+            campaign_id: Stable name of the campaign, part of every idempotency key
+            max_workers: Creates in flight at once
+            rate: Most creates per second (default: unlimited)
+            key_field: Recipient field identifying it across runs; recipients without
+                it are keyed by their position in the input
+        """
+        unknown = set(template) - LINK_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown payment link fields in template: {sorted(unknown)}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.client = client
+        self.template = dict(template)
+        self.campaign_id = campaign_id
+        self.max_workers = max_workers
+        self.key_field = key_field
+        self._bucket = TokenBucket(rate) if rate else None
+        self.stats = CampaignStats()
+
+    def render(self, recipient: Mapping[str, Any]) -> Dict[str, Any]:
+        """``payment_links.create`` arguments for one recipient"""
+        variables = _Variables(recipient)
+        params = {name: _render(value, variables) for name, value in self.template.items()}
+        for name in LINK_FIELDS.intersection(recipient):
+            value = recipient[name]
+            if name in _MERGED_FIELDS and isinstance(value, dict):
+                params[name] = {**(params.get(name) or {}), **value}
+            else:
+                params[name] = value
+        return params
+
+    def idempotency_key(self, key: str) -> str:
+        """Idempotency key of the recipient with the given key"""
+        return derive_idempotency_key(f"campaign:{self.campaign_id}", key)
+
+    def _key(self, index: int, recipient: Mapping[str, Any]) -> str:
+        value = recipient.get(self.key_field)
+        return str(value) if value is not None else f"#{index}"
+
+    def _create(self, index: int, recipient: Mapping[str, Any]) -> LinkResult:
+        result = LinkResult(index, self._key(index, recipient))
+        try:
+            params = self.render(recipient)
+            result.amount = params.get("amount")
+            result.currency = params.get("currency")
+            if self._bucket is not None:
+                self._bucket.acquire()
+            link = self.client.payment_links.create(
+                **params, idempotency_key=self.idempotency_key(result.key)
+            )
+        except (PexipayError, ValueError, TypeError) as error:
+            result.error = str(error) or type(error).__name__
+            return result
+        result.id = link.get("id")
+        result.url = link.get("url")
+        result.amount = link.get("amount", result.amount)
+        result.currency = link.get("currency", result.currency)
+        result.status = link.get("status")
+        return result
+
+    def results(self, recipients: Iterable[Mapping[str, Any]]) -> Iterator[LinkResult]:
+        """Create the links, yielding each result as soon as its create finishes"""
+        stats = self.stats = CampaignStats()
+        started = time.monotonic()
+        try:
+            for result in map_unordered(
+                self._create, recipients, self.max_workers, "pexipay-campaign"
+            ):
+                if result.ok:
+                    stats.created += 1
+                else:
+                    stats.failed += 1
+                yield result
+        finally:
+            stats.elapsed = time.monotonic() - started
+
+    def run(
+        self,
+        recipients: Iterable[Mapping[str, Any]],
+        sink: Union[str, _FileSink, None] = None,
+    ) -> CampaignStats:
+        """
+        Create every link, writing each result to ``sink`` as it completes
+
+        Args:
+            recipients: Recipient field dicts, read lazily
+            sink: A ``CsvSink``/``JsonlSink``, or a path (``.csv`` for CSV, else JSONL)
+        """
+        target = open_sink(sink) if isinstance(sink, str) else sink
+        try:
+            for result in self.results(recipients):
+                if target is not None:
+                    target.write(result)
+        finally:
+            if isinstance(sink, str) and target is not None:
+                target.close()
+        return self.stats
@@ -0,0 +1,289 @@
+"""Typed columnar batches (Arrow record batches, pandas DataFrames) from list results"""
+
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ._timestamps import parse_timestamp
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    import pandas
+
+Record = Dict[str, Any]
+
+# Column kinds:
+#   string     text as is
+#   number     float64 (amounts arrive as JSON numbers or numeric strings)
+#   timestamp  UTC datetime, millisecond precision
+#   category   dictionary-encoded string (pandas category), for enum-like fields
+#   json       nested objects serialized to a JSON string
+KINDS = ("string", "number", "timestamp", "category", "json")
+
+_MONEY = {"amount": "number", "currency": "category"}
+
+# Default columns per list method, in output order
+COLUMNS: Dict[str, Dict[str, str]] = {
+    "payments": {
+        "id": "string",
+        **_MONEY,
+        "status": "category",
+        "amountRefunded": "number",
+        "description": "string",
+        "customerEmail": "string",
+        "metadata": "json",
+        "createdAt": "timestamp",
+        "updatedAt": "timestamp",
+    },
+    "refunds": {
+        "id": "string",
+        "paymentId": "string",
+        **_MONEY,
+        "status": "category",
+        "reason": "category",
+        "metadata": "json",
+        "createdAt": "timestamp",
+    },
+    "customers": {
+        "id": "string",
+        "email": "string",
+        "name": "string",
+        "phone": "string",
+        "address": "json",
+        "metadata": "json",
+        "createdAt": "timestamp",
+    },
+    "payment_links": {
+        "id": "string",
+        "url": "string",
+        **_MONEY,
+        "status": "category",
+        "description": "string",
+        "expiresAt": "timestamp",
+        "metadata": "json",
+        "createdAt": "timestamp",
+    },
+    "transactions": {
+        "id": "string",
+        "type": "category",
+        "status": "category",
+        **_MONEY,
+        "fee": "number",
+        "net": "number",
+        "sourceId": "string",
+        "createdAt": "timestamp",
+    },
+}
+COLUMNS["balance_transactions"] = COLUMNS["transactions"]
+
+# ListCheckpoint resource names -> COLUMNS keys
+_RESOURCES = {
+    "payments.list": "payments",
+    "refunds.list": "refunds",
+    "customers.list": "customers",
+    "payment_links.list": "payment_links",
+    "transactions.list": "transactions",
+    "balance.list_transactions": "balance_transactions",
+}
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch_ms(value: Any) -> Optional[int]:
+    epoch = parse_timestamp(value)
+    return None if epoch is None else int(round(epoch * 1000))
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, separators=(",", ":"))
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _text,
+    "number": _number,
+    "timestamp": _epoch_ms,
+    "category": _text,
+    "json": _json,
+}
+
+
+def resolve_columns(
+    records: Iterable[Record],
+    columns: Optional[Dict[str, str]] = None,
+    resource: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Columns to build: ``columns`` if given, else the defaults of ``resource``, else of the
+    list ``records`` iterates over (when it is a ``list_all()`` iterator)
+    """
+    if columns is None:
+        if resource is None:
+            checkpoint = getattr(records, "checkpoint", None)
+            if checkpoint is not None:
+                resource = _RESOURCES.get(checkpoint.resource)
+        if resource is None:
+            raise ValueError("Pass columns= or resource= for records of an unknown list")
+        if resource not in COLUMNS:
+            raise ValueError(f"No default columns for {resource!r}; pass columns=")
+        columns = COLUMNS[resource]
+    unknown = set(columns.values()) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown column kinds: {sorted(unknown)}")
+    return dict(columns)
+
+
+def column_chunks(
+    records: Iterable[Record], columns: Dict[str, str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Convert records into chunks of typed column lists, ``batch_size`` rows each
+
+    Each record is converted field by field as it arrives and then dropped, so only one
+    chunk of plain values is ever held, never a list of the records themselves.
+    Timestamps become epoch milliseconds; fields missing from a record become None.
+    """
+    plan = [(name, _CONVERTERS[kind]) for name, kind in columns.items()]
+    chunk: Dict[str, List[Any]] = {name: [] for name in columns}
+    appends = [(name, convert, chunk[name].append) for name, convert in plan]
+    size = 0
+    for record in records:
+        get = record.get
+        for name, convert, append in appends:
+            append(convert(get(name)))
+        size += 1
+        if size >= batch_size:
+            yield chunk
+            chunk = {name: [] for name in columns}
+            appends = [(name, convert, chunk[name].append) for name, convert in plan]
+            size = 0
+    if size:
+        yield chunk
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise ImportError(
+            "Arrow record batches require pyarrow. "
+            "Install it with: pip install pexipay[dataframe]"
+        )
+
+
+def arrow_schema(columns: Dict[str, str]) -> "pyarrow.Schema":
+    """Arrow schema of the given columns"""
+    _require_pyarrow()
+    types = {
+        "string": pyarrow.string(),
+        "number": pyarrow.float64(),
+        "timestamp": pyarrow.timestamp("ms", tz="UTC"),
+        "category": pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        "json": pyarrow.string(),
+    }
+    return pyarrow.schema([(name, types[kind]) for name, kind in columns.items()])
+
+
+def record_batches(
+    records: Iterable[Record],
+    columns: Optional[Dict[str, str]] = None,
+    resource: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator["pyarrow.RecordBatch"]:
+    """
+    Stream records as typed Arrow record batches of ``batch_size`` rows
+
+    Args:
+        records: Records of one list, e.g. ``client.transactions.list_all(...)``
+        columns: Column name -> kind (string, number, timestamp, category or json);
+            default: the columns of the list ``records`` comes from
+        resource: Name of the list whose default columns to use, e.g. "transactions"
+        batch_size: Rows per batch
+    """
+    columns = resolve_columns(records, columns, resource)
+    # Built before the first batch is requested, so a missing pyarrow fails right away
+    return _batches(records, columns, arrow_schema(columns), batch_size)
+
+
+def _batches(
+    records: Iterable[Record], columns: Dict[str, str], schema: "pyarrow.Schema", batch_size: int
+) -> Iterator["pyarrow.RecordBatch"]:
+    for chunk in column_chunks(records, columns, batch_size):
+        arrays = []
+        for field in schema:
+            if pyarrow.types.is_dictionary(field.type):
+                values = pyarrow.array(chunk[field.name], pyarrow.string())
+                arrays.append(values.dictionary_encode())
+            else:
+                arrays.append(pyarrow.array(chunk[field.name], field.type))
+        yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def to_arrow(
+    records: Iterable[Record],
+    columns: Optional[Dict[str, str]] = None,
+    resource: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> "pyarrow.Table":
+    """Collect records into an Arrow table; its batches are concatenated without copying"""
+    columns = resolve_columns(records, columns, resource)
+    batches = list(record_batches(records, columns, batch_size=batch_size))
+    return pyarrow.Table.from_batches(batches, schema=arrow_schema(columns))
+
+
+def to_pandas(
+    records: Iterable[Record],
+    columns: Optional[Dict[str, str]] = None,
+    resource: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> "pandas.DataFrame":
+    """
+    Collect records into a DataFrame with typed columns
+
+    Numbers are float64, timestamps UTC ``datetime64``, categories pandas categoricals
+    and JSON columns strings. Built through Arrow when pyarrow is
+    installed; otherwise each column is converted from one list of plain values.
+    """
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError(
+            "DataFrames require pandas. Install it with: pip install pexipay[dataframe]"
+        ) from None
+
+    columns = resolve_columns(records, columns, resource)
+    if pyarrow is not None:
+        return to_arrow(records, columns, batch_size=batch_size).to_pandas()
+
+    merged: Dict[str, List[Any]] = {name: [] for name in columns}
+    for chunk in column_chunks(records, columns, batch_size):
+        for name, values in chunk.items():
+            merged[name].extend(values)
+    data: Dict[str, Any] = {}
+    for name, kind in columns.items():
+        values = merged.pop(name)
+        if kind == "number":
+            data[name] = pandas.Series(values, dtype="float64")
+        elif kind == "timestamp":
+            # Epoch milliseconds are exact in float64; None becomes NaT
+            data[name] = pandas.to_datetime(
+                pandas.Series(values, dtype="float64"), unit="ms", utc=True
+            )
+        elif kind == "category":
+            data[name] = pandas.Series(values, dtype="category")
+        else:
+            data[name] = pandas.Series(values, dtype="object")
+    return pandas.DataFrame(data)
@@ -0,0 +1,250 @@
+"""Adaptive (AIMD) concurrency limiter for outbound API calls"""
+
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from . import _fork
+
+if TYPE_CHECKING:
+    import asyncio
+
+SUCCESS = "success"
+OVERLOAD = "overload"
+IGNORE = "ignore"
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(
+        self,
+        event: Optional[threading.Event] = None,
+        loop: "Optional[asyncio.AbstractEventLoop]" = None,
+        future: "Optional[asyncio.Future[None]]" = None,
+    ):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits in-flight requests and tunes the limit from observed latency and errors
+
+    The limit grows by roughly one slot per round of successful requests (additive
+    increase) and is multiplied down when latency rises well above the best latency seen
+    recently, or when the API answers 429/5xx (multiplicative decrease). One limiter can be
+    shared by several clients, threads and asyncio coroutines.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 10,
+        min_limit: float = 1,
+        max_limit: float = 200,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.9,
+        overload_ratio: float = 0.5,
+        smoothing: float = 0.2,
+        min_rtt_window: int = 500,
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            initial_limit: Starting number of concurrent requests
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            latency_tolerance: Smoothed latency above this multiple of the minimum
+                latency is treated as congestion
+            backoff_ratio: Limit multiplier on congestion
+            overload_ratio: Limit multiplier on 429 or 5xx responses
+            smoothing: Weight of each new sample in the smoothed latency
+            min_rtt_window: Samples after which the minimum latency is re-measured, so the
+                baseline follows lasting changes in API latency
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.overload_ratio = overload_ratio
+        self.smoothing = smoothing
+        self.min_rtt_window = min_rtt_window
+
+        self.in_flight = 0
+        self.min_rtt: Optional[float] = None
+        self.smoothed_rtt: Optional[float] = None
+        self._next_min_rtt: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Requests in flight and waiters belong to the parent; the learned limit is kept
+        self.in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    # Acquisition
+
+    def try_acquire(self) -> bool:
+        """Take a slot without waiting"""
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return True
+        return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot; returns False if none became free within the timeout"""
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return True
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        assert waiter.event is not None
+        if waiter.event.wait(timeout):
+            return True
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+        return False
+
+    async def acquire_async(self) -> None:
+        """Wait for a slot from a coroutine"""
+        # Imported here so threaded users don't pay for loading asyncio
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return
+            future: "asyncio.Future[None]" = loop.create_future()
+            waiter = _Waiter(loop=loop, future=future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # The slot was granted while the coroutine was being cancelled
+                    self.in_flight -= 1
+                    self._grant()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, outcome: str = SUCCESS) -> None:
+        """
+        Return a slot and feed the result back into the limit
+
+        Args:
+            latency: Request latency in seconds (None to skip the latency signal)
+            outcome: SUCCESS, OVERLOAD (429/5xx/timeout) or IGNORE
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if outcome == OVERLOAD:
+                self._decrease(self.overload_ratio)
+            elif outcome == SUCCESS and latency is not None:
+                self._on_latency(latency)
+            self._grant()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """Hold a slot for the duration of a block, reporting its latency on exit"""
+        if not self.acquire(timeout):
+            raise TimeoutError("No concurrency slot available")
+        start = time.perf_counter()
+        outcome = SUCCESS
+        try:
+            yield
+        except BaseException:
+            outcome = IGNORE
+            raise
+        finally:
+            self.release(time.perf_counter() - start, outcome)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """Coroutine version of slot()"""
+        await self.acquire_async()
+        start = time.perf_counter()
+        outcome = SUCCESS
+        try:
+            yield
+        except BaseException:
+            outcome = IGNORE
+            raise
+        finally:
+            self.release(time.perf_counter() - start, outcome)
+
+    # Limit adjustment (called with the lock held)
+
+    def _on_latency(self, latency: float) -> None:
+        self._samples += 1
+        if self.min_rtt is None or latency < self.min_rtt:
+            self.min_rtt = latency
+        if self._next_min_rtt is None or latency < self._next_min_rtt:
+            self._next_min_rtt = latency
+        if self._samples % self.min_rtt_window == 0:
+            self.min_rtt = self._next_min_rtt
+            self._next_min_rtt = None
+
+        if self.smoothed_rtt is None:
+            self.smoothed_rtt = latency
+        else:
+            self.smoothed_rtt += self.smoothing * (latency - self.smoothed_rtt)
+
+        assert self.min_rtt is not None
+        if self.smoothed_rtt > self.min_rtt * self.latency_tolerance:
+            self._decrease(self.backoff_ratio)
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grow while the limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, ratio: float) -> None:
+        now = time.monotonic()
+        # Decrease at most once per round trip so one burst of errors counts once
+        if now - self._last_decrease < (self.smoothed_rtt or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * ratio)
+
+    def _grant(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            waiter.granted = True
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                assert waiter.loop is not None
+                waiter.loop.call_soon_threadsafe(self._resolve, waiter)
+
+    def _resolve(self, waiter: _Waiter) -> None:
+        future = waiter.future
+        assert future is not None
+        # A cancelled waiter gives its slot back in acquire_async()
+        if not future.done():
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit, in-flight count and latency estimates"""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "min_rtt": self.min_rtt,
+            "smoothed_rtt": self.smoothed_rtt,
+        }
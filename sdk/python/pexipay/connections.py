@@ -0,0 +1,173 @@
+"""DNS result caching and TLS session resumption for new connections"""
+
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from . import _fork
+
+Resolver = Callable[..., List[Tuple[Any, ...]]]
+
+
+class DNSCache:
+    """
+    Caches resolved addresses for a fixed time
+
+    Used by the urllib3-based transports when opening connections, so reconnects after
+    pool churn skip the DNS lookup. If a refresh fails, the expired addresses keep being
+    used until the resolver recovers.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 256,
+        resolver: Resolver = socket.getaddrinfo,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds a resolved address is reused
+            max_entries: Host/port pairs kept (least recently resolved are evicted)
+            resolver: getaddrinfo-compatible function
+            clock: Monotonic clock, replaceable in tests
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.resolver = resolver
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Resolved addresses stay valid in a forked child; only the lock is replaced
+        self._lock = threading.Lock()
+
+    def addresses(self, host: str, port: int) -> List[str]:
+        """IP addresses for a host, resolving it if the cached entry has expired"""
+        key = (host, port)
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is not None and entry[0] > now:
+            self.stats["hits"] += 1
+            return entry[1]
+
+        try:
+            infos = self.resolver(host, port, 0, socket.SOCK_STREAM)
+        except OSError:
+            if entry is None:
+                raise
+            self.stats["stale"] += 1
+            return entry[1]
+        addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = (now + self.ttl, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def invalidate(self, host: str, port: Optional[int] = None) -> None:
+        """Forget a host's addresses (all ports unless one is given)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == host and port in (None, k[1])]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TLSSessionCache:
+    """Most recent TLS session per server name, offered again on new connections"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._sessions: "OrderedDict[str, ssl.SSLSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"handshakes": 0, "resumed": 0}
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def get(self, server_name: str) -> Optional[ssl.SSLSession]:
+        return self._sessions.get(server_name)
+
+    def put(self, server_name: str, session: ssl.SSLSession) -> None:
+        with self._lock:
+            self._sessions[server_name] = session
+            self._sessions.move_to_end(server_name)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def remember(self, sock: Any) -> None:
+        """Store the socket's session if it carries a ticket that is not cached yet"""
+        server_name = getattr(sock, "server_hostname", None)
+        session = getattr(sock, "session", None)
+        if server_name and session is not None and session.has_ticket:
+            if self._sessions.get(server_name) is not session:
+                self.put(server_name, session)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+
+class SessionReusingSSLContext(ssl.SSLContext):
+    """
+    SSLContext that resumes cached TLS sessions
+
+    Abbreviated handshakes save a round trip and the certificate exchange on every
+    connection after the first one to a host.
+    """
+
+    session_cache: TLSSessionCache
+
+    def wrap_socket(  # type: ignore[override]
+        self,
+        sock: socket.socket,
+        server_side: bool = False,
+        do_handshake_on_connect: bool = True,
+        suppress_ragged_eofs: bool = True,
+        server_hostname: Optional[str] = None,
+        session: Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLSocket:
+        cache = self.session_cache
+        if session is None and server_hostname and not server_side:
+            session = cache.get(server_hostname)
+        ssl_sock = super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+        if do_handshake_on_connect and not server_side:
+            cache.stats["handshakes"] += 1
+            if ssl_sock.session_reused:
+                cache.stats["resumed"] += 1
+            # TLS 1.3 tickets usually arrive after the handshake; the connection
+            # stores them again once a response has been read
+            cache.remember(ssl_sock)
+        return ssl_sock
+
+
+def session_reusing_context() -> SessionReusingSSLContext:
+    """Verifying client SSLContext with its own TLS session cache"""
+    context = SessionReusingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_default_certs()
+    # Sessions can only be resumed by the context that created them
+    context.session_cache = TLSSessionCache()
+    return context
+
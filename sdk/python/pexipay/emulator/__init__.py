@@ -0,0 +1,21 @@
+"""
+Local Pexipay API emulator for load tests and offline benchmarks
+
+    EmulatorServer - HTTP server implementing the API endpoints used by the SDK
+    EmulatorConfig - latency, fault injection, rate limits and webhook delivery
+    EmulatorStore  - deterministic synthetic data, seeded lazily (millions of records)
+
+Run it standalone with ``python -m pexipay.emulator``.
+"""
+
+from .server import ApiError, EmulatorConfig, EmulatorServer, EmulatorStats
+from .store import EmulatorStore, Table
+
+__all__ = [
+    "ApiError",
+    "EmulatorConfig",
+    "EmulatorServer",
+    "EmulatorStats",
+    "EmulatorStore",
+    "Table",
+]
@@ -0,0 +1,375 @@
+"""Synthetic record store backing the emulator"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+Record = Dict[str, Any]
+Match = Callable[[Record], bool]
+
+_MASK = (1 << 64) - 1
+
+# Test card numbers from the sandbox documentation
+DECLINED_CARD = "4000000000000002"
+THREE_DS_CARD = "4000000000003220"
+
+# Every REFUND_EVERY-th synthetic payment (offset REFUND_OFFSET) has been refunded
+REFUND_EVERY = 20
+REFUND_OFFSET = 7
+
+
+def mix(index: int, salt: int = 0) -> int:
+    """SplitMix64 finalizer: a well-spread 64-bit hash of (index, salt)"""
+    z = (index * 0x9E3779B97F4A7C15 + salt * 0xBF58476D1CE4E5B9 + 0x632BE59BD9B4E019) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def make_id(prefix: str, index: int) -> str:
+    return f"{prefix}_{index:012d}"
+
+
+class Table:
+    """
+    One resource's records, addressed by a dense integer index
+
+    The first ``count`` records are synthetic: ``generate(index)`` builds them on demand
+    from the index alone, so seeding millions of records costs no memory. Records created
+    through the API are appended after them, and changed or deleted records are kept in
+    small side tables. ``generate`` may return None for indexes that hold no record.
+
+    ``created_at(index)`` must grow with the index; lists are served newest first, like
+    the API, and time filters are resolved by binary search.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        count: int,
+        created_at: Callable[[int], float],
+        generate: Callable[[int], Optional[Record]],
+    ):
+        self.prefix = prefix
+        self.count = count
+        self._created_at = created_at
+        self._generate = generate
+        self.extra: List[Record] = []
+        self._extra_created: List[float] = []
+        self.overrides: Dict[int, Record] = {}
+        self.deleted: Set[int] = set()
+
+    def __len__(self) -> int:
+        return self.count + len(self.extra)
+
+    def index_of(self, record_id: str) -> Optional[int]:
+        prefix, _, number = record_id.partition("_")
+        if prefix != self.prefix or not number.isdigit():
+            return None
+        index = int(number)
+        return index if index < len(self) else None
+
+    def created_at(self, index: int) -> float:
+        if index < self.count:
+            return self._created_at(index)
+        return self._extra_created[index - self.count]
+
+    def get(self, index: int) -> Optional[Record]:
+        if index in self.deleted:
+            return None
+        record = self.overrides.get(index)
+        if record is not None:
+            return record
+        if index < self.count:
+            return self._generate(index)
+        return self.extra[index - self.count]
+
+    def find(self, record_id: str) -> Optional[Record]:
+        index = self.index_of(record_id)
+        return None if index is None else self.get(index)
+
+    def append(self, build: Callable[[str, float], Record]) -> Record:
+        """Add a record built from its new ID and creation time"""
+        index = len(self)
+        now = time.time()
+        if index and now <= self.created_at(index - 1):
+            now = self.created_at(index - 1) + 0.001
+        record = build(make_id(self.prefix, index), now)
+        self._extra_created.append(now)
+        self.extra.append(record)
+        return record
+
+    def put(self, record: Record) -> None:
+        """Store a changed copy of a record"""
+        index = self.index_of(record["id"])
+        if index is None:
+            raise KeyError(record["id"])
+        if index < self.count:
+            self.overrides[index] = record
+        else:
+            self.extra[index - self.count] = record
+
+    def delete(self, record_id: str) -> None:
+        index = self.index_of(record_id)
+        if index is not None:
+            self.deleted.add(index)
+            self.overrides.pop(index, None)
+
+    def _first_at_or_after(self, epoch: float) -> int:
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.created_at(middle) < epoch:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def page(
+        self,
+        limit: int,
+        starting_after: Optional[str] = None,
+        ending_before: Optional[str] = None,
+        created_after: Optional[float] = None,
+        created_before: Optional[float] = None,
+        match: Optional[Match] = None,
+    ) -> Tuple[List[Record], bool]:
+        """
+        One page of records, newest first, and whether more follow in that direction
+
+        Raises:
+            KeyError: If a cursor is not an ID of this table
+        """
+        low = 0 if created_after is None else self._first_at_or_after(created_after)
+        high = len(self) if created_before is None else self._first_at_or_after(created_before)
+        if starting_after is not None:
+            cursor = self.index_of(starting_after)
+            if cursor is None:
+                raise KeyError(starting_after)
+            high = min(high, cursor)
+        backwards = False
+        if ending_before is not None:
+            cursor = self.index_of(ending_before)
+            if cursor is None:
+                raise KeyError(ending_before)
+            low = max(low, cursor + 1)
+            backwards = True
+
+        # Walks from the cursor outwards; filters other than time scan record by record
+        indexes = range(low, high) if backwards else range(high - 1, low - 1, -1)
+        records: List[Record] = []
+        for index in indexes:
+            record = self.get(index)
+            if record is None or (match is not None and not match(record)):
+                continue
+            if len(records) == limit:
+                return (records[::-1] if backwards else records), True
+            records.append(record)
+        return (records[::-1] if backwards else records), False
+
+
+class EmulatorStore:
+    """
+    Payments, refunds, customers, payment links and ledger transactions
+
+    Synthetic data is deterministic for a given ``seed`` and consistent across
+    resources: refunds point at refunded payments, payments at existing customers, and
+    every payment and refund has a ledger entry in ``transactions``. Use ``lock`` around
+    any read-modify-write sequence.
+    """
+
+    def __init__(
+        self,
+        payments: int = 10_000,
+        customers: int = 1_000,
+        payment_links: int = 1_000,
+        seed: int = 0,
+        interval: float = 1.0,
+        now: Optional[float] = None,
+    ):
+        """
+        Initialize the store
+
+        Args:
+            payments: Number of synthetic payments (refunds and transactions follow)
+            customers: Number of synthetic customers
+            payment_links: Number of synthetic payment links
+            seed: Varies the synthetic data while keeping it reproducible
+            interval: Seconds between consecutive synthetic payments
+            now: Creation time of the newest synthetic payment (default: now)
+        """
+        self.seed = seed
+        self.lock = threading.RLock()
+        end = time.time() if now is None else now
+        start = end - max(payments - 1, 0) * interval
+        self._start = start
+        self._interval = interval
+        self.customer_count = customers
+
+        def customer_created(index: int) -> float:
+            # Customers sign up before they pay
+            return start - (customers - index) * interval
+
+        def link_created(index: int) -> float:
+            return start + index * (max(payments, 1) * interval / max(payment_links, 1))
+
+        refunds = (payments - REFUND_OFFSET + REFUND_EVERY - 1) // REFUND_EVERY
+        self.customers = Table("cus", customers, customer_created, self._customer)
+        self.payments = Table("pay", payments, self._payment_created, self._payment)
+        self.refunds = Table("re", max(refunds, 0), self._refund_created, self._refund)
+        self.payment_links = Table("plink", payment_links, link_created, self._payment_link)
+        # Two ledger slots per synthetic payment: the charge, then its refund if any
+        self.transactions = Table("txn", 2 * payments, self._ledger_created, self._ledger)
+
+        self.available = round(1_000_000 + mix(0, seed) % 100_000_000 / 100, 2)
+        self.pending = 0.0
+
+    # Synthetic records
+
+    def _payment_created(self, index: int) -> float:
+        return self._start + index * self._interval
+
+    def _refund_created(self, index: int) -> float:
+        return self._payment_created(index * REFUND_EVERY + REFUND_OFFSET) + self._interval / 2
+
+    def _ledger_created(self, index: int) -> float:
+        payment = index // 2
+        return self._payment_created(payment) + (index % 2) * self._interval / 2
+
+    def _stamp(self, epoch: float) -> str:
+        from .._timestamps import format_timestamp
+
+        return format_timestamp(epoch)
+
+    def _customer(self, index: int) -> Record:
+        return {
+            "id": make_id("cus", index),
+            "email": f"customer{index}@example.com",
+            "name": f"Customer {index}",
+            "phone": f"+1555{mix(index, self.seed + 1) % 10_000_000:07d}",
+            "address": None,
+            "metadata": {},
+            "createdAt": self._stamp(self.customers.created_at(index)),
+        }
+
+    def _payment_amount(self, index: int) -> float:
+        return round(1 + mix(index, self.seed + 2) % 100_000 / 100, 2)
+
+    def _payment_status(self, index: int) -> str:
+        if index % REFUND_EVERY == REFUND_OFFSET:
+            return "refunded"
+        roll = mix(index, self.seed + 3) % 100
+        if roll < 88:
+            return "succeeded"
+        if roll < 94:
+            return "failed"
+        if roll < 98:
+            return "canceled"
+        return "requires_action"
+
+    def _payment(self, index: int) -> Record:
+        created = self._stamp(self._payment_created(index))
+        customer = None
+        if self.customer_count:
+            customer = f"customer{mix(index, self.seed + 4) % self.customer_count}@example.com"
+        status = self._payment_status(index)
+        amount = self._payment_amount(index)
+        return {
+            "id": make_id("pay", index),
+            "amount": amount,
+            "currency": "USD",
+            "status": status,
+            "description": f"Order #{index}",
+            "customerEmail": customer,
+            "amountRefunded": amount if status == "refunded" else 0.0,
+            "metadata": {},
+            "createdAt": created,
+            "updatedAt": created,
+        }
+
+    def _refund(self, index: int) -> Record:
+        payment = index * REFUND_EVERY + REFUND_OFFSET
+        return {
+            "id": make_id("re", index),
+            "paymentId": make_id("pay", payment),
+            "amount": self._payment_amount(payment),
+            "currency": "USD",
+            "status": "succeeded",
+            "reason": "requested_by_customer",
+            "metadata": {},
+            "createdAt": self._stamp(self._refund_created(index)),
+        }
+
+    def _payment_link(self, index: int) -> Record:
+        roll = mix(index, self.seed + 5) % 10
+        status = "completed" if roll < 5 else "active" if roll < 8 else "expired"
+        link_id = make_id("plink", index)
+        return {
+            "id": link_id,
+            "url": f"https://pay.pexipay.com/l/{link_id}",
+            "amount": round(5 + mix(index, self.seed + 6) % 50_000 / 100, 2),
+            "currency": "USD",
+            "status": status,
+            "description": f"Invoice #{index}",
+            "metadata": {},
+            "createdAt": self._stamp(self.payment_links.created_at(index)),
+        }
+
+    def _ledger(self, index: int) -> Optional[Record]:
+        payment = index // 2
+        if index % 2:
+            if payment % REFUND_EVERY != REFUND_OFFSET:
+                return None
+            refund = (payment - REFUND_OFFSET) // REFUND_EVERY
+            return ledger_entry(
+                make_id("txn", index),
+                "refund",
+                -self._payment_amount(payment),
+                "USD",
+                make_id("re", refund),
+                self._stamp(self._ledger_created(index)),
+            )
+        status = self._payment_status(payment)
+        if status not in ("succeeded", "refunded"):
+            return None
+        return ledger_entry(
+            make_id("txn", index),
+            "payment",
+            self._payment_amount(payment),
+            "USD",
+            make_id("pay", payment),
+            self._stamp(self._ledger_created(index)),
+        )
+
+    # API-created records
+
+    def add_transaction(self, type: str, amount: float, currency: str, source: str) -> Record:
+        """Append a completed ledger entry and apply its net amount to the balance"""
+        with self.lock:
+            entry = self.transactions.append(
+                lambda record_id, created: ledger_entry(
+                    record_id, type, amount, currency, source, self._stamp(created)
+                )
+            )
+            self.available = round(self.available + entry["net"], 2)
+            return entry
+
+    def balance(self) -> Record:
+        return {"available": self.available, "pending": round(self.pending, 2), "currency": "USD"}
+
+
+def ledger_entry(
+    record_id: str, type: str, amount: float, currency: str, source: str, created_at: str
+) -> Record:
+    fee = round(abs(amount) * 0.029 + 0.30, 2) if type == "payment" else 0.0
+    return {
+        "id": record_id,
+        "type": type,
+        "status": "completed",
+        "amount": amount,
+        "fee": fee,
+        "net": round(amount - fee, 2),
+        "currency": currency,
+        "sourceId": source,
+        "createdAt": created_at,
+    }
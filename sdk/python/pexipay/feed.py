@@ -0,0 +1,255 @@
+"""Change feeds: new records of a list endpoint, polled incrementally"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from ._timestamps import format_timestamp, parse_timestamp
+
+ListMethod = Callable[..., Dict[str, Any]]
+
+
+@dataclass
+class FeedState:
+    """
+    Position of a change feed, serializable to JSON
+
+    ``watermark`` is the creation time (epoch seconds) of the newest record processed.
+    ``recent`` maps the IDs of records created within the overlap window below it to
+    their creation times, so records that share a timestamp are delivered exactly once.
+    Records created before ``start`` already existed when the feed began and are never
+    delivered.
+    """
+
+    resource: str
+    filters: Dict[str, Any] = field(default_factory=dict)
+    watermark: Optional[float] = None
+    recent: Dict[str, float] = field(default_factory=dict)
+    start: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resource": self.resource,
+            "filters": dict(self.filters),
+            "watermark": self.watermark,
+            "recent": dict(self.recent),
+            "start": self.start,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeedState":
+        return cls(
+            resource=data["resource"],
+            filters=dict(data.get("filters") or {}),
+            watermark=data.get("watermark"),
+            recent={key: float(value) for key, value in (data.get("recent") or {}).items()},
+            start=data.get("start"),
+        )
+
+
+class ChangeFeed(Iterator[Dict[str, Any]]):
+    """
+    Yields each record created after a starting point exactly once, oldest first
+
+    Each poll lists the records created since the watermark minus ``overlap``, newest
+    first and paged with ``starting_after``, so a poll that spans several pages cannot
+    lose records at page boundaries. Records seen within the overlap window are
+    remembered by ID, which removes duplicates when timestamps are shared or records
+    become visible slightly out of order.
+
+    The polling interval adapts to volume. It halves after a poll that found records,
+    drops to ``min_interval`` after one that needed more than one page, and grows by
+    half up to ``max_interval`` while nothing arrives.
+
+    Iterating blocks between polls until ``stop()`` is called. A record counts as
+    processed once the next one is requested; ``state`` covers processed records only, so
+    a feed restored from it resumes without skipping or repeating any.
+    """
+
+    def __init__(
+        self,
+        fetch: ListMethod,
+        resource: str,
+        filters: Optional[Dict[str, Any]] = None,
+        start_at: Union[float, str, None] = None,
+        state: Optional[FeedState] = None,
+        overlap: float = 5.0,
+        page_size: int = 100,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+    ):
+        """
+        Initialize the feed
+
+        Args:
+            fetch: The resource's list method
+            resource: Name of the list method, stored in the state
+            filters: Other keyword arguments of the list method
+            start_at: Deliver records created at or after this time (epoch seconds or
+                ISO 8601). By default the feed starts after the newest existing record.
+            state: Resume from a saved state instead
+            overlap: Seconds below the watermark that are polled again for late records
+            page_size: Records per request
+            min_interval: Shortest wait between polls, in seconds
+            max_interval: Longest wait between polls, in seconds
+        """
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        if state is not None:
+            if state.resource != resource:
+                raise ValueError(f"Feed state is for {state.resource}, not {resource}")
+            if filters and filters != state.filters:
+                raise ValueError(f"Feed state filters {state.filters} do not match {filters}")
+            filters = dict(state.filters)
+        self._fetch = fetch
+        self.resource = resource
+        self.filters = filters
+        self.overlap = overlap
+        self.page_size = page_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+        # Delivered records (for the next query) and processed ones (for ``state``)
+        self._seen: Dict[str, float] = {}
+        self._horizon: Optional[float] = None
+        self._committed: Dict[str, float] = {}
+        self._watermark: Optional[float] = None
+        self._floor: Optional[float] = None
+        if state is not None:
+            self._seen = dict(state.recent)
+            self._committed = dict(state.recent)
+            self._horizon = self._watermark = state.watermark
+            self._floor = state.start
+        elif start_at is not None:
+            floor = parse_timestamp(start_at)
+            if floor is None:
+                raise ValueError(f"Invalid start_at: {start_at!r}")
+            self._floor = self._horizon = self._watermark = floor
+
+        self._buffer: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._pending: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._next_poll = 0.0
+        self._stopped = threading.Event()
+
+    @property
+    def state(self) -> FeedState:
+        """Position after the records processed so far"""
+        return FeedState(
+            self.resource, dict(self.filters), self._watermark, dict(self._committed), self._floor
+        )
+
+    def stop(self) -> None:
+        """End iteration; a blocked ``next()`` returns promptly"""
+        self._stopped.set()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Fetch new records now, oldest first, and mark them processed"""
+        records = self._fetch_new()
+        for entry in records:
+            self._commit(entry)
+        return [record for _, record in records]
+
+    def _start(self) -> None:
+        # Start after the newest existing record: everything sharing its timestamp is old
+        cursor = None
+        while True:
+            response = self._fetch(limit=self.page_size, starting_after=cursor, **self.filters)
+            page = response.get("data") or []
+            for record in page:
+                created = parse_timestamp(record.get("createdAt"))
+                if created is None:
+                    continue
+                if self._horizon is None:
+                    self._horizon = self._watermark = self._floor = created
+                if created < self._horizon:
+                    return
+                self._seen[record["id"]] = self._committed[record["id"]] = created
+            if not page or not response.get("hasMore"):
+                break
+            cursor = page[-1]["id"]
+        if self._horizon is None:
+            # Nothing exists yet; fall back to the local clock
+            self._horizon = self._watermark = self._floor = time.time() - self.overlap
+
+    def _fetch_new(self) -> List[Tuple[float, Dict[str, Any]]]:
+        if self._horizon is None:
+            self._start()
+        assert self._horizon is not None
+        since = format_timestamp(self._horizon - self.overlap)
+        fresh = []
+        cursor = None
+        pages = 0
+        while True:
+            response = self._fetch(
+                limit=self.page_size, starting_after=cursor, created_after=since, **self.filters
+            )
+            page = response.get("data") or []
+            pages += 1
+            for record in page:
+                record_id = record["id"]
+                if record_id in self._seen:
+                    continue
+                created = parse_timestamp(record.get("createdAt"))
+                if created is None:
+                    created = self._horizon
+                if self._floor is not None and created < self._floor:
+                    continue
+                self._seen[record_id] = created
+                fresh.append((created, record_id, record))
+            if not page or not response.get("hasMore"):
+                break
+            cursor = page[-1]["id"]
+
+        fresh.sort(key=lambda entry: (entry[0], entry[1]))
+        if fresh:
+            self._horizon = max(self._horizon, fresh[-1][0])
+            limit = self._horizon - self.overlap
+            self._seen = {key: value for key, value in self._seen.items() if value >= limit}
+            self.interval = self.min_interval if pages > 1 else self.interval / 2
+        else:
+            self.interval *= 1.5
+        self.interval = min(self.max_interval, max(self.min_interval, self.interval))
+        return [(created, record) for created, _, record in fresh]
+
+    def _commit(self, entry: Tuple[float, Dict[str, Any]]) -> None:
+        created, record = entry
+        self._committed[record["id"]] = created
+        if self._watermark is None or created > self._watermark:
+            self._watermark = created
+            limit = created - self.overlap
+            self._committed = {
+                key: value for key, value in self._committed.items() if value >= limit
+            }
+
+    def __iter__(self) -> "ChangeFeed":
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self._pending is not None:
+            self._commit(self._pending)
+            self._pending = None
+        while not self._buffer:
+            wait = self._next_poll - time.monotonic()
+            if self._stopped.wait(wait) if wait > 0 else self._stopped.is_set():
+                raise StopIteration
+            self._buffer.extend(self._fetch_new())
+            self._next_poll = time.monotonic() + self.interval
+        self._pending = self._buffer.popleft()
+        return self._pending[1]
+
+    def __enter__(self) -> "ChangeFeed":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None and self._pending is not None:
+            self._commit(self._pending)
+            self._pending = None
+        self.stop()
@@ -0,0 +1,168 @@
+"""Hedged requests for idempotent GETs"""
+
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from . import _fork
+from .hooks import LatencyHistogram
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    When to send a duplicate (hedge) of a slow GET request
+
+    Attributes:
+        percentile: Latency percentile of the endpoint after which a hedge is sent
+        min_delay: Lower bound in seconds for the hedge delay
+        max_delay: Upper bound in seconds for the hedge delay
+        initial_delay: Hedge delay used until ``min_samples`` latencies are known
+        min_samples: Observations needed before the percentile is trusted
+        budget: Maximum hedges as a fraction of requests (0.05 = at most 5% extra load)
+        burst: Maximum number of hedge tokens that can accumulate
+        max_workers: Threads available to run hedges (primaries run on the caller's thread)
+    """
+
+    percentile: float = 95.0
+    min_delay: float = 0.02
+    max_delay: float = 2.0
+    initial_delay: float = 0.5
+    min_samples: int = 20
+    budget: float = 0.05
+    burst: float = 10.0
+    max_workers: int = 32
+
+
+class HedgingController:
+    """Tracks per-route latency and the hedge budget for a client"""
+
+    def __init__(self, policy: Optional[HedgePolicy] = None):
+        self.policy = policy or HedgePolicy()
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._tokens = self.policy.burst
+        self._lock = threading.Lock()
+        self._executor: "Optional[ThreadPoolExecutor]" = None
+        self._timers: Optional[_Timers] = None
+        self.stats = {"requests": 0, "hedges": 0, "hedges_won": 0}
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Neither thread was copied into the child; new ones start on demand
+        self._lock = threading.Lock()
+        self._executor = None
+        self._timers = None
+
+    def delay_for(self, route: str) -> float:
+        """Seconds to wait for the primary request before hedging"""
+        policy = self.policy
+        histogram = self._latency.get(route)
+        if histogram is None or histogram.count < policy.min_samples:
+            return policy.initial_delay
+        delay = histogram.percentile(policy.percentile) or policy.initial_delay
+        return min(policy.max_delay, max(policy.min_delay, delay))
+
+    def record(self, route: str, latency: float) -> None:
+        """Record the latency the caller observed for a request"""
+        histogram = self._latency.get(route)
+        if histogram is None:
+            with self._lock:
+                histogram = self._latency.setdefault(route, LatencyHistogram())
+        histogram.record(latency)
+
+    def start_request(self) -> None:
+        """Account for a new request, earning a fraction of a hedge token"""
+        with self._lock:
+            self.stats["requests"] += 1
+            self._tokens = min(self.policy.burst, self._tokens + self.policy.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend a hedge token if the budget allows another hedge"""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            self.stats["hedges"] += 1
+            return True
+
+    def hedge_won(self) -> None:
+        with self._lock:
+            self.stats["hedges_won"] += 1
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on the hedge timer thread in ``delay`` seconds"""
+        if self._timers is None:
+            with self._lock:
+                if self._timers is None:
+                    self._timers = _Timers()
+        self._timers.call_later(delay, callback)
+
+    def executor(self) -> "ThreadPoolExecutor":
+        """Thread pool running hedged requests, created on first use"""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.policy.max_workers, thread_name_prefix="pexipay-hedge"
+                    )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the hedging thread pool and timer thread"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._timers is not None:
+            self._timers.stop()
+            self._timers = None
+
+
+class _Timers:
+    """Runs hedge callbacks after their delay on one background thread"""
+
+    def __init__(self) -> None:
+        self._queue: List[Tuple[float, int, Callable[[], None]]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="pexipay-hedge-timer", daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> None:
+        with self._condition:
+            entry = (time.monotonic() + delay, next(self._counter), callback)
+            heapq.heappush(self._queue, entry)
+            if self._queue[0] is entry:
+                self._condition.notify()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                callback = heapq.heappop(self._queue)[2]
+            try:
+                callback()
+            except Exception:  # pragma: no cover - keep the timer thread alive
+                pass
@@ -0,0 +1,215 @@
+"""Auto-paging list iterators with resumable checkpoints"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Type
+
+if TYPE_CHECKING:
+    import pandas
+    import pyarrow
+
+ListMethod = Callable[..., Dict[str, Any]]
+
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass
+class ListCheckpoint:
+    """
+    Position of a list scan, serializable to JSON
+
+    ``starting_after`` is the ID of the last record that was fully processed, so a
+    resumed scan continues with the record after it.
+    """
+
+    resource: str
+    """List method the scan uses, e.g. ``"payments.list"``"""
+    filters: Dict[str, Any] = field(default_factory=dict)
+    """Keyword arguments of the list method, other than the cursor and limit"""
+    starting_after: Optional[str] = None
+    count: int = 0
+    """Records processed so far"""
+    done: bool = False
+    """Whether the scan reached the end of the list"""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ListCheckpoint":
+        return cls(
+            resource=data["resource"],
+            filters=dict(data.get("filters") or {}),
+            starting_after=data.get("starting_after"),
+            count=int(data.get("count", 0)),
+            done=bool(data.get("done", False)),
+        )
+
+    def save(self, path: str) -> None:
+        """Write the checkpoint atomically, so a crash never leaves a truncated file"""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.to_dict(), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ListCheckpoint":
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+
+class ListIterator(Iterator[Dict[str, Any]]):
+    """
+    Iterates over every record of a list endpoint, fetching pages as needed
+
+    A record counts as processed once the next one is requested, so after an
+    interruption the scan resumes with the record that was being handled when it stopped
+    (at-least-once delivery). With ``checkpoint_file`` the checkpoint is saved every
+    ``checkpoint_every`` records, when the list is exhausted, and when a ``with`` block
+    exits, including through an exception.
+    """
+
+    def __init__(
+        self,
+        fetch: ListMethod,
+        checkpoint: ListCheckpoint,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ):
+        """
+        Initialize the iterator
+
+        Args:
+            fetch: The resource's list method
+            checkpoint: Where to start; updated in place as records are processed
+            page_size: Records per request (the ``limit`` parameter)
+            checkpoint_file: Path the checkpoint is saved to
+            checkpoint_every: Records between automatic saves
+        """
+        self._fetch = fetch
+        self._checkpoint = checkpoint
+        self.page_size = page_size
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._page: List[Dict[str, Any]] = []
+        self._position = 0
+        self._has_more = not checkpoint.done
+        self._pending: Optional[str] = None
+
+    @classmethod
+    def open(
+        cls,
+        fetch: ListMethod,
+        resource: str,
+        filters: Dict[str, Any],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> "ListIterator":
+        """
+        Start a scan, or resume one from ``checkpoint`` or an existing ``checkpoint_file``
+
+        Raises:
+            ValueError: If the checkpoint belongs to a different list or filters
+        """
+        filters = {name: value for name, value in filters.items() if value is not None}
+        if checkpoint is None and checkpoint_file and os.path.exists(checkpoint_file):
+            checkpoint = ListCheckpoint.load(checkpoint_file)
+        if checkpoint is None:
+            checkpoint = ListCheckpoint(resource, filters)
+        elif checkpoint.resource != resource:
+            raise ValueError(f"Checkpoint is for {checkpoint.resource}, not {resource}")
+        elif filters and filters != checkpoint.filters:
+            raise ValueError(f"Checkpoint filters {checkpoint.filters} do not match {filters}")
+        return cls(fetch, checkpoint, page_size, checkpoint_file, checkpoint_every)
+
+    @property
+    def checkpoint(self) -> ListCheckpoint:
+        """Copy of the current position"""
+        return ListCheckpoint.from_dict(self._checkpoint.to_dict())
+
+    def save(self) -> None:
+        """Save the checkpoint to ``checkpoint_file`` now"""
+        if self.checkpoint_file:
+            self._checkpoint.save(self.checkpoint_file)
+
+    def _commit(self) -> None:
+        checkpoint = self._checkpoint
+        checkpoint.starting_after = self._pending
+        checkpoint.count += 1
+        self._pending = None
+        if self.checkpoint_file and checkpoint.count % self.checkpoint_every == 0:
+            self.save()
+
+    def __iter__(self) -> "ListIterator":
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self._pending is not None:
+            self._commit()
+        if self._position >= len(self._page):
+            if self._has_more:
+                checkpoint = self._checkpoint
+                response = self._fetch(
+                    limit=self.page_size,
+                    starting_after=checkpoint.starting_after,
+                    **checkpoint.filters,
+                )
+                self._page = response.get("data") or []
+                self._position = 0
+                self._has_more = bool(response.get("hasMore")) and bool(self._page)
+            if self._position >= len(self._page):
+                if not self._checkpoint.done:
+                    self._checkpoint.done = True
+                    self.save()
+                raise StopIteration
+        record = self._page[self._position]
+        self._position += 1
+        self._pending = record["id"]
+        return record
+
+    # Columnar output, see pexipay.columnar
+
+    def record_batches(
+        self, columns: Optional[Dict[str, str]] = None, batch_size: int = 10_000
+    ) -> Iterator["pyarrow.RecordBatch"]:
+        """Stream the remaining records as typed Arrow record batches"""
+        from .columnar import record_batches
+
+        return record_batches(self, columns, batch_size=batch_size)
+
+    def to_arrow(
+        self, columns: Optional[Dict[str, str]] = None, batch_size: int = 10_000
+    ) -> "pyarrow.Table":
+        """Collect the remaining records into a typed Arrow table"""
+        from .columnar import to_arrow
+
+        return to_arrow(self, columns, batch_size=batch_size)
+
+    def to_pandas(
+        self, columns: Optional[Dict[str, str]] = None, batch_size: int = 10_000
+    ) -> "pandas.DataFrame":
+        """Collect the remaining records into a DataFrame with typed columns"""
+        from .columnar import to_pandas
+
+        return to_pandas(self, columns, batch_size=batch_size)
+
+    def __enter__(self) -> "ListIterator":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None and self._pending is not None:
+            # Leaving the block normally means the last record was handled
+            self._commit()
+        self.save()
@@ -2,6 +2,9 @@
 
 from typing import TYPE_CHECKING, Optional, Dict, Any
 
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
+from ..retry import IDEMPOTENCY_HEADER
+
 if TYPE_CHECKING:
     from ..client import PexipayClient
 
@@ -19,24 +22,31 @@ class CustomersResource:
         phone: Optional[str] = None,
         address: Optional[Dict[str, str]] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Create a new customer"""
-        data = {
-            "email": email,
-            "name": name,
-            "phone": phone,
-            "address": address,
-            "metadata": metadata,
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        """
+        Create a new customer
 
-        response = self.client.request("POST", "/customers", data=data)
+        Retries of a create with the same ``idempotency_key`` return the original customer
+        instead of creating another one (a random key is used when none is given).
+        """
+        data: Dict[str, Any] = {"email": email}
+        if name is not None:
+            data["name"] = name
+        if phone is not None:
+            data["phone"] = phone
+        if address is not None:
+            data["address"] = address
+        if metadata is not None:
+            data["metadata"] = metadata
+
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+        response = self.client.request("POST", "/customers", data=data, headers=headers)
         return response.get("data", response)
 
     def retrieve(self, customer_id: str) -> Dict[str, Any]:
         """Retrieve a customer by ID"""
-        response = self.client.request("GET", f"/customers/{customer_id}")
+        response = self.client.request("GET", f"/customers/{customer_id}", route="/customers/{id}")
         return response.get("data", response)
 
     def update(
@@ -49,22 +59,26 @@ class CustomersResource:
         metadata: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Update a customer"""
-        data = {
-            "email": email,
-            "name": name,
-            "phone": phone,
-            "address": address,
-            "metadata": metadata,
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        data: Dict[str, Any] = {}
+        if email is not None:
+            data["email"] = email
+        if name is not None:
+            data["name"] = name
+        if phone is not None:
+            data["phone"] = phone
+        if address is not None:
+            data["address"] = address
+        if metadata is not None:
+            data["metadata"] = metadata
 
-        response = self.client.request("PATCH", f"/customers/{customer_id}", data=data)
+        response = self.client.request(
+            "PATCH", f"/customers/{customer_id}", data=data, route="/customers/{id}"
+        )
         return response.get("data", response)
 
     def delete(self, customer_id: str) -> Dict[str, Any]:
         """Delete a customer"""
-        return self.client.request("DELETE", f"/customers/{customer_id}")
+        return self.client.request("DELETE", f"/customers/{customer_id}", route="/customers/{id}")
 
     def list(
         self,
@@ -76,7 +90,8 @@ class CustomersResource:
         created_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List customers"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
@@ -84,7 +99,26 @@ class CustomersResource:
             "createdAfter": created_after,
             "createdBefore": created_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/customers", params=params)
+
+    def list_all(
+        self,
+        email: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all customers, resumable from a checkpoint (see ListIterator)"""
+        return ListIterator.open(
+            self.list,
+            "customers.list",
+            {"email": email, "created_after": created_after, "created_before": created_before},
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
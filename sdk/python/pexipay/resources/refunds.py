@@ -1,6 +1,10 @@
 """Refunds resource"""
 
-from typing import TYPE_CHECKING, Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, Union
+
+from ..feed import ChangeFeed, FeedState
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
+from ..retry import IDEMPOTENCY_HEADER
 
 if TYPE_CHECKING:
     from ..client import PexipayClient
@@ -18,23 +22,29 @@ class RefundsResource:
         amount: Optional[float] = None,
         reason: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Create a new refund"""
-        data = {
-            "paymentId": payment_id,
-            "amount": amount,
-            "reason": reason,
-            "metadata": metadata,
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        """
+        Create a new refund
+
+        Retries of a create with the same ``idempotency_key`` return the original refund
+        instead of creating another one (a random key is used when none is given).
+        """
+        data: Dict[str, Any] = {"paymentId": payment_id}
+        if amount is not None:
+            data["amount"] = amount
+        if reason is not None:
+            data["reason"] = reason
+        if metadata is not None:
+            data["metadata"] = metadata
 
-        response = self.client.request("POST", "/refunds", data=data)
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+        response = self.client.request("POST", "/refunds", data=data, headers=headers)
         return response.get("data", response)
 
     def retrieve(self, refund_id: str) -> Dict[str, Any]:
         """Retrieve a refund by ID"""
-        response = self.client.request("GET", f"/refunds/{refund_id}")
+        response = self.client.request("GET", f"/refunds/{refund_id}", route="/refunds/{id}")
         return response.get("data", response)
 
     def list(
@@ -48,7 +58,8 @@ class RefundsResource:
         created_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List refunds"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
@@ -57,12 +68,62 @@ class RefundsResource:
             "createdAfter": created_after,
             "createdBefore": created_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/refunds", params=params)
 
+    def list_all(
+        self,
+        payment_id: Optional[str] = None,
+        status: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all refunds, resumable from a checkpoint (see ListIterator)"""
+        return ListIterator.open(
+            self.list,
+            "refunds.list",
+            {
+                "payment_id": payment_id,
+                "status": status,
+                "created_after": created_after,
+                "created_before": created_before,
+            },
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
+
+    def changes(
+        self,
+        payment_id: Optional[str] = None,
+        status: Optional[str] = None,
+        start_at: Union[float, str, None] = None,
+        state: Optional[FeedState] = None,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+    ) -> ChangeFeed:
+        """Feed of newly created refunds, each yielded once (see ChangeFeed)"""
+        return ChangeFeed(
+            self.list,
+            "refunds.list",
+            {
+                "payment_id": payment_id,
+                "status": status,
+            },
+            start_at=start_at,
+            state=state,
+            min_interval=min_interval,
+            max_interval=max_interval,
+        )
+
     def cancel(self, refund_id: str) -> Dict[str, Any]:
         """Cancel a refund"""
-        response = self.client.request("POST", f"/refunds/{refund_id}/cancel")
+        response = self.client.request(
+            "POST", f"/refunds/{refund_id}/cancel", route="/refunds/{id}/cancel"
+        )
         return response.get("data", response)
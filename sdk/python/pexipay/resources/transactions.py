@@ -1,6 +1,9 @@
 """Transactions resource"""
 
-from typing import TYPE_CHECKING, Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, Union
+
+from ..feed import ChangeFeed, FeedState
+from ..pagination import DEFAULT_PAGE_SIZE, ListCheckpoint, ListIterator
 
 if TYPE_CHECKING:
     from ..client import PexipayClient
@@ -14,7 +17,9 @@ class TransactionsResource:
 
     def retrieve(self, transaction_id: str) -> Dict[str, Any]:
         """Retrieve a transaction by ID"""
-        response = self.client.request("GET", f"/transactions/{transaction_id}")
+        response = self.client.request(
+            "GET", f"/transactions/{transaction_id}", route="/transactions/{id}"
+        )
         return response.get("data", response)
 
     def list(
@@ -28,7 +33,8 @@ class TransactionsResource:
         created_before: Optional[str] = None,
     ) -> Dict[str, Any]:
         """List transactions"""
-        params = {
+        # None values are left out of the query string
+        params: Dict[str, Any] = {
             "limit": limit,
             "startingAfter": starting_after,
             "endingBefore": ending_before,
@@ -37,7 +43,55 @@ class TransactionsResource:
             "createdAfter": created_after,
             "createdBefore": created_before,
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
 
         return self.client.request("GET", "/transactions", params=params)
+
+    def list_all(
+        self,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        checkpoint: Optional[ListCheckpoint] = None,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ) -> ListIterator:
+        """Iterate over all transactions, resumable from a checkpoint (see ListIterator)"""
+        return ListIterator.open(
+            self.list,
+            "transactions.list",
+            {
+                "type": type,
+                "status": status,
+                "created_after": created_after,
+                "created_before": created_before,
+            },
+            page_size,
+            checkpoint,
+            checkpoint_file,
+            checkpoint_every,
+        )
+
+    def changes(
+        self,
+        type: Optional[str] = None,
+        status: Optional[str] = None,
+        start_at: Union[float, str, None] = None,
+        state: Optional[FeedState] = None,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+    ) -> ChangeFeed:
+        """Feed of newly created transactions, each yielded once (see ChangeFeed)"""
+        return ChangeFeed(
+            self.list,
+            "transactions.list",
+            {
+                "type": type,
+                "status": status,
+            },
+            start_at=start_at,
+            state=state,
+            min_interval=min_interval,
+            max_interval=max_interval,
+        )
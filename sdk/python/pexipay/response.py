@@ -0,0 +1,110 @@
+"""API responses that keep the raw body and decode JSON on first access"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Iterator, Mapping, Optional
+
+from .retry import parse_retry_after
+
+_decode = json.JSONDecoder().decode
+
+
+def decode_json(content: bytes) -> Any:
+    """Parse a JSON body, raising ValueError if it is not valid JSON"""
+    try:
+        return _decode(content.decode("utf-8"))
+    except ValueError:
+        # Not UTF-8; json.loads() also detects a BOM and UTF-16/32
+        return json.loads(content)
+
+
+@dataclass(frozen=True)
+class RateLimitInfo:
+    """Rate-limit headers of a response (None when the API did not send one)"""
+
+    limit: Optional[int] = None
+    """Requests allowed per window"""
+    remaining: Optional[int] = None
+    """Requests left in the current window"""
+    reset_in: Optional[float] = None
+    """Seconds until the window resets"""
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class PexipayResponse(Mapping[str, Any]):
+    """
+    Successful API response, decoded lazily
+
+    Reading a key (``response["data"]``, ``response.get("data")``) parses the body once
+    and caches the result. Status, headers, request ID and rate-limit information never
+    touch the body, so a proxy or cache can forward ``content`` as-is and skip JSON
+    decoding entirely.
+    """
+
+    __slots__ = ("status_code", "headers", "content", "_payload", "_decoded")
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        # Body as received (after content decoding): the transport's bytes, not a copy
+        self.content = content
+        self._payload: Any = None
+        self._decoded = False
+
+    @property
+    def request_id(self) -> Optional[str]:
+        return self.headers.get("X-Request-Id")
+
+    @property
+    def rate_limit(self) -> RateLimitInfo:
+        headers = self.headers
+        reset = headers.get("X-RateLimit-Reset")
+        return RateLimitInfo(
+            limit=_int_header(headers, "X-RateLimit-Limit"),
+            remaining=_int_header(headers, "X-RateLimit-Remaining"),
+            reset_in=parse_retry_after({"X-RateLimit-Reset": reset}) if reset else None,
+        )
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    @property
+    def decoded(self) -> bool:
+        """Whether the body has been parsed yet"""
+        return self._decoded
+
+    def json(self) -> Any:
+        """Parsed body (an empty body is ``{}``); parsed on the first call only"""
+        if not self._decoded:
+            self._payload = decode_json(self.content) if self.content else {}
+            self._decoded = True
+        return self._payload
+
+    def _mapping(self) -> Mapping[str, Any]:
+        payload = self.json()
+        if not isinstance(payload, Mapping):
+            raise TypeError(f"Response body is a JSON {type(payload).__name__}, not an object")
+        return payload
+
+    def __getitem__(self, key: str) -> Any:
+        return self._mapping()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._mapping())
+
+    def __len__(self) -> int:
+        return len(self._mapping())
+
+    def __repr__(self) -> str:
+        return (
+            f"<PexipayResponse {self.status_code} request_id={self.request_id!r} "
+            f"({len(self.content)} bytes{', decoded' if self._decoded else ''})>"
+        )
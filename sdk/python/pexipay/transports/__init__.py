@@ -0,0 +1,50 @@
+"""
+Pluggable HTTP transports
+
+    RequestsTransport  - requests.Session based transport (default)
+    Urllib3Transport   - lower-overhead transport on a bare urllib3 PoolManager
+    HTTP2Transport     - multiplexed HTTP/2 transport (requires the http2 extra)
+    InMemoryTransport  - routes requests to Python callables, for tests and profiling
+    RecordingTransport - wraps another transport and records traffic to a cassette file
+    ReplayTransport    - replays a recorded cassette deterministically
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .base import Headers, Transport, TransportRequest, TransportResponse
+    from .http2 import HTTP2Transport
+    from .memory import InMemoryTransport
+    from .replay import RecordingTransport, ReplayTransport
+    from .requests_transport import RequestsTransport
+    from .urllib3_transport import Urllib3Transport
+
+# Imported on first use so only the selected transport's HTTP library gets loaded
+_EXPORTS = {
+    "Headers": "base",
+    "Transport": "base",
+    "TransportRequest": "base",
+    "TransportResponse": "base",
+    "RequestsTransport": "requests_transport",
+    "Urllib3Transport": "urllib3_transport",
+    "HTTP2Transport": "http2",
+    "InMemoryTransport": "memory",
+    "RecordingTransport": "replay",
+    "ReplayTransport": "replay",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
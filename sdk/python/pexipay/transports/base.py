@@ -0,0 +1,197 @@
+"""Transport interface used by PexipayClient"""
+
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ..compression import StreamDecoder
+from ..errors import DeadlineExceededError, NetworkError
+from ..hooks import RequestTimings
+
+
+class Headers(MutableMapping[str, str]):
+    """Case-insensitive header mapping that preserves the original spelling"""
+
+    def __init__(
+        self, data: Union[Mapping[str, str], Iterable[Tuple[str, str]], None] = None
+    ) -> None:
+        self._store: Dict[str, Tuple[str, str]] = {}
+        if data is not None:
+            self.update(data)
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._store[key.lower()] = (key, value)
+
+    def __getitem__(self, key: str) -> str:
+        return self._store[key.lower()][1]
+
+    def __delitem__(self, key: str) -> None:
+        del self._store[key.lower()]
+
+    def __iter__(self) -> Iterator[str]:
+        return (original for original, _ in self._store.values())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __repr__(self) -> str:
+        return f"Headers({dict(self.items())!r})"
+
+
+class CancelEvent(threading.Event):
+    """
+    Cancels a request when set
+
+    Transports check it between body chunks. Those that register their socket while
+    waiting for the response headers (see :meth:`watch`) also have a blocked read
+    interrupted, by shutting the socket down.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._sockets: List[socket.socket] = []
+        self._sockets_lock = threading.Lock()
+
+    def set(self) -> None:
+        with self._sockets_lock:
+            super().set()
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            _shutdown(sock)
+
+    def watch(self, sock: socket.socket) -> None:
+        """Shut ``sock`` down when the request is cancelled, until :meth:`unwatch`"""
+        with self._sockets_lock:
+            if not self.is_set():
+                self._sockets.append(sock)
+                return
+        _shutdown(sock)
+
+    def unwatch(self, sock: socket.socket) -> None:
+        with self._sockets_lock:
+            if sock in self._sockets:
+                self._sockets.remove(sock)
+
+
+def _shutdown(sock: socket.socket) -> None:
+    try:
+        # Bypass SSLSocket.shutdown, which would tear down the TLS state under the reader
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@dataclass
+class TransportRequest:
+    """A single HTTP attempt handed to a transport"""
+
+    method: str
+    url: str
+    """Absolute URL including the encoded query string"""
+    headers: Mapping[str, str]
+    body: Optional[bytes] = None
+    timeout: Optional[float] = None
+    """Connect and read timeout in seconds"""
+    deadline_at: Optional[float] = None
+    """time.monotonic() after which the body read must be abandoned"""
+    cancel: Optional[threading.Event] = None
+    """Set by the client when the result is no longer needed (a CancelEvent, for hedges)"""
+    timings: RequestTimings = field(default_factory=RequestTimings)
+    """Transports fill in queue_wait, connect, ttfb and body_read"""
+
+
+@dataclass
+class TransportResponse:
+    """Raw HTTP response returned by a transport"""
+
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes = b""
+    """Decoded body"""
+    wire_bytes: Optional[int] = None
+    """Body bytes received before decompression (None if unknown)"""
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+
+class Transport:
+    """
+    Sends HTTP requests for a PexipayClient
+
+    Implementations raise NetworkError (with ``request_sent=False`` when the connection
+    could not be established), RequestTimeoutError on timeouts, and DeadlineExceededError
+    when ``deadline_at`` passes while reading the body.
+    """
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        raise NotImplementedError
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        """
+        Open connections to the host of ``url`` ahead of traffic and keep them pooled
+
+        Returns the number of connections ready for use. Transports without a
+        connection pool do nothing and return 0.
+        """
+        return 0
+
+    def close(self) -> None:
+        """Release pooled connections"""
+
+    def __enter__(self) -> "Transport":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def read_body(
+    chunks: Iterable[bytes], content_encoding: Optional[str], request: TransportRequest
+) -> Tuple[bytes, int]:
+    """
+    Read a raw response body, decoding it chunk by chunk as it arrives
+
+    Returns the decoded body and the number of bytes received. Raises DeadlineExceededError
+    once the request's deadline passes and NetworkError when it is cancelled; the caller is
+    responsible for discarding the connection in that case.
+    """
+    try:
+        decoder = StreamDecoder(content_encoding)
+    except ValueError as e:
+        raise NetworkError(str(e)) from e
+    deadline_at = request.deadline_at
+    cancel = request.cancel
+    parts = []
+    received = 0
+    try:
+        for chunk in chunks:
+            received += len(chunk)
+            parts.append(decoder.decompress(chunk) if decoder.active else chunk)
+            if deadline_at is not None and time.monotonic() > deadline_at:
+                raise DeadlineExceededError()
+            if cancel is not None and cancel.is_set():
+                raise NetworkError("Request cancelled")
+        if decoder.active:
+            parts.append(decoder.flush())
+    except ValueError as e:
+        raise NetworkError(str(e)) from e
+    return b"".join(parts), received
@@ -0,0 +1,117 @@
+"""HTTP/2 transport backed by httpx"""
+
+import time
+from typing import Any, Dict, Optional
+
+from .. import _fork
+from ..errors import NetworkError, RequestTimeoutError
+from ..hooks import RequestTimings
+from .base import Transport, TransportRequest, TransportResponse, read_body
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None  # type: ignore[assignment]
+
+# httpcore trace events whose duration counts as connection setup
+_CONNECT_EVENTS = ("connection.connect_tcp", "connection.start_tls")
+
+
+class HTTP2Transport(Transport):
+    """
+    Multiplexes concurrent requests over a few HTTP/2 connections
+
+    Each connection carries many requests at once with HPACK-compressed headers, so high
+    fan-out needs far fewer sockets and TLS handshakes than HTTP/1.1, where every
+    concurrent request holds a connection of its own. Abandoned requests (hedges, deadline
+    overruns) reset their stream instead of dropping the connection.
+
+    Requires the ``http2`` extra: ``pip install pexipay[http2]``. HTTP/2 is negotiated
+    over TLS; plain ``http://`` URLs fall back to HTTP/1.1.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        **client_kwargs: Any,
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            max_connections: Upper bound on open connections (each multiplexes many
+                requests)
+            max_keepalive_connections: Idle connections kept open (default: all)
+            keepalive_expiry: Seconds an idle connection is kept
+            client_kwargs: Extra httpx.Client arguments (e.g. verify, proxy)
+        """
+        if httpx is None:
+            raise ImportError(
+                "HTTP2Transport requires httpx with HTTP/2 support. "
+                "Install it with: pip install pexipay[http2]"
+            )
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client_options = dict(http2=True, limits=limits, **client_kwargs)
+        self.client = httpx.Client(**self._client_options)
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Closing the inherited client would send GOAWAY on the parent's connections
+        self.client = httpx.Client(**self._client_options)
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        timings = request.timings
+        start = time.perf_counter()
+        extensions = {"trace": _Tracer(timings)}
+        try:
+            with self.client.stream(
+                request.method,
+                request.url,
+                content=request.body,
+                headers=dict(request.headers),
+                timeout=request.timeout,
+                extensions=extensions,
+            ) as response:
+                headers_received = time.perf_counter()
+                content, received = read_body(
+                    response.iter_raw(), response.headers.get("Content-Encoding"), request
+                )
+        except httpx.TimeoutException as e:
+            sent = not isinstance(e, (httpx.ConnectTimeout, httpx.PoolTimeout))
+            raise RequestTimeoutError(f"Network error: {str(e)}", sent) from e
+        except httpx.ConnectError as e:
+            raise NetworkError(f"Network error: {str(e)}", request_sent=False) from e
+        except httpx.HTTPError as e:
+            raise NetworkError(f"Network error: {str(e)}") from e
+
+        timings.ttfb = max(0.0, headers_received - start - timings.queue_wait - timings.connect)
+        timings.body_read = time.perf_counter() - headers_received
+        return TransportResponse(response.status_code, response.headers, content, received)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _Tracer:
+    """httpcore trace callback adding connection setup time to the request's timings"""
+
+    __slots__ = ("timings", "_started")
+
+    def __init__(self, timings: RequestTimings):
+        self.timings = timings
+        self._started: Dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        name, _, stage = event_name.rpartition(".")
+        if name not in _CONNECT_EVENTS:
+            return
+        if stage == "started":
+            self._started[name] = time.perf_counter()
+        elif name in self._started:
+            self.timings.connect += time.perf_counter() - self._started.pop(name)
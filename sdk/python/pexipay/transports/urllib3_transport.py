@@ -0,0 +1,126 @@
+"""Transport backed by a bare urllib3 PoolManager"""
+
+import time
+from typing import Any, Optional, Union
+
+import urllib3
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    HTTPError,
+    MaxRetryError,
+    NewConnectionError,
+    TimeoutError as Urllib3TimeoutError,
+)
+
+from .. import _fork, _timing
+from ..connections import DNSCache, session_reusing_context
+from ..errors import NetworkError, PexipayError, RequestTimeoutError
+from .base import Transport, TransportRequest, TransportResponse, read_body
+
+CHUNK_SIZE = 65536
+
+
+class Urllib3Transport(Transport):
+    """
+    Sends requests straight through urllib3
+
+    Skips the per-request work requests.Session does (settings merging, cookie handling,
+    hook dispatch, adapter lookup), which matters in tight loops and at high fan-out.
+    """
+
+    def __init__(
+        self,
+        num_pools: int = 10,
+        maxsize: int = 10,
+        block: bool = False,
+        dns_cache: Union[bool, DNSCache, None] = None,
+        tls_session_reuse: bool = False,
+        **pool_kwargs: Any,
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            num_pools: Number of host pools to cache
+            maxsize: Connections kept per host
+            block: Wait for a free connection instead of opening extra ones
+            dns_cache: Reuse resolved addresses for new connections (True for a
+                5 minute TTL, or a DNSCache)
+            tls_session_reuse: Resume earlier TLS sessions when opening connections
+                (ignored when an ssl_context is passed)
+            pool_kwargs: Extra urllib3.PoolManager arguments (e.g. ssl_context)
+        """
+        self.dns_cache: Optional[DNSCache] = None
+        if isinstance(dns_cache, DNSCache):
+            self.dns_cache = dns_cache
+        elif dns_cache:
+            self.dns_cache = DNSCache()
+        if tls_session_reuse and "ssl_context" not in pool_kwargs:
+            pool_kwargs["ssl_context"] = session_reusing_context()
+        self._pool_options = dict(num_pools=num_pools, maxsize=maxsize, block=block, **pool_kwargs)
+        self.pool = self._new_pool()
+        _fork.register(self)
+
+    def _new_pool(self) -> urllib3.PoolManager:
+        pool = urllib3.PoolManager(retries=False, **self._pool_options)
+        pool.pool_classes_by_scheme = {
+            "http": _timing.TimedHTTPConnectionPool,
+            "https": _timing.TimedHTTPSConnectionPool,
+        }
+        return pool
+
+    def _after_fork(self) -> None:
+        # Drop (without closing) the connections the parent is still using
+        self.pool = self._new_pool()
+
+    def send(self, request: TransportRequest) -> TransportResponse:
+        timings = request.timings
+        start = time.perf_counter()
+        timeout: Optional[urllib3.Timeout] = None
+        if request.timeout is not None:
+            timeout = urllib3.Timeout(connect=request.timeout, read=request.timeout)
+        _timing.activate(timings, self.dns_cache, request.cancel)
+        try:
+            response = self.pool.urlopen(
+                request.method,
+                request.url,
+                body=request.body,
+                headers=dict(request.headers),
+                timeout=timeout,
+                redirect=False,
+                preload_content=False,
+            )
+            headers_received = time.perf_counter()
+            try:
+                content, received = read_body(
+                    response.stream(CHUNK_SIZE, decode_content=False),
+                    response.headers.get("Content-Encoding"),
+                    request,
+                )
+            except PexipayError:
+                # Drop the connection rather than returning it with unread data
+                response.close()
+                raise
+            finally:
+                response.release_conn()
+        except HTTPError as e:
+            reason = e.reason if isinstance(e, MaxRetryError) else e
+            if isinstance(reason, NewConnectionError):
+                raise NetworkError(f"Network error: {str(e)}", request_sent=False) from e
+            if isinstance(reason, ConnectTimeoutError):
+                raise RequestTimeoutError(f"Network error: {str(e)}", False) from e
+            if isinstance(reason, Urllib3TimeoutError):
+                raise RequestTimeoutError(f"Network error: {str(e)}") from e
+            raise NetworkError(f"Network error: {str(e)}") from e
+        finally:
+            _timing.activate(None)
+
+        timings.ttfb = max(0.0, headers_received - start - timings.queue_wait - timings.connect)
+        timings.body_read = time.perf_counter() - headers_received
+        return TransportResponse(response.status, response.headers, content, received)
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        return _timing.warm_pool(self.pool.connection_from_url(url), connections, self.dns_cache)
+
+    def close(self) -> None:
+        self.pool.clear()
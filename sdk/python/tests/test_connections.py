@@ -0,0 +1,131 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from pexipay import PexipayClient
+from pexipay._timing import _read_session_tickets
+from pexipay.connections import DNSCache
+from pexipay.transports.urllib3_transport import Urllib3Transport
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Resolver:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failing = False
+
+    def __call__(self, host, port, *args):
+        self.calls += 1
+        if self.failing:
+            raise socket.gaierror("resolver down")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+
+def test_warmed_up_connections_skip_the_connect(emulator):
+    transport = Urllib3Transport(dns_cache=True)
+    client = PexipayClient("sk_test", api_base_url=emulator.url, transport=transport)
+    connects = []
+    client.hooks.after_response(lambda event: connects.append(event.timings.connect))
+
+    assert client.warmup(3) == 3
+    client.balance.retrieve()
+
+    assert connects == [0.0]
+    assert transport.dns_cache.stats["misses"] == 1
+
+
+def test_dns_cache_reuses_addresses_until_the_ttl():
+    resolver, clock = Resolver(), Clock()
+    cache = DNSCache(ttl=60, resolver=resolver, clock=clock)
+
+    assert cache.addresses("api.pexipay.test", 443) == ["10.0.0.1"]
+    cache.addresses("api.pexipay.test", 443)
+    assert resolver.calls == 1
+
+    clock.now = 60
+    cache.addresses("api.pexipay.test", 443)
+    assert resolver.calls == 2
+    assert cache.stats == {"hits": 1, "misses": 2, "stale": 0}
+
+
+def test_dns_cache_serves_stale_addresses_while_the_resolver_fails():
+    resolver, clock = Resolver(), Clock()
+    cache = DNSCache(ttl=60, resolver=resolver, clock=clock)
+    cache.addresses("api.pexipay.test", 443)
+
+    resolver.failing = True
+    clock.now = 120
+    assert cache.addresses("api.pexipay.test", 443) == ["10.0.0.1"]
+    assert cache.stats["stale"] == 1
+
+    cache.invalidate("api.pexipay.test")
+    with pytest.raises(OSError):
+        cache.addresses("api.pexipay.test", 443)
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is needed to create a test certificate")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = str(directory / "cert.pem"), str(directory / "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-keyout", key, "-out", cert, "-subj", "/CN=localhost"],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def tls_connection(certificate, greeting):
+    """A TLS 1.3 connection to a server that sends ``greeting`` after the handshake"""
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(*certificate)
+    listener = socket.create_server(("127.0.0.1", 0))
+    done = threading.Event()
+
+    def serve():
+        with listener, server_context.wrap_socket(listener.accept()[0], server_side=True) as conn:
+            if greeting:
+                conn.sendall(greeting)
+            done.wait(5)
+
+    threading.Thread(target=serve, daemon=True).start()
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    sock = context.wrap_socket(socket.create_connection(listener.getsockname()))
+    return SimpleNamespace(sock=sock), done
+
+
+def test_session_tickets_are_read_after_the_handshake(certificate):
+    conn, done = tls_connection(certificate, b"")
+    try:
+        _read_session_tickets(conn, 0.05)
+        assert conn.sock.session.has_ticket
+    finally:
+        done.set()
+        conn.sock.close()
+
+
+def test_data_before_the_first_request_rejects_the_connection(certificate):
+    conn, done = tls_connection(certificate, b"HTTP/1.1 408 Request Timeout\r\n\r\n")
+    try:
+        with pytest.raises(ConnectionError):
+            _read_session_tickets(conn, 0.05)
+    finally:
+        done.set()
+        conn.sock.close()
@@ -0,0 +1,168 @@
+import json
+import threading
+
+import pytest
+
+from pexipay import ChangeFeed, FeedState
+from pexipay._timestamps import format_timestamp, parse_timestamp
+
+NOW = 1_700_000_000.0
+
+
+class Records:
+    """A list endpoint over records that can be added, or made visible late"""
+
+    def __init__(self) -> None:
+        self.records = []
+
+    def add(self, id, created, status="succeeded"):
+        self.records.append({"id": id, "createdAt": format_timestamp(created), "status": status})
+
+    def __call__(self, limit, starting_after=None, created_after=None, status=None):
+        since = parse_timestamp(created_after)
+        matching = sorted(
+            (
+                record
+                for record in self.records
+                if (since is None or parse_timestamp(record["createdAt"]) > since)
+                and (status is None or record["status"] == status)
+            ),
+            key=lambda record: (record["createdAt"], record["id"]),
+            reverse=True,
+        )
+        if starting_after is not None:
+            ids = [record["id"] for record in matching]
+            position = ids.index(starting_after) + 1
+            matching = matching[position:]
+        return {"data": matching[:limit], "hasMore": len(matching) > limit}
+
+
+def feed_of(records, **options):
+    options.setdefault("page_size", 3)
+    return ChangeFeed(records, "payments.list", **options)
+
+
+def ids(records):
+    return [record["id"] for record in records]
+
+
+def test_existing_records_are_skipped_and_new_ones_delivered_once():
+    records = Records()
+    records.add("pay_old", NOW)
+    records.add("pay_old_twin", NOW)
+    feed = feed_of(records)
+
+    assert feed.poll() == []
+    records.add("pay_1", NOW + 1)
+    records.add("pay_2", NOW + 2)
+    assert ids(feed.poll()) == ["pay_1", "pay_2"]
+    assert feed.poll() == []
+
+
+def test_late_and_tied_records_within_the_overlap_are_delivered_once():
+    records = Records()
+    feed = feed_of(records, start_at=NOW)
+    records.add("pay_b", NOW + 10)
+    assert ids(feed.poll()) == ["pay_b"]
+
+    # Committed after pay_b was read, but created earlier or at the same time
+    records.add("pay_a", NOW + 10)
+    records.add("pay_late", NOW + 8)
+    records.add("pay_c", NOW + 11)
+    assert ids(feed.poll()) == ["pay_late", "pay_a", "pay_c"]
+    assert feed.poll() == []
+
+
+def test_a_poll_reads_every_page():
+    records = Records()
+    feed = feed_of(records, start_at=NOW)
+    for n in range(10):
+        records.add(f"pay_{n:02d}", NOW + n)
+
+    assert ids(feed.poll()) == [f"pay_{n:02d}" for n in range(10)]
+    assert feed.interval == feed.min_interval
+
+
+def test_start_at_bounds_the_first_poll():
+    records = Records()
+    records.add("pay_before", NOW - 60)
+    records.add("pay_at", NOW)
+    records.add("pay_after", NOW + 1)
+
+    assert ids(feed_of(records, start_at=format_timestamp(NOW)).poll()) == ["pay_at", "pay_after"]
+    with pytest.raises(ValueError):
+        feed_of(records, start_at="yesterday")
+
+
+def test_a_restored_state_resumes_after_the_processed_records():
+    records = Records()
+    feed = feed_of(records, start_at=NOW)
+    for n in range(3):
+        records.add(f"pay_{n}", NOW + n)
+    with feed:
+        assert next(feed)["id"] == "pay_0"
+        assert next(feed)["id"] == "pay_1"
+    # pay_1 was processed when the block ended; pay_2 was fetched but never handed out
+    state = FeedState.from_dict(json.loads(json.dumps(feed.state.to_dict())))
+    records.add("pay_3", NOW + 3)
+
+    resumed = feed_of(records, state=state)
+
+    assert ids(resumed.poll()) == ["pay_2", "pay_3"]
+
+
+def test_a_state_only_fits_its_own_feed():
+    state = feed_of(Records(), start_at=NOW, filters={"status": "failed"}).state
+
+    with pytest.raises(ValueError):
+        ChangeFeed(Records(), "refunds.list", state=state)
+    with pytest.raises(ValueError):
+        feed_of(Records(), state=state, filters={"status": "succeeded"})
+    assert feed_of(Records(), state=state).filters == {"status": "failed"}
+
+
+def test_filters_are_passed_to_the_list_method():
+    records = Records()
+    records.add("pay_ok", NOW + 1)
+    records.add("pay_failed", NOW + 2, status="failed")
+
+    feed = feed_of(records, start_at=NOW, filters={"status": "failed", "customer_email": None})
+
+    assert ids(feed.poll()) == ["pay_failed"]
+
+
+def test_the_interval_backs_off_while_nothing_arrives():
+    records = Records()
+    feed = feed_of(records, start_at=NOW, min_interval=1.0, max_interval=4.0)
+
+    intervals = []
+    for _ in range(5):
+        feed.poll()
+        intervals.append(feed.interval)
+    records.add("pay_1", NOW + 1)
+    feed.poll()
+
+    assert intervals == [1.5, 2.25, 3.375, 4.0, 4.0]
+    assert feed.interval == 2.0
+
+
+def test_stop_ends_a_blocked_iteration():
+    feed = feed_of(Records(), start_at=NOW, min_interval=30.0)
+    delivered = []
+    thread = threading.Thread(target=lambda: delivered.extend(feed))
+    thread.start()
+
+    feed.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert delivered == []
+
+
+def test_payments_changes_uses_the_list_endpoint(transport, make_client):
+    transport.add("GET", "/payments", {"data": [], "hasMore": False})
+    feed = make_client().payments.changes(status="succeeded", start_at=NOW)
+
+    assert feed.poll() == []
+    assert "status=succeeded" in transport.requests[0].url
+    assert feed.state.resource == "payments.list"
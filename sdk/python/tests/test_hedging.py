@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pexipay import PexipayClient, PexipayError
+from pexipay.hedging import HedgePolicy
+from pexipay.transports.urllib3_transport import Urllib3Transport
+
+from conftest import FAST_RETRY
+
+NO_RETRY = FAST_RETRY.with_options(max_retries=0)
+
+
+def sleeping(seconds, payload=None):
+    def handler(request, **params):
+        time.sleep(seconds)
+        return payload or {"id": "pay_1"}
+
+    return handler
+
+
+@pytest.fixture
+def stalling_server():
+    """Server whose first response never arrives; later requests are answered at once"""
+    release = threading.Event()
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            if len(calls) == 1:
+                release.wait(10)
+            body = json.dumps({"id": "pay_1", "copy": len(calls)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1", calls
+    release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("transport_class", [None, Urllib3Transport])
+def test_winning_hedge_cuts_a_stalled_primary_short(stalling_server, transport_class):
+    url, calls = stalling_server
+    client = PexipayClient(
+        "sk_test",
+        api_base_url=url,
+        transport=transport_class() if transport_class else None,
+        hedging=HedgePolicy(initial_delay=0.05),
+        retry=NO_RETRY,
+    )
+    hedged = []
+    client.hooks.after_response(lambda event: hedged.append(event.hedged))
+
+    start = time.perf_counter()
+    payment = client.payments.retrieve("pay_1")
+
+    assert time.perf_counter() - start < 2
+    assert payment["copy"] == 2
+    assert len(calls) == 2
+    assert hedged == [True]
+    assert client.hedging.stats == {"requests": 1, "hedges": 1, "hedges_won": 1}
+
+
+def test_fast_requests_are_not_hedged(transport, make_client):
+    transport.add("GET", "/payments/{id}", {"id": "pay_1"})
+    client = make_client(hedging=HedgePolicy(initial_delay=0.2))
+
+    for _ in range(20):
+        client.payments.retrieve("pay_1")
+
+    assert len(transport.requests) == 20
+    assert client.hedging.stats["hedges"] == 0
+
+
+def test_hedges_are_limited_by_the_budget(transport, make_client):
+    transport.add("GET", "/payments/{id}", sleeping(0.05))
+    client = make_client(
+        hedging=HedgePolicy(initial_delay=0.005, min_delay=0.005, budget=0.0, burst=2)
+    )
+
+    for _ in range(5):
+        client.payments.retrieve("pay_1")
+
+    assert client.hedging.stats["hedges"] == 2
+    assert len(transport.requests) == 5 + 2
+
+
+def test_failed_primary_falls_back_to_the_hedge(transport, make_client):
+    answers = []
+
+    def handler(request, id):
+        answers.append(id)
+        if len(answers) == 1:
+            time.sleep(0.1)
+            return 500, {"error": "primary failed"}
+        return {"id": id}
+
+    transport.add("GET", "/payments/{id}", handler)
+    client = make_client(hedging=HedgePolicy(initial_delay=0.01), retry=NO_RETRY)
+
+    assert client.payments.retrieve("pay_1") == {"id": "pay_1"}
+    assert client.hedging.stats["hedges_won"] == 1
+
+
+def test_primary_error_is_raised_when_the_hedge_fails_too(transport, make_client):
+    transport.add("GET", "/payments/{id}", sleeping(0.05, (503, {"error": "unavailable"})))
+    client = make_client(hedging=HedgePolicy(initial_delay=0.01), retry=NO_RETRY)
+
+    with pytest.raises(PexipayError) as raised:
+        client.payments.retrieve("pay_1")
+    assert raised.value.status_code == 503
+    assert len(transport.requests) == 2
+    assert client.hedging.stats["hedges_won"] == 0
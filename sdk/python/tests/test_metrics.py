@@ -0,0 +1,89 @@
+import os
+import threading
+import urllib.request
+
+import pytest
+
+from pexipay import PexipayError
+from pexipay.metrics import CONTENT_TYPE, MetricsCollector, render_directory
+
+from conftest import FAST_RETRY
+
+
+def samples(text):
+    """Rendered sample lines as {name_and_labels: value}"""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+@pytest.fixture
+def api(transport):
+    transport.add("GET", "/payments/{id}", {"id": "pay_1"})
+    transport.add("GET", "/balance", lambda request: (500, {"error": "unavailable"}))
+
+
+def test_requests_errors_and_retries_are_counted(api, make_client):
+    client = make_client(retry=FAST_RETRY.with_options(max_retries=2))
+    metrics = MetricsCollector().instrument(client)
+
+    client.payments.retrieve("pay_1")
+    with pytest.raises(PexipayError):
+        client.balance.retrieve()
+
+    values = samples(metrics.render())
+    assert values['pexipay_requests_total{method="GET",route="/payments/{id}",status="200"}'] == 1
+    assert values['pexipay_requests_total{method="GET",route="/balance",status="500"}'] == 3
+    assert values['pexipay_retries_total{method="GET",route="/balance"}'] == 2
+    assert (
+        values['pexipay_request_errors_total{method="GET",route="/balance",kind="http_5xx"}'] == 1
+    )
+    assert values["pexipay_requests_in_flight"] == 0
+    assert values['pexipay_request_duration_seconds_count{method="GET",route="/balance"}'] == 3
+    assert metrics.render().endswith("# EOF\n")
+
+
+def test_threads_record_into_one_snapshot(api, make_client):
+    client = make_client()
+    metrics = MetricsCollector().instrument(client)
+
+    threads = [threading.Thread(target=client.payments.retrieve, args=("pay_1",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    values = samples(metrics.render())
+    assert values['pexipay_requests_total{method="GET",route="/payments/{id}",status="200"}'] == 8
+
+
+def test_process_files_are_merged(api, make_client, tmp_path):
+    directory = str(tmp_path)
+    for worker in ("1", "2"):
+        client = make_client()
+        metrics = MetricsCollector().instrument(client)
+        client.payments.retrieve("pay_1")
+        # Both collectors run in this process, so each file is renamed after a worker
+        path = metrics.write_to_directory(directory)
+        os.replace(path, os.path.join(directory, f"pexipay_metrics_{worker}.json"))
+
+    values = samples(render_directory(directory))
+    assert values['pexipay_requests_total{method="GET",route="/payments/{id}",status="200"}'] == 2
+
+
+def test_http_server_serves_openmetrics(make_client):
+    metrics = MetricsCollector().instrument(make_client())
+    metrics.record_cache("balance", True)
+    server = metrics.start_http_server(0, "127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'pexipay_cache_requests_total{cache="balance",result="hit"} 1' in body
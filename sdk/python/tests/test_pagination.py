@@ -0,0 +1,59 @@
+import pytest
+
+from pexipay import PexipayClient
+from pexipay.pagination import ListCheckpoint
+
+
+@pytest.fixture
+def client(emulator):
+    return PexipayClient("sk_test", api_base_url=emulator.url)
+
+
+def test_list_all_reads_every_page(client):
+    first_page = client.payments.list(limit=100)["data"]
+    payments = list(client.payments.list_all(page_size=7))
+
+    assert len(payments) == 500
+    assert len({payment["id"] for payment in payments}) == 500
+    assert [payment["id"] for payment in payments[:100]] == [p["id"] for p in first_page]
+
+
+def test_interrupted_scan_resumes_from_its_checkpoint_file(client, tmp_path):
+    path = str(tmp_path / "scan.json")
+    every = [payment["id"] for payment in client.payments.list_all(page_size=100)]
+
+    seen = []
+    with pytest.raises(KeyboardInterrupt):
+        with client.payments.list_all(page_size=50, checkpoint_file=path) as scan:
+            for payment in scan:
+                seen.append(payment["id"])
+                if len(seen) == 120:
+                    raise KeyboardInterrupt
+    assert ListCheckpoint.load(path).count == 119
+
+    with client.payments.list_all(page_size=50, checkpoint_file=path) as scan:
+        resumed = [payment["id"] for payment in scan]
+
+    # The record being handled when the scan stopped is delivered again
+    assert resumed[0] == seen[-1]
+    assert seen[:-1] + resumed == every
+    checkpoint = ListCheckpoint.load(path)
+    assert checkpoint.done
+    assert checkpoint.count == 500
+
+
+def test_resume_from_checkpoint_object(client):
+    scan = client.payments.list_all(page_size=30)
+    head = [next(scan)["id"] for _ in range(45)]
+
+    rest = [payment["id"] for payment in client.payments.list_all(checkpoint=scan.checkpoint)]
+    assert len(head) - 1 + len(rest) == 500
+    assert rest[0] == head[-1]
+
+
+def test_checkpoint_of_another_scan_is_rejected(client):
+    checkpoint = ListCheckpoint("payments.list", {"status": "failed"})
+    with pytest.raises(ValueError):
+        client.payments.list_all(status="succeeded", checkpoint=checkpoint)
+    with pytest.raises(ValueError):
+        client.refunds.list_all(checkpoint=checkpoint)
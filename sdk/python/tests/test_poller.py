@@ -0,0 +1,94 @@
+from urllib.parse import parse_qs, urlsplit
+
+from pexipay import PaymentStatusPoller
+
+NOW = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = NOW
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def query(request):
+    return {name: values[0] for name, values in parse_qs(urlsplit(request.url).query).items()}
+
+
+def payment(id, status="processing"):
+    return {"id": id, "status": status, "createdAt": "2023-11-14T22:00:00Z"}
+
+
+def make_poller(client, payments):
+    clock = Clock()
+    poller = PaymentStatusPoller(client, min_interval=2.0, clock=clock)
+    for id in payments:
+        poller.track(id, "processing", NOW - 60)
+    clock.now += 10.0
+    return poller
+
+
+def list_requests(transport):
+    return [request for request in transport.requests if "/payments?" in request.url]
+
+
+def test_small_batches_are_retrieved(transport, make_client):
+    transport.add("GET", "/payments/{id}", lambda request, id: payment(id, "succeeded"))
+    poller = make_poller(make_client(), ["pay_1", "pay_2"])
+
+    changes = poller.poll_once()
+
+    assert sorted(change.payment_id for change in changes) == ["pay_1", "pay_2"]
+    assert poller.stats["retrieves"] == 2
+    assert list_requests(transport) == []
+    assert len(poller) == 0
+
+
+def test_large_batches_are_scanned_by_status(transport, make_client):
+    ids = [f"pay_{n}" for n in range(20)]
+
+    def list_payments(request):
+        status = query(request)["status"]
+        data = [payment(id, "succeeded") for id in ids[:5]] if status == "succeeded" else []
+        return {"data": data, "hasMore": False}
+
+    transport.add("GET", "/payments", list_payments)
+    poller = make_poller(make_client(), ids)
+
+    changes = poller.poll_once()
+
+    assert len(changes) == 5
+    assert poller.stats["retrieves"] == 0
+    assert len(list_requests(transport)) == len(poller.scan_statuses)
+    assert len(poller) == 15
+
+
+def test_first_scan_stops_at_its_budget_and_retrieves_the_rest(transport, make_client):
+    ids = [f"pay_{n}" for n in range(8)]
+    pages = []
+
+    def list_payments(request):
+        # An account with far more payments in the window than are tracked
+        pages.append(query(request).get("starting_after"))
+        data = [payment(f"other_{len(pages)}_{n}") for n in range(99)]
+        if len(pages) == 1:
+            data.append(payment("pay_0", "failed"))
+        return {"data": data, "hasMore": len(pages) < 1000}
+
+    transport.add("GET", "/payments", list_payments)
+    transport.add("GET", "/payments/{id}", lambda request, id: payment(id))
+    poller = make_poller(make_client(), ids)
+
+    changes = poller.poll_once()
+
+    assert [change.payment_id for change in changes] == ["pay_0"]
+    assert len(pages) == len(ids) - 1
+    assert poller.stats["retrieves"] == len(ids) - 1
+    assert poller.stats["requests"] < 2 * len(ids)
+
+    # The scan showed retrieves are cheaper for a batch this size
+    poller.clock.now += 600
+    poller.poll_once()
+    assert len(pages) == len(ids) - 1
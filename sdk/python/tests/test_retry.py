@@ -0,0 +1,110 @@
+import pytest
+
+from pexipay import PexipayError, RateLimitError
+from pexipay.retry import IDEMPOTENCY_HEADER
+from pexipay.transports.memory import json_response
+
+
+def failing(statuses, payload=None):
+    """Handler answering with each status in turn, then with ``payload``"""
+    remaining = list(statuses)
+
+    def handler(request, **params):
+        if remaining:
+            return remaining.pop(0), {"error": "unavailable"}
+        return payload if payload is not None else {"id": "pay_1"}
+
+    return handler
+
+
+def test_get_is_retried_until_it_succeeds(transport, make_client):
+    transport.add("GET", "/payments/{id}", failing([503, 502]))
+    client = make_client()
+    retries = []
+    client.hooks.on_retry(lambda event: retries.append(event.status_code))
+
+    assert client.payments.retrieve("pay_1") == {"id": "pay_1"}
+    assert len(transport.requests) == 3
+    assert retries == [503, 502]
+
+
+def test_retries_stop_after_max_retries(transport, make_client):
+    transport.add("GET", "/payments/{id}", failing([503] * 10))
+    client = make_client()
+
+    with pytest.raises(PexipayError) as raised:
+        client.payments.retrieve("pay_1")
+    assert raised.value.status_code == 503
+    assert len(transport.requests) == client.retry.max_retries + 1
+
+
+def test_client_errors_are_not_retried(transport, make_client):
+    transport.add("GET", "/payments/{id}", failing([400]))
+    client = make_client()
+
+    with pytest.raises(PexipayError) as raised:
+        client.payments.retrieve("pay_1")
+    assert raised.value.status_code == 400
+    assert len(transport.requests) == 1
+
+
+def test_post_retries_reuse_one_idempotency_key(transport, make_client):
+    transport.add("POST", "/payments", failing([503, 500]))
+    client = make_client()
+
+    client.payments.create(amount=10, currency="USD")
+    keys = {request.headers[IDEMPOTENCY_HEADER] for request in transport.requests}
+    assert len(transport.requests) == 3
+    assert len(keys) == 1
+
+
+def test_rate_limit_honours_retry_after(transport, make_client):
+    answers = [json_response({"error": "slow down"}, 429, {"Retry-After": "0"})]
+    transport.add("GET", "/balance", lambda request: answers.pop() if answers else {"available": 1})
+    client = make_client()
+
+    assert client.balance.retrieve() == {"available": 1}
+    assert len(transport.requests) == 2
+
+
+def test_retry_after_beyond_the_limit_fails_fast(transport, make_client):
+    transport.add(
+        "GET",
+        "/balance",
+        lambda request: json_response({"error": "slow down"}, 429, {"Retry-After": "3600"}),
+    )
+    client = make_client()
+
+    with pytest.raises(RateLimitError) as raised:
+        client.balance.retrieve()
+    assert raised.value.retry_after == 3600
+    assert len(transport.requests) == 1
+
+
+def test_caller_idempotency_key_is_reused_whatever_its_case(transport, make_client):
+    transport.add("POST", "/payments", failing([503]))
+    client = make_client()
+
+    client.request("POST", "/payments", data={"amount": 10}, headers={"idempotency-key": "k1"})
+    for request in transport.requests:
+        assert [name for name in request.headers if name.lower() == "idempotency-key"] == [
+            IDEMPOTENCY_HEADER
+        ]
+        assert request.headers[IDEMPOTENCY_HEADER] == "k1"
+
+
+def test_with_options_copies_the_headers(transport, make_client):
+    transport.add("GET", "/balance", {"available": 1})
+    client = make_client()
+    derived = client.with_options(deadline=1)
+
+    derived.set_api_key("sk_other")
+    client.balance.retrieve()
+    derived.balance.retrieve()
+
+    assert [request.headers["Authorization"] for request in transport.requests] == [
+        "Bearer sk_test",
+        "Bearer sk_other",
+    ]
+    assert derived.retry.deadline == 1
+    assert derived.transport is client.transport